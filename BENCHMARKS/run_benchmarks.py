@@ -0,0 +1,512 @@
+"""
+©2025 JesseLikesWeather.
+
+Offline benchmarks for Level2New.py, the legacy gzip volumes Level2Old.py
+reads, and GoesGIFCompiler.py.
+
+Every input comes from synthetic_data.py and is served from a local HTTP
+server, so "fetch" measures a real requests.get() without AWS or IEM. Each
+pipeline runs in its own process (for a clean peak RSS), every stage is timed,
+and the results go to a JSON file that can be compared with one from another
+commit:
+
+    python BENCHMARKS/run_benchmarks.py
+    python BENCHMARKS/run_benchmarks.py --output new.json --compare benchmark_results.json
+
+Stages: fetch, decompress, decode, grid, basemap, labels, warnings, savefig,
+first_frame, render, gif_encode. basemap/labels/warnings include the first
+draw of what they add, since cartopy and matplotlib do most of their work at
+draw time. GOES frames go through GoesGIFCompiler's own renderer for its
+render_mode; first_frame is the frame that also builds the figure. Natural
+Earth layers need cartopy's cached shapefiles; offline without them those
+stages are recorded as errors and the rest of the pipeline still runs.
+"""
+
+import argparse
+import bz2
+import gzip
+import http.server
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+
+# --- Configuration ---
+OUTPUT_FILE = 'benchmark_results.json'
+REPEAT = 3 # Runs per pipeline; the JSON keeps every run plus the median.
+REGRESSION_THRESHOLD = 0.10 # --compare flags stages more than 10% slower.
+PIPELINES = ['level2_v06', 'level2_legacy', 'goes_abi']
+ABI_FRAMES = 4
+ABI_SHAPE = (1500, 2500) # CONUS MCMIP at 2 km
+ABI_PRODUCTS = ['TrueColor', 'DayNight']
+# --- End Configuration ---
+
+V06_FILE = 'KTLX20130531_233259_V06'
+LEGACY_FILE = 'KTLX20050512_230220.gz'
+SBW_FILE = 'sbw.geojson'
+
+
+# ==============================================================================
+# Fixtures and the local "AWS/IEM" server
+# ==============================================================================
+
+def build_fixtures(directory, quick=False):
+    """Write every synthetic input into directory. Returns their stats."""
+    import synthetic_data
+
+    vcp = synthetic_data.VCP_212[:4] if quick else synthetic_data.VCP_212
+    abi_frames = 2 if quick else ABI_FRAMES
+    abi_shape = (ABI_SHAPE[0] // 2, ABI_SHAPE[1] // 2) if quick else ABI_SHAPE
+
+    stats = {}
+    raw, stats['level2_v06'] = synthetic_data.make_v06_volume(vcp=vcp)
+    with open(os.path.join(directory, V06_FILE), 'wb') as f:
+        f.write(raw)
+    stats['level2_v06']['file_bytes'] = len(raw)
+
+    raw, stats['level2_legacy'] = synthetic_data.make_legacy_volume()
+    with open(os.path.join(directory, LEGACY_FILE), 'wb') as f:
+        f.write(raw)
+    stats['level2_legacy']['file_bytes'] = len(raw)
+
+    raw, stats['sbw'] = synthetic_data.make_sbw_geojson()
+    with open(os.path.join(directory, SBW_FILE), 'wb') as f:
+        f.write(raw)
+
+    files = []
+    for frame in range(abi_frames):
+        name = f'OR_ABI-L2-MCMIPC-M6_G19_s2025335120{frame}170.nc'
+        stats['goes_abi'] = synthetic_data.make_abi_granule(
+            os.path.join(directory, name), datetime(2025, 12, 1, 12, frame * 5 + 1, 17), abi_shape, seed=frame)
+        files.append(name)
+    stats['goes_abi'].update({'frames': abi_frames, 'files': files,
+                              'file_bytes': sum(os.path.getsize(os.path.join(directory, f)) for f in files)})
+    return stats
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory):
+    """Serve directory on a free localhost port. Returns (server, base_url)."""
+    handler = lambda *args, **kwargs: QuietHandler(*args, directory=directory, **kwargs)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+# ==============================================================================
+# Stage timing
+# ==============================================================================
+
+class StageTimer:
+    """Seconds per stage for one run. A stage can be entered several times (per frame)."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.errors = {}
+
+    @contextmanager
+    def stage(self, name, fig=None):
+        """
+        Time a stage. With fig, artists the stage adds are drawn once inside
+        it. Artists that fail to draw (or everything the stage added, if the
+        stage itself fails) are removed so later stages still render.
+        """
+        before = artist_ids(fig) if fig is not None else None
+        start = time.perf_counter()
+        try:
+            with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                yield
+                if fig is not None:
+                    error = draw_artists(fig, new_artists(fig, before))
+                    if error is not None:
+                        self.errors[name] = error
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {e}"
+            if fig is not None:
+                remove_new_artists(fig, before)
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+
+def artist_ids(fig):
+    return {id(artist) for ax in fig.axes for artist in ax.get_children()}
+
+
+def new_artists(fig, before):
+    return [artist for ax in fig.axes for artist in ax.get_children() if id(artist) not in before]
+
+
+def draw_artists(fig, artists):
+    """Draw artists once. Ones that fail are removed; returns the first error."""
+    renderer = fig.canvas.get_renderer()
+    first_error = None
+    for artist in artists:
+        if not artist.get_visible():
+            continue
+        try:
+            artist.draw(renderer)
+        except Exception as e:
+            first_error = first_error or f"{type(e).__name__}: {e}"
+            artist.remove()
+    return first_error
+
+
+def remove_new_artists(fig, before):
+    for artist in new_artists(fig, before):
+        try:
+            artist.remove()
+        except (NotImplementedError, ValueError):
+            artist.set_visible(False)
+
+
+def decompress_ldm_records(raw):
+    """Archive II bytes with the bz2 LDM records expanded (what pyart does on read)."""
+    blocks = [raw[:24]]
+    position = 24
+    while position < len(raw):
+        size = abs(struct.unpack('>i', raw[position:position + 4])[0])
+        blocks.append(bz2.decompress(raw[position + 4:position + 4 + size]))
+        position += 4 + size
+    return b''.join(blocks)
+
+
+# ==============================================================================
+# Pipelines. Each returns ({stage: seconds}, {stage: error}, throughput).
+# ==============================================================================
+
+def radar_pipeline(name, base_url, fixture):
+    sys.path.insert(0, os.path.join(REPO, 'NEXRAD'))
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import cartopy.crs as ccrs
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        import Level2New
+
+    Level2New.RADAR_ID = 'KTLX'
+    timer = StageTimer()
+
+    with timer.stage('fetch'):
+        file_name = V06_FILE if name == 'level2_v06' else LEGACY_FILE
+        raw = Level2New.fetch_volume(f'{base_url}/{file_name}')
+
+    with timer.stage('decompress'):
+        if name == 'level2_v06':
+            data = decompress_ldm_records(raw)
+        else:
+            data = gzip.decompress(raw)
+
+    with timer.stage('decode'):
+        radar = Level2New.decode_volume(data)
+
+    radar_time = datetime(2013, 5, 31, 23, 32, 59)
+    projection = ccrs.Mercator()
+    with timer.stage('grid'):
+        extent = Level2New.radar_extent(radar)
+        fig, ax = Level2New.create_figure(extent, projection)
+
+    with timer.stage('grid', fig):
+        Level2New.plot_radar(ax, radar, projection)
+
+    with timer.stage('basemap', fig):
+        Level2New.add_basemap(ax)
+        Level2New.add_boundaries(ax)
+
+    with timer.stage('warnings', fig):
+        warnings_data = Level2New.fetch_warnings(radar_time, url=f'{base_url}/{SBW_FILE}')
+        Level2New.draw_warnings(ax, warnings_data, extent)
+
+    with timer.stage('labels', fig):
+        Level2New.plot_cities(ax, extent)
+        ax.spines['geo'].set_visible(False)
+        Level2New.add_banner(fig, radar_time)
+        Level2New.add_colorbar(fig)
+
+    with timer.stage('savefig'):
+        fig.savefig(io.BytesIO(), format='png', dpi=100, facecolor='#1a1a1a', edgecolor='none')
+    plt.close(fig)
+
+    decode_seconds = timer.seconds.get('decode') or float('nan')
+    fetch_seconds = timer.seconds.get('fetch') or float('nan')
+    throughput = {
+        'fetch_mb_per_s': fixture['file_bytes'] / 1e6 / fetch_seconds,
+        'decode_mb_per_s': fixture['uncompressed_bytes'] / 1e6 / decode_seconds,
+        'decode_mgates_per_s': fixture['gates'] / 1e6 / decode_seconds,
+        'volumes_per_s': 1 / sum(timer.seconds.values()),
+    }
+    return timer.seconds, timer.errors, throughput
+
+
+def goes_pipeline(name, base_url, fixture, work_dir):
+    sys.path.insert(0, os.path.join(REPO, 'SATELLITE'))
+    import matplotlib
+    matplotlib.use('Agg')
+    import requests
+    from PIL import Image
+    import GoesGIFCompiler as compiler
+    from goes_products import BandCache, PRODUCTS, granule_crs, open_granule, render_products, window_prepare
+
+    # The frame loop from GoesGIFCompiler.main(), in its configured
+    # render_mode, minus the goes2go download
+    timer = StageTimer()
+    custom_extent = compiler.map_extents.get(compiler.map_region)
+    renderers = {}
+    if compiler.render_mode in ('persistent', 'blit'):
+        renderers = {product_name: compiler.PersistentFrameRenderer(dpi=compiler.frame_dpi,
+                                                                    blit=compiler.render_mode == 'blit')
+                     for product_name in ABI_PRODUCTS}
+    frame_files = {product_name: [] for product_name in ABI_PRODUCTS}
+
+    for index, file_name in enumerate(fixture['files']):
+        path = os.path.join(work_dir, file_name)
+        with timer.stage('fetch'):
+            response = requests.get(f'{base_url}/{file_name}', timeout=30)
+            response.raise_for_status()
+            with open(path, 'wb') as f:
+                f.write(response.content)
+
+        with timer.stage('decode'):
+            ds = open_granule(path, compiler.chunk_size)
+            crs = granule_crs(ds)
+
+        with timer.stage('grid'):
+            prepare = window_prepare(ds, custom_extent, compiler.frame_pixels if compiler.downsample else None)
+            bands = BandCache(ds, prepare=prepare)
+            images = render_products(bands, ABI_PRODUCTS, num_workers=compiler.dask_threads)
+            image_extent = bands.extent()
+
+        for product_name, rgb in images.items():
+            timestamp = compiler.frame_timestamp(bands.scan_time(), PRODUCTS[product_name]['label'])
+            frame_file = os.path.join(work_dir, f'{product_name}_{index:03d}.png')
+            # The first frame also builds the figure: map features, city labels, background
+            with timer.stage('first_frame' if index == 0 else 'render'):
+                if product_name in renderers:
+                    renderers[product_name].render(crs, image_extent, rgb, timestamp, frame_file)
+                else:
+                    compiler.render_classic_frame(crs, image_extent, rgb, timestamp, frame_file)
+            # A failed frame (recorded as a stage error) just isn't in the GIF
+            if os.path.exists(frame_file):
+                frame_files[product_name].append(frame_file)
+        ds.close()
+
+    for renderer in renderers.values():
+        renderer.close()
+
+    with timer.stage('gif_encode'):
+        for product_name, files in frame_files.items():
+            if not files:
+                raise RuntimeError(f"No {product_name} frames were rendered")
+            frames = [Image.open(frame) for frame in files]
+            frames[0].save(io.BytesIO(), format='GIF', save_all=True, append_images=frames[1:],
+                           duration=compiler.frame_duration, loop=0)
+            for frame in frames:
+                frame.close()
+
+    frames_rendered = fixture['frames'] * len(ABI_PRODUCTS)
+    grid_seconds = timer.seconds.get('grid') or float('nan')
+    throughput = {
+        'fetch_mb_per_s': fixture['file_bytes'] / 1e6 / (timer.seconds.get('fetch') or float('nan')),
+        'grid_mpixels_per_s': fixture['pixels'] * fixture['frames'] / 1e6 / grid_seconds,
+        'frames_per_s': frames_rendered / sum(timer.seconds.values()),
+    }
+    return timer.seconds, timer.errors, throughput
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def child(name, base_url, fixture, repeat, queue):
+    """Run one pipeline repeat times in a fresh process and report back."""
+    sys.path.insert(0, HERE)
+    import warnings
+    warnings.simplefilter('ignore')
+    try:
+        runs = []
+        with tempfile.TemporaryDirectory() as work_dir:
+            for _ in range(repeat):
+                if name == 'goes_abi':
+                    runs.append(goes_pipeline(name, base_url, fixture, work_dir))
+                else:
+                    runs.append(radar_pipeline(name, base_url, fixture))
+        queue.put({'runs': runs, 'peak_rss_mb': peak_rss_mb()})
+    except Exception:
+        queue.put({'crash': traceback.format_exc()})
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def summarize(name, fixture, report):
+    if 'crash' in report:
+        return {'fixture': fixture, 'crash': report['crash']}
+
+    runs = report['runs']
+    stages = {}
+    for stage in runs[0][0]:
+        seconds = [run[0].get(stage, 0.0) for run in runs]
+        stages[stage] = {'median_s': median(seconds), 'min_s': min(seconds), 'runs': seconds}
+    throughput = {key: median([run[2][key] for run in runs]) for key in runs[0][2]}
+    errors = {}
+    for run in runs:
+        errors.update(run[1])
+    return {
+        'fixture': {key: value for key, value in fixture.items() if key != 'files'},
+        'stages': stages,
+        'total_median_s': median([sum(run[0].values()) for run in runs]),
+        'throughput': throughput,
+        'peak_rss_mb': report['peak_rss_mb'],
+        'errors': errors,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def library_versions():
+    versions = {}
+    for module in ('numpy', 'matplotlib', 'cartopy', 'pyart', 'xarray', 'dask', 'PIL'):
+        try:
+            versions[module] = getattr(__import__(module), '__version__', 'unknown')
+        except Exception:
+            versions[module] = None
+    return versions
+
+
+# ==============================================================================
+# Comparing two result files
+# ==============================================================================
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Print stage-by-stage changes. Returns the number of regressions."""
+    print(f"\nComparing {old.get('commit')} ({old.get('created')}) -> {new.get('commit')} ({new.get('created')})")
+    regressions = 0
+    for name, result in new['pipelines'].items():
+        before = old.get('pipelines', {}).get(name)
+        if before is None or 'stages' not in before or 'stages' not in result:
+            print(f"\n{name}: nothing to compare")
+            continue
+
+        print(f"\n{name}")
+        rows = [(stage, before['stages'].get(stage, {}).get('median_s'), timing['median_s'])
+                for stage, timing in result['stages'].items()]
+        rows.append(('TOTAL', before.get('total_median_s'), result.get('total_median_s')))
+        rows.append(('peak RSS (MB)', before.get('peak_rss_mb'), result.get('peak_rss_mb')))
+        for stage, old_value, new_value in rows:
+            if not old_value or new_value is None:
+                print(f"  {stage:<14} {'-':>10} {new_value:>10.3f}")
+                continue
+            change = new_value / old_value - 1
+            flag = ''
+            if change > threshold:
+                flag = '  SLOWER' if stage != 'peak RSS (MB)' else '  MORE MEMORY'
+                regressions += 1
+            elif change < -threshold:
+                flag = '  faster' if stage != 'peak RSS (MB)' else '  less memory'
+            print(f"  {stage:<14} {old_value:>10.3f} {new_value:>10.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks with synthetic Level II and ABI data.")
+    parser.add_argument('--output', default=OUTPUT_FILE, help="JSON file to write the results to")
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--pipelines', nargs='+', default=PIPELINES, choices=PIPELINES)
+    parser.add_argument('--quick', action='store_true', help="Smaller fixtures (4 sweeps, 2 half-size ABI frames)")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    sys.path.insert(0, HERE)
+    fixture_dir = tempfile.mkdtemp(prefix='wx_bench_')
+    try:
+        print("Generating synthetic fixtures...")
+        start = time.perf_counter()
+        fixtures = build_fixtures(fixture_dir, quick=args.quick)
+        print(f"Fixtures ready in {time.perf_counter() - start:.1f}s")
+
+        server, base_url = serve(fixture_dir)
+        context = multiprocessing.get_context('spawn')
+
+        pipelines = {}
+        for name in args.pipelines:
+            print(f"\nRunning {name} x{args.repeat}...")
+            queue = context.Queue()
+            process = context.Process(target=child, args=(name, base_url, fixtures[name], args.repeat, queue))
+            process.start()
+            report = queue.get()
+            process.join()
+
+            pipelines[name] = summarize(name, fixtures[name], report)
+            result = pipelines[name]
+            if 'crash' in result:
+                print(result['crash'])
+                continue
+            for stage, timing in result['stages'].items():
+                print(f"  {stage:<12} {timing['median_s']:8.3f}s")
+            print(f"  {'TOTAL':<12} {result['total_median_s']:8.3f}s   peak RSS {result['peak_rss_mb']:.0f} MB")
+            for stage, error in result['errors'].items():
+                print(f"  ({stage} failed: {error})")
+        server.shutdown()
+    finally:
+        shutil.rmtree(fixture_dir, ignore_errors=True)
+
+    commit, dirty = git_revision()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': library_versions(),
+        'settings': {'repeat': args.repeat, 'quick': args.quick, 'abi_products': ABI_PRODUCTS},
+        'pipelines': pipelines,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved as {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        if old.get('settings') != results['settings']:
+            print("Note: the two runs used different settings, compare with care.")
+        regressions = compare(old, results, args.threshold)
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""
+©2025 JesseLikesWeather.
+
+Synthetic inputs for the benchmarks, so nothing has to come from AWS or IEM.
+
+    make_v06_volume()      Message 31 Level II volume, bz2 LDM records (like AWS V06 files)
+    make_legacy_volume()   Message 1 (pre-2008) Level II volume, gzip'd
+    make_abi_granule()     ABI-L2-MCMIP style netCDF with all 16 CMI bands
+    make_sbw_geojson()     IEM storm-based warning GeoJSON
+
+The radar fields are a handful of Gaussian storm cells on top of noise, so
+they compress and plot roughly like a real severe weather volume.
+"""
+
+import bz2
+import gzip
+import json
+import struct
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Volume coverage pattern 212: (elevation angle, radials, moments)
+VCP_212 = [
+    (0.5, 720, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (0.9, 720, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (1.3, 720, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (1.8, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (2.4, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (3.1, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (4.0, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (5.1, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (6.4, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (8.0, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (10.0, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (12.5, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (15.6, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+    (19.5, 360, ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')),
+]
+
+# name: (gates, first gate m, gate spacing m, word size, scale, offset)
+MOMENTS = {
+    'REF': (1832, 2125, 250, 8, 2.0, 66.0),
+    'VEL': (1192, 2125, 250, 8, 2.0, 129.0),
+    'SW': (1192, 2125, 250, 8, 2.0, 129.0),
+    'ZDR': (1192, 2125, 250, 8, 16.0, 128.0),
+    'PHI': (1192, 2125, 250, 16, 2.8361, 2.0),
+    'RHO': (1192, 2125, 250, 8, 300.0, -60.5),
+}
+
+RECORD_SIZE = 2432
+CTM_SIZE = 12
+MESSAGES_PER_LDM_RECORD = 120
+
+SITES = {
+    # ICAO: (lat, lon, height m)
+    'KTLX': (35.3331, -97.2778, 370),
+    'KMOB': (30.6794, -88.2397, 63),
+}
+
+
+def _julian(when):
+    """NEXRAD date (days since 1970-01-01, day 1) and milliseconds of day."""
+    days = (when.date() - datetime(1970, 1, 1).date()).days + 1
+    ms = int((when - datetime(when.year, when.month, when.day)).total_seconds() * 1000)
+    return days, ms
+
+
+def storm_field(azimuths, ranges, seed=0, cells=12):
+    """dBZ on an (azimuth, range) grid: Gaussian cells over light noise."""
+    rng = np.random.default_rng(seed)
+    az = np.radians(azimuths)[:, np.newaxis]
+    x = ranges[np.newaxis, :] / 1000 * np.sin(az)
+    y = ranges[np.newaxis, :] / 1000 * np.cos(az)
+
+    dbz = rng.normal(5, 4, size=x.shape)
+    for _ in range(cells):
+        cx, cy = rng.uniform(-200, 200, size=2)
+        size = rng.uniform(8, 40)
+        peak = rng.uniform(35, 70)
+        dbz = np.maximum(dbz, peak * np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * size ** 2)))
+    return dbz.astype(np.float32)
+
+
+def _encode(values, scale, offset, word_size):
+    dtype = '>u1' if word_size == 8 else '>u2'
+    top = 255 if word_size == 8 else 65535
+    codes = np.clip(np.round(np.nan_to_num(values * scale + offset)), 2, top).astype(dtype)
+    codes[np.isnan(values)] = 0
+    return codes
+
+
+def _moment_values(name, dbz):
+    """Plausible values for every moment from the reflectivity of the same gates."""
+    echo = dbz > 10
+    if name == 'REF':
+        values = np.where(dbz > -5, dbz, np.nan)
+    elif name == 'VEL':
+        values = np.where(echo, np.clip(dbz - 30, -60, 60), np.nan)
+    elif name == 'SW':
+        values = np.where(echo, np.clip(dbz / 10, 0, 12), np.nan)
+    elif name == 'ZDR':
+        values = np.where(echo, np.clip(dbz / 20 - 0.5, -7, 7), np.nan)
+    elif name == 'PHI':
+        values = np.where(echo, np.clip(dbz * 3, 0, 360), np.nan)
+    else:
+        values = np.where(echo, np.clip(0.9 + dbz / 1000, 0.2, 1.05), np.nan)
+    return values
+
+
+def _message(msg_type, body, seq_id, when, fixed_size=False):
+    """CTM bytes + 16 byte message header + body."""
+    days, ms = _julian(when)
+    if fixed_size:
+        body = body.ljust(RECORD_SIZE - CTM_SIZE - 16, b'\0')
+    header = struct.pack('>HBBHHIHH', (16 + len(body)) // 2, 8, msg_type, seq_id % 65536, days, ms, 1, 1)
+    return b'\0' * CTM_SIZE + header + body
+
+
+def _msg5(vcp, pattern_number):
+    body = struct.pack('>HHHHHBB10s', 0, 2, pattern_number, len(vcp), 1, 2, 2, b'')
+    for elevation, _, _ in vcp:
+        body += struct.pack('>HBBBBHHhhhhhhHHH2sHHH2sHHH2s',
+                            int(round(elevation * 65536 / 360)), 1, 1, 1, 1, 15, 0,
+                            0, 0, 0, 0, 0, 0,
+                            0, 0, 0, b'', 0, 0, 0, b'', 0, 0, 0, b'')
+    return body
+
+
+def _msg31(site, when, azimuth, radial_number, radial_status, azimuth_resolution, cut_number, elevation, moments, fields):
+    lat, lon, height = SITES[site]
+    days, ms = _julian(when)
+
+    blocks = [
+        struct.pack('>1s3sHBBffhHfffffH2s', b'R', b'VOL', 44, 1, 0, lat, lon, height, 20,
+                    0.0, 0.0, 0.0, 0.0, 0.0, 212, b''),
+        struct.pack('>1s3sHhf', b'R', b'ELV', 12, 0, 0.0),
+        struct.pack('>1s3sHhffh2sff', b'R', b'RAD', 28, 4660, 0.0, 0.0, 2862, b'', 0.0, 0.0),
+    ]
+    for name in moments:
+        ngates, first_gate, gate_spacing, word_size, scale, offset = MOMENTS[name]
+        data = fields[name].tobytes()
+        if len(data) % 2:
+            data += b'\0'
+        blocks.append(struct.pack('>1s3sIHhhhhBBff', b'D', name.ljust(3).encode(), 0, ngates, first_gate,
+                                  gate_spacing, 0, 0, 0, word_size, scale, offset) + data)
+
+    header_size = struct.calcsize('>4sIHHfBBHBBBBfBbH10I')
+    pointers = []
+    position = header_size
+    for block in blocks:
+        pointers.append(position)
+        position += len(block)
+    pointers += [0] * (10 - len(pointers))
+
+    header = struct.pack('>4sIHHfBBHBBBBfBbH10I', site.encode(), ms, days, radial_number, azimuth,
+                         0, 0, position, azimuth_resolution, radial_status, cut_number, 1, elevation,
+                         0, 0, len(blocks), *pointers)
+    return header + b''.join(blocks)
+
+
+def _volume_header(tape, when, site):
+    days, ms = _julian(when)
+    return struct.pack('>9s3sII4s', tape, b'001', days, ms, site.encode())
+
+
+def make_v06_volume(site='KTLX', scan_time=datetime(2013, 5, 31, 23, 32, 59), vcp=VCP_212, seed=0):
+    """
+    A Message 31 volume as bytes, in the LDM bz2 record layout AWS serves.
+
+    Returns (raw_bytes, stats) where stats has the uncompressed size and
+    gate count for throughput numbers.
+    """
+    messages = [_message(5, _msg5(vcp, 212), 0, scan_time, fixed_size=True)]
+    gates = 0
+    when = scan_time
+    seq_id = 1
+    for cut_number, (elevation, radials, moments) in enumerate(vcp, start=1):
+        azimuths = (np.arange(radials) + 0.5) * 360.0 / radials
+        ranges = np.arange(MOMENTS['REF'][0]) * MOMENTS['REF'][2] + MOMENTS['REF'][1]
+        dbz = storm_field(azimuths, ranges, seed=seed) - elevation * 2
+
+        encoded = {}
+        for name in moments:
+            ngates, _, _, word_size, scale, offset = MOMENTS[name]
+            values = _moment_values(name, dbz[:, :ngates])
+            encoded[name] = _encode(values, scale, offset, word_size)
+            gates += encoded[name].size
+
+        for radial in range(radials):
+            status = 0 if radial == 0 else (2 if radial == radials - 1 else 1)
+            if radial == 0 and cut_number == 1:
+                status = 3
+            elif radial == radials - 1 and cut_number == len(vcp):
+                status = 4
+            fields = {name: encoded[name][radial] for name in moments}
+            body = _msg31(site, when, float(azimuths[radial]), radial + 1, status, 1 if radials == 720 else 2,
+                          cut_number, float(elevation), moments, fields)
+            messages.append(_message(31, body, seq_id, when))
+            seq_id += 1
+            when += timedelta(milliseconds=20)
+
+    uncompressed = b''.join(messages)
+    raw = [_volume_header(b'AR2V0006.', scan_time, site)]
+    for start in range(0, len(messages), MESSAGES_PER_LDM_RECORD):
+        block = bz2.compress(b''.join(messages[start:start + MESSAGES_PER_LDM_RECORD]))
+        raw.append(struct.pack('>i', len(block)) + block)
+    return b''.join(raw), {'uncompressed_bytes': len(uncompressed) + 24, 'gates': gates,
+                           'radials': seq_id - 1, 'sweeps': len(vcp)}
+
+
+def make_legacy_volume(site='KTLX', scan_time=datetime(2005, 5, 12, 23, 2, 20), cuts=(0.5, 1.5, 2.4, 3.4, 4.3, 6.0, 9.9, 14.6, 19.5), seed=0):
+    """
+    A pre-2008 Message 1 volume (fixed 2432 byte records), gzip'd like the
+    older archive downloads Level2Old.py handles.
+
+    Returns (raw_bytes, stats).
+    """
+    angle_code = 8 * 4096 / 180.0
+    sur_gates, doppler_gates = 460, 920
+    azimuths = (np.arange(360) + 0.5).astype(np.float64)
+    dbz_full = storm_field(azimuths, np.arange(sur_gates) * 1000.0, seed=seed)
+    doppler_dbz = storm_field(azimuths, np.arange(doppler_gates) * 250.0 - 375, seed=seed)
+
+    records = []
+    gates = 0
+    when = scan_time
+    for cut_number, elevation in enumerate(cuts, start=1):
+        moments = []
+        for name, dbz, offset in (('REF', dbz_full, 66.0), ('VEL', doppler_dbz, 129.0), ('SW', doppler_dbz, 129.0)):
+            values = _moment_values(name, dbz - elevation * 2)
+            moments.append(_encode(values, 2.0, offset, 8))
+        ref, vel, sw = moments
+        for radial in range(360):
+            days, ms = _julian(when)
+            status = 0 if radial == 0 else (2 if radial == 359 else 1)
+            header = struct.pack('>IHhHHHHHHHHHHHHfHHHHH8s2s2s2shhhH32s',
+                                 ms, days, 4660, int(azimuths[radial] * angle_code), radial + 1, status,
+                                 int(elevation * angle_code), cut_number,
+                                 0, 65536 - 375, 1000, 250, sur_gates, doppler_gates, 1, 0.0,
+                                 100, 100 + sur_gates, 100 + sur_gates + doppler_gates, 2, 21,
+                                 b'', b'', b'', b'', 2862, 0, 0, 0, b'')
+            body = header + ref[radial].tobytes() + vel[radial].tobytes() + sw[radial].tobytes()
+            records.append(_message(1, body, len(records) + 1, when, fixed_size=True))
+            gates += sur_gates + 2 * doppler_gates
+            when += timedelta(milliseconds=60)
+
+    uncompressed = _volume_header(b'ARCHIVE2.', scan_time, site) + b''.join(records)
+    return gzip.compress(uncompressed, compresslevel=6), {'uncompressed_bytes': len(uncompressed), 'gates': gates,
+                                                          'radials': len(records), 'sweeps': len(cuts)}
+
+
+def make_abi_granule(path, scan_time=datetime(2025, 12, 1, 12, 1, 17), shape=(1500, 2500), seed=0):
+    """
+    Write an ABI-L2-MCMIP style CONUS granule (16 int16-packed CMI bands,
+    2 km, GOES-East projection) to path. Returns stats.
+    """
+    import xarray as xr
+
+    rng = np.random.default_rng(seed)
+    height, width = shape
+    step = 56e-6
+    x = (-0.101332 + np.arange(width) * step).astype(np.float32)
+    y = (0.128212 - np.arange(height) * step).astype(np.float32)
+
+    # Smooth cloud field shared by every band so products look like weather
+    coarse = rng.random((height // 50 + 2, width // 50 + 2))
+    clouds = np.kron(coarse, np.ones((50, 50)))[:height, :width]
+    clouds = np.clip(clouds + rng.normal(0, 0.05, size=clouds.shape), 0, 1).astype(np.float32)
+
+    ds = xr.Dataset(coords={'x': ('x', x, {'units': 'rad'}), 'y': ('y', y, {'units': 'rad'})})
+    encoding = {}
+    for band in range(1, 17):
+        name = f'CMI_C{band:02d}'
+        if band <= 6:
+            values = clouds * 0.9 + 0.05
+            scale, offset = 1 / 4095, 0.0
+        else:
+            values = 300 - clouds * 100
+            scale, offset = 0.05, 150.0
+        ds[name] = (('y', 'x'), values)
+        encoding[name] = {'dtype': 'int16', 'scale_factor': scale, 'add_offset': offset,
+                          '_FillValue': -1, 'zlib': True, 'complevel': 1, 'chunksizes': (226, 226)}
+
+    ds['goes_imager_projection'] = xr.DataArray(np.int32(-2147483647), attrs={
+        'perspective_point_height': 35786023.0,
+        'semi_major_axis': 6378137.0,
+        'semi_minor_axis': 6356752.31414,
+        'inverse_flattening': 298.2572221,
+        'longitude_of_projection_origin': -75.0,
+        'sweep_angle_axis': 'x',
+    })
+    ds['geospatial_lat_lon_extent'] = xr.DataArray(np.float32(9.96921e36), attrs={'geospatial_lon_nadir': -75.0})
+    ds.attrs.update({
+        'title': 'ABI L2 Cloud and Moisture Imagery',
+        'cdm_data_type': 'Image',
+        'dataset_name': f"OR_ABI-L2-MCMIPC-M6_G19_s{scan_time.strftime('%Y%j%H%M%S')}0.nc",
+        'time_coverage_start': scan_time.strftime('%Y-%m-%dT%H:%M:%S.0Z'),
+        'time_coverage_end': (scan_time + timedelta(minutes=5)).strftime('%Y-%m-%dT%H:%M:%S.0Z'),
+    })
+    ds.to_netcdf(path, encoding=encoding)
+    return {'pixels': height * width, 'bands': 16}
+
+
+def make_sbw_geojson(center=(35.3331, -97.2778), scan_time=datetime(2013, 5, 31, 23, 32, 59), count=150, seed=0):
+    """
+    IEM sbw.geojson style FeatureCollection: convective warnings scattered over
+    the CONUS with a cluster around center. Returns (raw_bytes, stats).
+    """
+    rng = np.random.default_rng(seed)
+    kinds = [('TO', 'W'), ('SV', 'W'), ('FF', 'W'), ('MA', 'W'), ('FA', 'Y'), ('TO', 'A')]
+    features = []
+    for index in range(count):
+        if index < count // 3:
+            lat = center[0] + rng.uniform(-1.5, 1.5)
+            lon = center[1] + rng.uniform(-4, 4)
+        else:
+            lat = rng.uniform(25, 49)
+            lon = rng.uniform(-124, -67)
+
+        # Irregular 5-9 vertex polygon, 15-60 km across
+        vertices = rng.integers(5, 10)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+        radius = rng.uniform(0.08, 0.3, vertices)
+        ring = [[round(lon + r * np.cos(a), 4), round(lat + r * np.sin(a), 4)] for a, r in zip(angles, radius)]
+        ring.append(ring[0])
+
+        phenomena, significance = kinds[index % len(kinds)]
+        geometry = {'type': 'Polygon', 'coordinates': [ring]}
+        if index % 10 == 9:
+            geometry = {'type': 'MultiPolygon', 'coordinates': [[ring], [[[x + 0.4, y] for x, y in ring]]]}
+        features.append({
+            'type': 'Feature',
+            'id': index,
+            'properties': {
+                'wfo': 'OUN', 'eventid': index + 1, 'phenomena': phenomena, 'significance': significance,
+                'issue': (scan_time - timedelta(minutes=20)).strftime('%Y-%m-%dT%H:%MZ'),
+                'expire': (scan_time + timedelta(minutes=25)).strftime('%Y-%m-%dT%H:%MZ'),
+                'ps': f"{phenomena}.{significance}",
+                'is_emergency': phenomena == 'TO' and index % 17 == 0,
+                'is_pds': phenomena == 'TO' and index % 7 == 0,
+            },
+            'geometry': geometry,
+        })
+
+    return json.dumps({'type': 'FeatureCollection', 'features': features}).encode(), {'features': count}
@@ -2,21 +2,25 @@
 ©2025 JesseLikesWeather.
 """
 
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
-import cartopy.io.shapereader as shpreader
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from matplotlib import patheffects
-from matplotlib.patches import Polygon as MplPolygon
-import pyart
 from datetime import datetime, timedelta
-import requests
-from io import BytesIO
 import bz2
+import gzip
+import logging
 import tempfile
 import os
-import numpy as np
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'UTILITIES'))
+from image_writer import ImageWriter, figure_rgba
+from instrument import Instrumentation, configure_logging
+from render_cache import RenderCache, cache_key, code_version
+
+from radar_common import MOMENT_STYLES, volume_key
+
+# pyart, cartopy, matplotlib, requests and PIL take seconds to import (pyart
+# also registers its colormaps then), so each function imports what it needs.
+# Python caches modules, so only the first import of each one costs anything.
 
 
 # Configuration. Make sure files are in _V06 Format.
@@ -26,444 +30,990 @@ filename_time = "220753"
 RADAR_ID = "KMOB"
 RADAR_LOCATION = "MOBILE, AL"
 MIN_POPULATION = 1000
+
+# 'reflectivity' plots the lowest tilt. 'composite', 'echo_tops' and 'vil' are
+# built from every tilt in the volume (see volume_products.py).
+RADAR_PRODUCT = 'reflectivity'
+
+# Folder for decoded volumes (see sweep_archive.py). When set, each volume is
+# decoded once and saved there; later runs for the same site and scan time
+# read only the sweeps they draw from it instead of downloading again.
+SWEEP_ARCHIVE_DIR = None # e.g. 'sweep_archive'
+# Local copy of the Unidata archive (YYYY/MM/DD/SITE/ like the bucket, or
+# just the files). Volumes found there are memory-mapped instead of downloaded
+# and only the tilts drawn are decoded (local_archive.py). Decompressed copies
+# and indexes are saved next to them, or in LOCAL_SIDECAR_DIR if set.
+LOCAL_ARCHIVE_DIR = None # e.g. '/data/nexrad-level2'
+LOCAL_SIDECAR_DIR = None
+# Several moments/tilts side by side from one decode (multi_panel.py): '2x2'
+# or '1x4', or None for the single map. PANELS lists (field, tilt) pairs,
+# tilt 0 being the lowest elevation.
+PANEL_LAYOUT = None
+PANELS = [('reflectivity', 0), ('velocity', 0), ('differential_reflectivity', 0), ('cross_correlation_ratio', 0)]
+
+# Also save a table of the cities in view under each warning (warning_impact.py).
+IMPACT_TABLE_FILE = None # e.g. 'impact.csv'
+
+# Images are encoded on background threads (UTILITIES/image_writer.py), so the
+# next loop frame is already rendering while the last one compresses.
+OUTPUT_FORMAT = 'png' # 'webp' or 'avif' are several times smaller
+PNG_COMPRESS_LEVEL = 6 # 0-9. 1 encodes a lot faster for a slightly bigger file.
+IMAGE_QUALITY = 90 # WebP/AVIF, 0-100. 100 is lossless WebP.
+ENCODE_THREADS = 2
+# Finished images kept between runs (UTILITIES/render_cache.py), keyed by the
+# volume (URL and ETag, or the local file), extent, product, colormap,
+# MIN_POPULATION, warning window and code. Re-running with the same settings
+# copies the stored image instead of rendering it again. Not used for loops
+# or with IMPACT_TABLE_FILE, which need the full render.
+RENDER_CACHE_DIR = None # e.g. 'render_cache'
+RENDER_CACHE_MB = 500 # Least recently used images are deleted past this.
+
+# Extra volumes from the same site, rendered as a loop after the main image.
+# The map, labels, banner and colorbar are reused; only the radar, warnings
+# and time text change between frames.
+LOOP_VOLUME_URLS = []
+# 'blit' restores the cached static layers and redraws only the dynamic ones.
+# 'savefig' redraws the whole figure for every loop frame.
+LOOP_RENDER_MODE = 'blit'
+BLIT_BENCHMARK = False # Print full-redraw vs. blit frames per second.
+
+# 'DEBUG' also prints every city and warning as it is plotted.
+LOG_LEVEL = 'INFO'
+TRACK_MEMORY = False # tracemalloc peak per stage (slows decoding down noticeably).
+TRACE_FILE = None # e.g. 'level2_trace.json', opens in chrome://tracing or ui.perfetto.dev
+METRICS_FILE = None # e.g. 'level2.prom', Prometheus text format
+
+# Path of a running level2_worker.py socket. When set, the render is handed to
+# that already-warm process instead of importing everything here.
+WARM_WORKER_SOCKET = None # e.g. '/tmp/level2new-worker.sock'
 # --- End Configuration ---
 
-print("Downloading NEXRAD V06 data from AWS...")
-try:
-    response = requests.get(aws_nexrad_url, timeout=30)
-    response.raise_for_status()
+log = logging.getLogger('Level2New')
+metrics = Instrumentation('Level2New')
+
+WARNING_TYPES = {
+    'TO': {'color': '#FF0000', 'name': 'Tornado Warning'},
+    'SV': {'color': '#FFA500', 'name': 'Severe Thunderstorm'},
+    'FF': {'color': '#00FF00', 'name': 'Flash Flood Warning'},
+    'MA': {'color': '#FF00FF', 'name': 'Marine Warning'},
+}
+
+SIGNIFICANCE_FILTER = ['W', 'Y', 'A']
+
+REFLECTIVITY_STYLE = {'cmap': 'NWSRef', 'vmin': -20, 'vmax': 70, 'label': 'REFLECTIVITY (dBZ)',
+                      'ticks': [-20, -10, 0, 10, 20, 30, 40, 50, 60, 70]}
+
+SBW_GEOJSON_URL = "https://mesonet.agron.iastate.edu/geojson/sbw.geojson"
+WARNING_WINDOW = timedelta(hours=0) # Warnings active this long either side of the scan.
+
+# Map extent around the radar, degrees
+LAT_BUFFER = 1.7
+LON_BUFFER = 4.3
+
+
+def load_volume(url, sweeps=None):
+    """
+    Download (or read locally), decompress and decode a V06 volume. Returns a
+    pyart Radar with sweeps (0 based), or every tilt when sweeps is None.
+    """
+    if not SWEEP_ARCHIVE_DIR:
+        return read_volume(url, sweeps)
+
+    from sweep_archive import archive_volume, find_archived, open_archived
+    site, scan_time = volume_key(url)
+    path = find_archived(SWEEP_ARCHIVE_DIR, site, scan_time)
+    if path is not None:
+        print(f"Reading decoded sweeps from {path}")
+        with metrics.stage('archive_read'):
+            return open_archived(path, sweeps)
+
+    radar = read_volume(url)
+    with metrics.stage('archive_write'):
+        path = archive_volume(radar, SWEEP_ARCHIVE_DIR, site, scan_time)
+    print(f"Saved decoded sweeps as {path}")
+    return radar
+
+
+def map_sweeps():
+    """The sweeps the map needs: plain reflectivity only ever draws the lowest tilt."""
+    return [0] if RADAR_PRODUCT == 'reflectivity' and not PANEL_LAYOUT else None
+
+
+def read_volume(url, sweeps=None, **read_options):
+    """
+    Decode sweeps (0 based, None for all) of url, memory-mapped from
+    LOCAL_ARCHIVE_DIR when it is there and downloaded otherwise. read_options
+    (e.g. include_fields) go to pyart's reader.
+    """
+    if sweeps is not None:
+        read_options['scans'] = sweeps
+    if LOCAL_ARCHIVE_DIR:
+        from local_archive import local_path, read_local
+        path = local_path(LOCAL_ARCHIVE_DIR, url)
+        if path is not None:
+            print(f"Reading {path} from the local archive")
+            with metrics.stage('local_read'):
+                radar = read_local(path, sidecar_dir=LOCAL_SIDECAR_DIR, station=RADAR_ID, **read_options)
+            metrics.count('gates_decoded', radar.nrays * radar.ngates * len(radar.fields))
+            print(f"Successfully read radar data: {len(radar.fields)} fields available")
+            return radar
+        print(f"{os.path.basename(url)} is not in {LOCAL_ARCHIVE_DIR}, downloading it")
+    return decode_volume(fetch_volume(url), **read_options)
+
+
+def fetch_volume(url):
+    """Raw bytes of a Level II file."""
+    import requests
+
+    print("Downloading NEXRAD V06 data from AWS...")
+    with metrics.stage('download'):
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+    metrics.count('bytes_downloaded', len(response.content))
     print(f"Downloaded {len(response.content)} bytes")
-except requests.exceptions.RequestException as e:
-    print(f"Error downloading data: {e}")
-    exit()
+    return response.content
+
+
+def decode_volume(raw_data, **read_options):
+    """
+    Decompress (if needed) and decode Level II bytes. Returns a pyart Radar.
+    read_options (e.g. scans=[0], include_fields=['reflectivity']) go to pyart's
+    reader to decode only part of the volume.
+    """
+    import pyart
+
+    print("Processing V06 data...")
+    with metrics.stage('decompress'):
+        try:
+            if raw_data.startswith(b'\x1f\x8b'):
+                # Older archive files are gzipped whole
+                decompressed_data = gzip.decompress(raw_data)
+                print("Successfully decompressed gzip data")
+            else:
+                decompressed_data = bz2.decompress(raw_data)
+                print("Successfully decompressed bz2 data")
+        except Exception:
+            # If bz2 fails, the file might already be uncompressed
+            decompressed_data = raw_data
+            print("Using uncompressed data")
+
+    # Pre-2008 (Message 1) volumes skip the temporary file and pyart's
+    # record-by-record walk (see legacy_level2.py)
+    from local_archive import build_index, has_plain_records
+    from legacy_level2 import is_message1, read_message1
+    volume_index = build_index(decompressed_data) if has_plain_records(decompressed_data) else None
+    if volume_index is not None and is_message1(volume_index):
+        print("Reading legacy Message 1 radar data...")
+        with metrics.stage('decode', decoder='message1'):
+            radar = read_message1(decompressed_data, volume_index, station=RADAR_ID,
+                                  delay_field_loading=False, **read_options)
+        metrics.count('gates_decoded', radar.nrays * radar.ngates * len(radar.fields))
+        print(f"Successfully read radar data: {len(radar.fields)} fields available")
+        return radar
 
-print("Processing V06 data...")
-try:
-    try:
-        decompressed_data = bz2.decompress(response.content)
-        print("Successfully decompressed bz2 data")
-    except:
-        # If bz2 fails, the file might already be uncompressed
-        decompressed_data = response.content
-        print("Using uncompressed data")
-    
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.nexrad')
     temp_file.write(decompressed_data)
     temp_file.close()
     print(f"Wrote {len(decompressed_data)} bytes to temporary file")
-    
-except Exception as e:
-    print(f"Error processing compressed data: {e}")
-    exit()
-
-try:
-    print("Reading V06 radar data...")
-    radar = pyart.io.read_nexrad_archive(
-        temp_file.name, 
-        station=RADAR_ID,
-        delay_field_loading=False
-    )
-    print(f"Successfully read radar data: {len(radar.fields)} fields available")
-    print(f"Available fields: {list(radar.fields.keys())}")
-except Exception as e:
-    os.unlink(temp_file.name)
-    print(f"Error reading NEXRAD V06 file: {e}")
-    import traceback
-    traceback.print_exc()
-    exit()
 
-radar_lat = radar.latitude["data"][0]
-radar_lon = radar.longitude["data"][0]
-print(f"Radar location: {radar_lat:.4f}°N, {radar_lon:.4f}°W")
+    try:
+        print("Reading V06 radar data...")
+        with metrics.stage('decode'):
+            radar = pyart.io.read_nexrad_archive(
+                temp_file.name,
+                station=RADAR_ID,
+                delay_field_loading=False,
+                **read_options
+            )
+        metrics.count('gates_decoded', radar.nrays * radar.ngates * len(radar.fields))
+        print(f"Successfully read radar data: {len(radar.fields)} fields available")
+        log.debug(f"Available fields: {list(radar.fields.keys())}")
+    finally:
+        os.unlink(temp_file.name)
+    return radar
+
 
-# Calculate map extent based on radar center
-lat_buffer = 1.7
-lon_buffer = 4.3
-min_lat = radar_lat - lat_buffer
-max_lat = radar_lat + lat_buffer
-min_lon = radar_lon - lon_buffer
-max_lon = radar_lon + lon_buffer
+def find_reflectivity_field(radar):
+    """V06 typically uses 'reflectivity' or 'REF'."""
+    for possible_field in ['reflectivity', 'REF', 'DBZ', 'reflectivity_horizontal']:
+        if possible_field in radar.fields:
+            return possible_field
 
-radar_time = datetime.strptime(f"{filename_date}{filename_time}", "%Y%m%d%H%M%S")
-print(f"Radar scan time: {radar_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    print(f"Warning: No reflectivity field found. Available: {list(radar.fields.keys())}")
+    return list(radar.fields.keys())[0]
 
-display = pyart.graph.RadarMapDisplay(radar)
 
-projection = ccrs.Mercator()
+def product_style(product):
+    """Colormap, limits, colorbar label and ticks for a RADAR_PRODUCT value or a radar field name."""
+    if product == 'reflectivity':
+        return REFLECTIVITY_STYLE
+    from volume_products import PRODUCTS
+    if product in PRODUCTS:
+        return PRODUCTS[product]
+    if product in MOMENT_STYLES:
+        return MOMENT_STYLES[product]
+    raise ValueError(f"No style for {product!r}, expected one of "
+                     f"{[*PRODUCTS, *MOMENT_STYLES]}")
 
-fig = plt.figure(figsize=(19.2, 10.8), dpi=100, facecolor='#1a1a1a')
 
-ax = plt.axes([0, 0, 1, 0.89], projection=projection)
+def plot_product(ax, radar, projection, embellish=True):
+    """Plot RADAR_PRODUCT. Returns the QuadMesh (or None on failure)."""
+    if RADAR_PRODUCT == 'reflectivity':
+        return plot_radar(ax, radar, projection, embellish)
+    return plot_volume_product(ax, radar, RADAR_PRODUCT)
 
-ax.set_extent([min_lon, max_lon, min_lat, max_lat], crs=ccrs.PlateCarree())
 
-ax.patch.set_facecolor('#1a1a1a')
+def plot_volume_product(ax, radar, product):
+    """Composite reflectivity, echo tops or VIL from every tilt. Returns the QuadMesh (or None on failure)."""
+    import cartopy.crs as ccrs
+    import numpy as np
+    import pyart  # Registers the pyart colormaps
+    from volume_products import polar_mesh, volume_product
 
-# --- Base Map Features ---
-ax.add_feature(cfeature.OCEAN.with_scale('10m'), facecolor="#203666", zorder=1, edgecolor='none')
-ax.add_feature(cfeature.LAND.with_scale('10m'), facecolor="#5c7265", zorder=1, edgecolor='none')
+    print(f"Computing {product} from all tilts...")
+    try:
+        field_name = find_reflectivity_field(radar)
+        style = product_style(product)
+        with metrics.stage(product):
+            values, ground_range = volume_product(radar, product, field_name)
+            lon, lat = polar_mesh(radar, ground_range)
+            return ax.pcolormesh(
+                lon,
+                lat,
+                np.ma.masked_invalid(values),
+                cmap=style['cmap'],
+                vmin=style['vmin'],
+                vmax=style['vmax'],
+                alpha=0.85,
+                transform=ccrs.PlateCarree(),
+            )
 
-ax.add_feature(cfeature.LAKES.with_scale('10m'), facecolor="#1a3d5c", zorder=2, edgecolor='none', alpha=0.8)
-ax.add_feature(cfeature.RIVERS.with_scale('10m'), edgecolor="#1a3d5c", linewidth=0.5, zorder=2, facecolor='none')
+    except Exception as e:
+        print(f"Error computing {product}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
 
-# Plot the radar data - V06 typically uses 'reflectivity' or 'REF'
-print("Plotting radar reflectivity...")
-try:
-    # Try different field names that might be present in V06 files
-    field_name = None
-    for possible_field in ['reflectivity', 'REF', 'DBZ', 'reflectivity_horizontal']:
-        if possible_field in radar.fields:
-            field_name = possible_field
-            break
-    
-    if field_name is None:
-        print(f"Warning: No reflectivity field found. Available: {list(radar.fields.keys())}")
-        field_name = list(radar.fields.keys())[0]
-    
-    print(f"Using field: {field_name}")
-    
-    display.plot_ppi_map(
-        field_name,
-        0,
-        vmin=-20,
-        vmax=70,
-        cmap="NWSRef",
-        projection=projection,
-        ax=ax,
-        colorbar_flag=False,
-        title_flag=False,
-        alpha=0.85,
+
+def plot_radar(ax, radar, projection, embellish=True):
+    """Plot sweep 0 reflectivity. Returns the QuadMesh (or None on failure)."""
+    import pyart
+
+    print("Plotting radar reflectivity...")
+    try:
+        field_name = find_reflectivity_field(radar)
+        print(f"Using field: {field_name}")
+
+        with metrics.stage('radar'):
+            display = pyart.graph.RadarMapDisplay(radar)
+            display.plot_ppi_map(
+                field_name,
+                0,
+                vmin=-20,
+                vmax=70,
+                cmap="NWSRef",
+                projection=projection,
+                ax=ax,
+                colorbar_flag=False,
+                title_flag=False,
+                alpha=0.85,
+                embellish=embellish,
+                add_grid_lines=embellish,
+            )
+
+        # Apply bilinear interpolation for smoother appearance
+        ax_children = ax.get_children()
+        for child in ax_children:
+            if hasattr(child, 'set_interpolation'):
+                child.set_interpolation('bilinear')
+
+        return display.plots[-1]
+
+    except Exception as e:
+        print(f"Error plotting radar data: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def add_basemap(ax):
+    """Ocean, land, lakes and rivers underneath the radar."""
+    import cartopy.feature as cfeature
+
+    metrics.count('features_added', 4)
+    ax.add_feature(cfeature.OCEAN.with_scale('10m'), facecolor="#203666", zorder=1, edgecolor='none')
+    ax.add_feature(cfeature.LAND.with_scale('10m'), facecolor="#5c7265", zorder=1, edgecolor='none')
+
+    ax.add_feature(cfeature.LAKES.with_scale('10m'), facecolor="#1a3d5c", zorder=2, edgecolor='none', alpha=0.8)
+    ax.add_feature(cfeature.RIVERS.with_scale('10m'), edgecolor="#1a3d5c", linewidth=0.5, zorder=2, facecolor='none')
+
+
+def add_boundaries(ax):
+    """States, countries, counties and major roads on top of the radar."""
+    import cartopy.feature as cfeature
+
+    states = cfeature.NaturalEarthFeature(
+        category="cultural",
+        name="admin_1_states_provinces_lines",
+        scale="50m",
+        facecolor="none",
     )
-    
-    # Apply bilinear interpolation for smoother appearance
-    ax_children = ax.get_children()
-    for child in ax_children:
-        if hasattr(child, 'set_interpolation'):
-            child.set_interpolation('bilinear')
-    
-except Exception as e:
-    print(f"Error plotting radar data: {e}")
-    import traceback
-    traceback.print_exc()
-
-# --- Geographic Boundaries ---
-states = cfeature.NaturalEarthFeature(
-    category="cultural",
-    name="admin_1_states_provinces_lines",
-    scale="50m",
-    facecolor="none",
-)
-ax.add_feature(states, edgecolor='white', linewidth=2, zorder=10, alpha=0.9)
-
-countries = cfeature.NaturalEarthFeature(
-    category="cultural",
-    name="admin_0_boundary_lines_land",
-    scale="50m",
-    facecolor="none",
-)
-ax.add_feature(countries, edgecolor='white', linewidth=2.5, zorder=10)
-
-# --- Add Counties ---
-try:
-    counties = cfeature.NaturalEarthFeature(
+    ax.add_feature(states, edgecolor='white', linewidth=2, zorder=10, alpha=0.9)
+
+    countries = cfeature.NaturalEarthFeature(
+        category="cultural",
+        name="admin_0_boundary_lines_land",
+        scale="50m",
+        facecolor="none",
+    )
+    ax.add_feature(countries, edgecolor='white', linewidth=2.5, zorder=10)
+    metrics.count('features_added', 2)
+
+    # --- Add Counties ---
+    try:
+        counties = cfeature.NaturalEarthFeature(
+            category="cultural",
+            name="admin_2_counties",
+            scale="10m",
+            facecolor="none",
+        )
+        ax.add_feature(counties, edgecolor='#888888', linewidth=2, zorder=9, alpha=1)
+        metrics.count('features_added')
+        print("Counties added successfully")
+    except Exception as e:
+        print(f"Warning: Could not add counties: {e}")
+
+    # --- Add Major Highways/Roads ---
+    roads = cfeature.NaturalEarthFeature(
         category="cultural",
-        name="admin_2_counties",
+        name="roads",
         scale="10m",
         facecolor="none",
     )
-    ax.add_feature(counties, edgecolor='#888888', linewidth=2, zorder=9, alpha=1)
-    print("Counties added successfully")
-except Exception as e:
-    print(f"Warning: Could not add counties: {e}")
-
-# --- Add Major Highways/Roads ---
-roads = cfeature.NaturalEarthFeature(
-    category="cultural",
-    name="roads",
-    scale="10m",
-    facecolor="none",
-)
-ax.add_feature(
-    roads, 
-    edgecolor='#ffff00',
-    linewidth=1.0, 
-    linestyle='-', 
-    zorder=11, 
-    alpha=0.8
-)
-
-# --- Storm-Based Warning Polygons ---
-print("Fetching storm-based warnings...")
+    ax.add_feature(
+        roads,
+        edgecolor='#ffff00',
+        linewidth=1.0,
+        linestyle='-',
+        zorder=11,
+        alpha=0.8
+    )
+    metrics.count('features_added')
 
-WARNING_TYPES = {
-    'TO': {'color': '#FF0000', 'name': 'Tornado Warning'},
-    'SV': {'color': '#FFA500', 'name': 'Severe Thunderstorm'},
-    'FF': {'color': '#00FF00', 'name': 'Flash Flood Warning'},
-    'MA': {'color': '#FF00FF', 'name': 'Marine Warning'},
-}
 
-SIGNIFICANCE_FILTER = ['W', 'Y', 'A']
+def plot_warnings(ax, radar_time, extent, impact_file=None):
+    """
+    Storm-based warning polygons active at radar_time. Returns (patches drawn,
+    whether the warnings could be fetched). With impact_file, the cities in
+    extent under each warning are saved there too.
+    """
+    import requests
+
+    print("Fetching storm-based warnings...")
+
+    try:
+        with metrics.stage('warnings_download'):
+            warnings_data = fetch_warnings(radar_time)
+    except requests.exceptions.RequestException as e:
+        print(f"Warning: Could not fetch storm warnings: {e}")
+        metrics.count('warning_fetch_errors')
+        return [], False
+
+    with metrics.stage('warnings'):
+        patches = draw_warnings(ax, warnings_data, extent)
+
+    if impact_file:
+        from warning_impact import impact_table, load_places, save_table, summarize
+
+        with metrics.stage('impact'):
+            rows = impact_table(warnings_data, load_places(extent, MIN_POPULATION))
+            save_table(impact_file, rows)
+        for warning, (cities, population) in summarize(rows).items():
+            print(f"{warning}: {cities} cities, {population:,} people")
+        print(f"Impact table saved as {impact_file}")
+    return patches, True
+
+
+def fetch_warnings(radar_time, url=SBW_GEOJSON_URL):
+    """IEM storm-based warning GeoJSON active at radar_time."""
+    import requests
+
+    start_time = radar_time - WARNING_WINDOW
+    end_time = radar_time + WARNING_WINDOW
 
-try:
-    start_time = radar_time - timedelta(hours=0)
-    end_time = radar_time + timedelta(hours=0)
-    
     sts = start_time.strftime('%Y-%m-%dT%H:%M:%SZ')
     ets = end_time.strftime('%Y-%m-%dT%H:%M:%SZ')
-    
-    warnings_url = f"https://mesonet.agron.iastate.edu/geojson/sbw.geojson?sts={sts}&ets={ets}"
+
+    warnings_url = f"{url}?sts={sts}&ets={ets}"
     print(f"Requesting warnings from {sts} to {ets}")
-    
+
     warnings_response = requests.get(warnings_url, timeout=10)
     warnings_response.raise_for_status()
-    warnings_data = warnings_response.json()
-    
-    print(f"Total warnings received: {len(warnings_data.get('features', []))}")
-    
-    warnings_plotted = 0
-    
-    for feature in warnings_data.get('features', []):
-        props = feature.get('properties', {})
-        geom = feature.get('geometry', {})
-        
-        phenomena = props.get('phenomena', '')
-        significance = props.get('significance', '')
-        
-        if phenomena not in WARNING_TYPES and significance not in SIGNIFICANCE_FILTER:
-            continue
-        
-        if phenomena in WARNING_TYPES:
-            warning_info = WARNING_TYPES[phenomena].copy()
-        else:
-            warning_info = {'color': '#FFFF00', 'name': 'Weather Warning'}
-        
-        # Check for special tornado warning types
-        if phenomena == 'TO':
-            is_emergency = props.get('is_emergency', False)
-            is_pds = props.get('is_pds', False)
-            
-            if is_emergency:
-                warning_info['color'] = '#8B008B'
-                warning_info['name'] = 'TORNADO EMERGENCY'
-            elif is_pds:
-                warning_info['color'] = '#8B0000'
-                warning_info['name'] = 'PDS TORNADO WARNING'
-        
-        # Extract polygon coordinates
-        if geom.get('type') == 'MultiPolygon':
-            polygons = geom.get('coordinates', [])
-        elif geom.get('type') == 'Polygon':
-            polygons = [geom.get('coordinates', [])]
-        else:
-            continue
-        
-        if not polygons:
-            continue
-        
-        for polygon in polygons:
-            if not polygon:
+    return warnings_response.json()
+
+
+def warning_style(props):
+    """
+    {'color', 'name'} for a storm-based warning's properties, or None if it
+    isn't one we show. Tornado warnings are split into PDS and Emergency.
+    """
+    phenomena = props.get('phenomena', '')
+    significance = props.get('significance', '')
+
+    if phenomena not in WARNING_TYPES and significance not in SIGNIFICANCE_FILTER:
+        return None
+
+    if phenomena in WARNING_TYPES:
+        warning_info = WARNING_TYPES[phenomena].copy()
+    else:
+        warning_info = {'color': '#FFFF00', 'name': 'Weather Warning'}
+
+    # Check for special tornado warning types
+    if phenomena == 'TO':
+        is_emergency = props.get('is_emergency', False)
+        is_pds = props.get('is_pds', False)
+
+        if is_emergency:
+            warning_info['color'] = '#8B008B'
+            warning_info['name'] = 'TORNADO EMERGENCY'
+        elif is_pds:
+            warning_info['color'] = '#8B0000'
+            warning_info['name'] = 'PDS TORNADO WARNING'
+
+    return warning_info
+
+
+def draw_warnings(ax, warnings_data, extent):
+    """Add the warning polygons inside extent to ax. Returns the patches drawn."""
+    import cartopy.crs as ccrs
+    from matplotlib.patches import Polygon as MplPolygon
+
+    min_lon, max_lon, min_lat, max_lat = extent
+    patches = []
+
+    try:
+        print(f"Total warnings received: {len(warnings_data.get('features', []))}")
+
+        for feature in warnings_data.get('features', []):
+            props = feature.get('properties', {})
+            geom = feature.get('geometry', {})
+
+            warning_info = warning_style(props)
+            if warning_info is None:
                 continue
-            
-            exterior = polygon[0] if polygon else []
-            if not exterior or len(exterior) < 3:
+
+            # Extract polygon coordinates
+            if geom.get('type') == 'MultiPolygon':
+                polygons = geom.get('coordinates', [])
+            elif geom.get('type') == 'Polygon':
+                polygons = [geom.get('coordinates', [])]
+            else:
                 continue
-            
-            lons = [coord[0] for coord in exterior]
-            lats = [coord[1] for coord in exterior]
-            
-            if (max(lons) < min_lon or min(lons) > max_lon or
-                max(lats) < min_lat or min(lats) > max_lat):
+
+            if not polygons:
                 continue
-            
-            poly_patch = MplPolygon(
-                exterior,
-                closed=True,
-                transform=ccrs.PlateCarree(),
-                facecolor='none',
-                edgecolor=warning_info['color'],
-                alpha=1.0,
-                linewidth=5,
-                zorder=12,
-                linestyle='-'
-            )
-            ax.add_patch(poly_patch)
-            warnings_plotted += 1
-    
-    print(f"Total warnings plotted: {warnings_plotted}")
-    
-except requests.exceptions.RequestException as e:
-    print(f"Warning: Could not fetch storm warnings: {e}")
-except Exception as e:
-    print(f"Warning: Error processing storm warnings: {e}")
-
-# --- Dynamic City Labeling ---
-try:
-    cities_shp = shpreader.natural_earth(
-        resolution='10m',
-        category='cultural',
-        name='populated_places'
+
+            for polygon in polygons:
+                if not polygon:
+                    continue
+
+                exterior = polygon[0] if polygon else []
+                if not exterior or len(exterior) < 3:
+                    continue
+
+                lons = [coord[0] for coord in exterior]
+                lats = [coord[1] for coord in exterior]
+
+                if (max(lons) < min_lon or min(lons) > max_lon or
+                    max(lats) < min_lat or min(lats) > max_lat):
+                    continue
+
+                poly_patch = MplPolygon(
+                    exterior,
+                    closed=True,
+                    transform=ccrs.PlateCarree(),
+                    facecolor='none',
+                    edgecolor=warning_info['color'],
+                    alpha=1.0,
+                    linewidth=5,
+                    zorder=12,
+                    linestyle='-'
+                )
+                ax.add_patch(poly_patch)
+                patches.append(poly_patch)
+                log.debug(f"WARNING: {warning_info['name']} ({len(exterior)} vertices)")
+
+        metrics.count('warning_polygons_drawn', len(patches))
+        print(f"Total warnings plotted: {len(patches)}")
+
+    except Exception as e:
+        print(f"Warning: Error processing storm warnings: {e}")
+
+    return patches
+
+
+def plot_cities(ax, extent):
+    """Dynamic city labels from Natural Earth populated places."""
+    import cartopy.crs as ccrs
+    import cartopy.io.shapereader as shpreader
+    from matplotlib import patheffects
+
+    min_lon, max_lon, min_lat, max_lat = extent
+    try:
+        cities_shp = shpreader.natural_earth(
+            resolution='10m',
+            category='cultural',
+            name='populated_places'
+        )
+
+        reader = shpreader.Reader(cities_shp)
+        cities_plotted_count = 0
+
+        for city_record in reader.records():
+            try:
+                if hasattr(city_record.geometry, 'x') and hasattr(city_record.geometry, 'y'):
+                    lon = city_record.geometry.x
+                    lat = city_record.geometry.y
+                else:
+                    lon, lat = city_record.geometry.coords[0]
+            except (AttributeError, IndexError, TypeError):
+                continue
+
+            city_name = city_record.attributes.get('NAME')
+            pop_max = city_record.attributes.get('POP_MAX')
+
+            try:
+                pop_max = float(pop_max) if pop_max is not None else 0
+            except (ValueError, TypeError):
+                pop_max = 0
+
+            if city_name is None or not city_name.strip():
+                continue
+
+            if (min_lon < lon < max_lon and
+                min_lat < lat < max_lat and
+                pop_max >= MIN_POPULATION):
+
+                log.debug(f"PLOTTING: {city_name} (Pop: {int(pop_max)}) at ({lon:.2f}, {lat:.2f})")
+                cities_plotted_count += 1
+
+                txt = ax.text(
+                    lon,
+                    lat,
+                    city_name,
+                    transform=ccrs.PlateCarree(),
+                    fontsize=12,
+                    fontfamily="Roboto",
+                    fontweight='bold',
+                    color="white",
+                    ha="center",
+                    va="bottom",
+                    zorder=15,
+                )
+                txt.set_path_effects([
+                    patheffects.withStroke(linewidth=3, foreground="black", alpha=0.8),
+                    patheffects.Normal()
+                ])
+
+        metrics.count('labels_placed', cities_plotted_count)
+        print(f"Total cities plotted: {cities_plotted_count}")
+
+    except Exception as e:
+        print(f"Warning: Failed to load city data: {e}")
+
+
+def add_banner(fig, radar_time):
+    """Professional banner at the top. Returns the scan time text artist."""
+    import matplotlib.patches as mpatches
+
+    banner_ax = fig.add_axes([0, 0.89, 1, 0.11])
+    banner_ax.set_xlim(0, 1)
+    banner_ax.set_ylim(0, 1)
+    banner_ax.axis("off")
+
+    banner_bg = mpatches.Rectangle(
+        (0, 0), 1, 1,
+        transform=banner_ax.transAxes,
+        color='#0a0a0a',
+        zorder=0
+    )
+    banner_ax.add_patch(banner_bg)
+
+    banner_border = mpatches.Rectangle(
+        (0, 0), 1, 0.02,
+        transform=banner_ax.transAxes,
+        color='#00ff00',
+        alpha=0.3,
+        zorder=1
+    )
+    banner_ax.add_patch(banner_border)
+
+    info_text = f"NEXRAD SITE: {RADAR_ID} ({RADAR_LOCATION})"
+
+    banner_ax.text(
+        0.02,
+        0.65,
+        info_text,
+        transform=banner_ax.transAxes,
+        fontsize=16,
+        fontfamily="Rubik",
+        color="white",
+        va="center",
+        weight="bold",
+        zorder=2
+    )
+
+    return banner_ax.text(
+        0.02,
+        0.30,
+        banner_time_text(radar_time),
+        transform=banner_ax.transAxes,
+        fontsize=14,
+        fontfamily="Rubik",
+        color="#aaaaaa",
+        va="center",
+        zorder=2
+    )
+
+
+def banner_time_text(radar_time):
+    return f"{radar_time.strftime('%B %d, %Y  %H:%M:%S')} UTC"
+
+
+def add_colorbar(fig):
+    """Colorbar legend for RADAR_PRODUCT."""
+    import matplotlib.pyplot as plt
+    import pyart  # Registers the NWSRef colormap
+
+    style = product_style(RADAR_PRODUCT)
+    cbar_ax = fig.add_axes([0.40, 0.02, 0.58, 0.04])
+    norm = plt.Normalize(vmin=style['vmin'], vmax=style['vmax'])
+    cmap = plt.get_cmap(style['cmap'])
+
+    cb = plt.colorbar(
+        plt.cm.ScalarMappable(norm=norm, cmap=cmap),
+        cax=cbar_ax,
+        orientation="horizontal",
+    )
+
+    cb.set_label(
+        style['label'],
+        fontsize=12,
+        fontfamily="Rubik",
+        color="white",
+        weight='bold',
+        labelpad=8
+    )
+    cb.ax.tick_params(
+        labelsize=10,
+        colors="white",
+        length=6,
+        width=1.5,
+        pad=5
+    )
+    cb.set_ticks(style['ticks'])
+
+    for spine in cb.ax.spines.values():
+        spine.set_edgecolor('white')
+        spine.set_linewidth(1.5)
+
+
+def radar_extent(radar):
+    """Map extent [min_lon, max_lon, min_lat, max_lat] centred on the radar."""
+    radar_lat = radar.latitude["data"][0]
+    radar_lon = radar.longitude["data"][0]
+    print(f"Radar location: {radar_lat:.4f}°N, {radar_lon:.4f}°W")
+
+    # Calculate map extent based on radar center
+    min_lat = radar_lat - LAT_BUFFER
+    max_lat = radar_lat + LAT_BUFFER
+    min_lon = radar_lon - LON_BUFFER
+    max_lon = radar_lon + LON_BUFFER
+    return [min_lon, max_lon, min_lat, max_lat]
+
+
+def create_figure(extent, projection):
+    """1920x1080 figure with the map axes under the banner. Returns (fig, ax)."""
+    import cartopy.crs as ccrs
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(19.2, 10.8), dpi=100, facecolor='#1a1a1a', edgecolor='none')
+
+    ax = plt.axes([0, 0, 1, 0.89], projection=projection)
+
+    ax.set_extent(extent, crs=ccrs.PlateCarree())
+
+    ax.patch.set_facecolor('#1a1a1a')
+    return fig, ax
+
+
+def image_writer():
+    """The background encoder for the current output settings, kept between renders."""
+    key = (OUTPUT_FORMAT, PNG_COMPRESS_LEVEL, IMAGE_QUALITY, ENCODE_THREADS)
+    if key not in _writer_cache:
+        for writer in _writer_cache.values():
+            writer.close()
+        _writer_cache.clear()
+        _writer_cache[key] = ImageWriter(OUTPUT_FORMAT, PNG_COMPRESS_LEVEL, IMAGE_QUALITY, ENCODE_THREADS,
+                                         metrics=metrics)
+    return _writer_cache[key]
+
+
+_writer_cache = {}
+
+
+def volume_identity(url):
+    """
+    What identifies the bytes behind url without downloading them: the local
+    file's size and time, or the object's ETag. None if it can't be checked.
+    """
+    import requests
+
+    if LOCAL_ARCHIVE_DIR:
+        from local_archive import local_path
+        path = local_path(LOCAL_ARCHIVE_DIR, url)
+        if path is not None:
+            status = os.stat(path)
+            return {'path': os.path.abspath(path), 'size': status.st_size, 'mtime': status.st_mtime}
+    try:
+        response = requests.head(url, timeout=10)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Couldn't check {url} for the render cache: {e}")
+        return None
+    etag = response.headers.get('ETag') or response.headers.get('Last-Modified')
+    return {'url': url, 'etag': etag} if etag else None
+
+
+def render_cache_key():
+    """Key of the image the current settings would render, or None if it can't be cached."""
+    if LOOP_VOLUME_URLS or IMPACT_TABLE_FILE:
+        return None
+    source = volume_identity(aws_nexrad_url)
+    if source is None:
+        return None
+    here = os.path.dirname(os.path.abspath(__file__))
+    return cache_key(
+        source=source,
+        site=(RADAR_ID, RADAR_LOCATION),
+        scan_time=(filename_date, filename_time),
+        extent=(LAT_BUFFER, LON_BUFFER),
+        product=RADAR_PRODUCT,
+        # The product function itself is covered by the code version
+        style={name: value for name, value in product_style(RADAR_PRODUCT).items() if name != 'function'},
+        panels=(PANEL_LAYOUT, PANELS) if PANEL_LAYOUT else None,
+        min_population=MIN_POPULATION,
+        warnings=(SBW_GEOJSON_URL, WARNING_WINDOW),
+        image=(OUTPUT_FORMAT, PNG_COMPRESS_LEVEL, IMAGE_QUALITY),
+        # The copyright line carries the current year
+        year=datetime.now().year,
+        code=code_version(here, os.path.join(here, '..', 'UTILITIES')),
     )
-    
-    reader = shpreader.Reader(cities_shp)
-    cities_plotted_count = 0
 
-    for city_record in reader.records():
+
+def render_cache():
+    """The RenderCache for RENDER_CACHE_DIR, or None when it is off."""
+    if not RENDER_CACHE_DIR:
+        return None
+    return RenderCache(RENDER_CACHE_DIR, RENDER_CACHE_MB * 1024 * 1024, metrics=metrics)
+
+
+def render_loop(fig, ax, projection, extent, radar_mesh, warning_patches, time_artist):
+    """
+    Render LOOP_VOLUME_URLS into the already-built figure.
+
+    The radar mesh, warning polygons and banner time text are swapped for each
+    volume; everything else stays as drawn for the main image.
+    """
+    from blit_render import BlitRenderer
+
+    blitter = None
+    if LOOP_RENDER_MODE == 'blit':
+        blitter = BlitRenderer(fig, [radar_mesh, *warning_patches, time_artist])
+        if BLIT_BENCHMARK:
+            full_fps, blit_fps = blitter.benchmark()
+            print(f"Full redraw: {full_fps:.1f} frames/s, blit: {blit_fps:.1f} frames/s")
+
+    render_seconds = 0.0
+    frames_rendered = 0
+    for url in LOOP_VOLUME_URLS:
+        print(f"\nLoop frame: {url}")
         try:
-            if hasattr(city_record.geometry, 'x') and hasattr(city_record.geometry, 'y'):
-                lon = city_record.geometry.x
-                lat = city_record.geometry.y
-            else:
-                lon, lat = city_record.geometry.coords[0]
-        except (AttributeError, IndexError, TypeError):
+            _, frame_radar_time = volume_key(url)
+            radar = load_volume(url, map_sweeps())
+        except Exception as e:
+            print(f"Error loading loop volume: {e}")
             continue
 
-        city_name = city_record.attributes.get('NAME')
-        pop_max = city_record.attributes.get('POP_MAX')
-        
+        for artist in [radar_mesh, *warning_patches]:
+            if artist is not None:
+                artist.remove()
+        radar_mesh = plot_product(ax, radar, projection, embellish=False)
+        warning_patches, _ = plot_warnings(ax, frame_radar_time, extent)
+        time_artist.set_text(banner_time_text(frame_radar_time))
+
+        output_filename = f"{RADAR_ID}_{frame_radar_time:%Y%m%d_%H%M%S}.{OUTPUT_FORMAT}"
+        start = time.perf_counter()
+        with metrics.stage('loop_frame', mode=LOOP_RENDER_MODE):
+            if blitter is not None:
+                blitter.set_dynamic([radar_mesh, *warning_patches, time_artist], keep_background=True)
+                image_writer().submit(blitter.frame_rgba(), output_filename)
+            else:
+                image_writer().submit(figure_rgba(fig), output_filename)
+        render_seconds += time.perf_counter() - start
+        frames_rendered += 1
+        metrics.count('frames_rendered')
+        print(f"Loop frame saved as {output_filename}")
+
+    if frames_rendered:
+        print(f"\nRendered {frames_rendered} loop frames in {render_seconds:.2f}s "
+              f"({frames_rendered / render_seconds:.2f} frames/s, {LOOP_RENDER_MODE})")
+
+
+def render():
+    """
+    Download, decode and draw the configured volume (and loop). Shared with
+    level2_worker.py. Returns False (after printing why) if the volume
+    couldn't be loaded.
+    """
+    import cartopy.crs as ccrs
+    import requests
+
+    configure_logging(log, LOG_LEVEL)
+    if TRACK_MEMORY:
+        metrics.track_memory()
+
+    if PANEL_LAYOUT:
+        output_filename = f"{RADAR_ID}_{filename_date}_{filename_time}_panels.{OUTPUT_FORMAT}"
+    else:
+        output_filename = f"{RADAR_ID}_{filename_date}_{filename_time}.{OUTPUT_FORMAT}"
+
+    cache = render_cache()
+    key = None
+    if cache is not None:
+        with metrics.stage('render_cache'):
+            key = render_cache_key()
+            hit = key is not None and cache.fetch(key, output_filename)
+        if hit:
+            print(f"\nVisualization saved as {output_filename} (from the render cache)")
+            metrics.print_summary()
+            metrics.export(TRACE_FILE, METRICS_FILE)
+            return True
+
+    try:
+        radar = load_volume(aws_nexrad_url, map_sweeps())
+    except requests.exceptions.RequestException as e:
+        print(f"Error downloading data: {e}")
+        return False
+    except Exception as e:
+        print(f"Error reading NEXRAD V06 file: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    extent = radar_extent(radar)
+
+    radar_time = datetime.strptime(f"{filename_date}{filename_time}", "%Y%m%d%H%M%S")
+    print(f"Radar scan time: {radar_time.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+
+    if PANEL_LAYOUT:
+        from multi_panel import render_panels
+
+        render_panels(radar, radar_time, PANELS, PANEL_LAYOUT, output_filename)
+        image_writer().wait()
+        if key is not None:
+            cache.store(key, output_filename)
+        print(f"\nVisualization saved as {output_filename}")
+        metrics.print_summary()
+        metrics.export(TRACE_FILE, METRICS_FILE)
+        return True
+
+    projection = ccrs.Mercator()
+
+    fig, ax = create_figure(extent, projection)
+
+    # --- Base Map Features ---
+    with metrics.stage('basemap'):
+        add_basemap(ax)
+
+    radar_mesh = plot_product(ax, radar, projection)
+
+    # --- Geographic Boundaries ---
+    with metrics.stage('boundaries'):
+        add_boundaries(ax)
+
+    # --- Storm-Based Warning Polygons ---
+    warning_patches, warnings_fetched = plot_warnings(ax, radar_time, extent, IMPACT_TABLE_FILE)
+    # An image missing its warnings isn't kept, so the next run tries again
+    if not warnings_fetched:
+        key = None
+
+    # --- Dynamic City Labeling ---
+    with metrics.stage('cities'):
+        plot_cities(ax, extent)
+
+    # Remove axis spines and ticks
+    ax.spines['geo'].set_visible(False)
+    ax.set_xticks([])
+    ax.set_yticks([])
+
+    time_artist = add_banner(fig, radar_time)
+
+    # --- Colorbar Legend ---
+    add_colorbar(fig)
+
+    current_year = datetime.now().year
+    ax.text(
+        0.98,
+        0.02,
+        f"©{current_year} JesseLikesWeather",
+        transform=ax.transAxes,
+        fontsize=13,
+        fontfamily="Rubik",
+        color="white",
+        va="bottom",
+        ha="left",
+        zorder=20,
+        weight='bold'
+    )
+
+    # Cartopy fetches and projects the map features here, on first draw.
+    with metrics.stage('draw'):
+        image_writer().submit(figure_rgba(fig), output_filename)
+    metrics.count('frames_rendered')
+    print(f"\nVisualization saved as {output_filename}")
+
+    if LOOP_VOLUME_URLS:
+        render_loop(fig, ax, projection, extent, radar_mesh, warning_patches, time_artist)
+
+    # Everything is on disk before the run (or the worker's job) is reported done
+    image_writer().wait()
+    if key is not None:
+        cache.store(key, output_filename)
+
+    metrics.print_summary()
+    metrics.export(TRACE_FILE, METRICS_FILE)
+    return True
+
+
+def main():
+    if WARM_WORKER_SOCKET:
+        from level2_worker import job_settings, submit
         try:
-            pop_max = float(pop_max) if pop_max is not None else 0
-        except (ValueError, TypeError):
-            pop_max = 0
-        
-        if city_name is None or not city_name.strip():
-            continue
-            
-        if (min_lon < lon < max_lon and 
-            min_lat < lat < max_lat and
-            pop_max >= MIN_POPULATION):
-
-            print(f"PLOTTING: {city_name} (Pop: {int(pop_max)}) at ({lon:.2f}, {lat:.2f})")
-            cities_plotted_count += 1
-            
-            txt = ax.text(
-                lon,
-                lat,
-                city_name,
-                transform=ccrs.PlateCarree(),
-                fontsize=12,
-                fontfamily="Roboto",
-                fontweight='bold',
-                color="white",
-                ha="center",
-                va="bottom",
-                zorder=15,
-            )
-            txt.set_path_effects([
-                patheffects.withStroke(linewidth=3, foreground="black", alpha=0.8),
-                patheffects.Normal()
-            ])
-    
-    print(f"\nTotal cities plotted: {cities_plotted_count}")
-
-except Exception as e:
-    print(f"Warning: Failed to load city data: {e}")
-
-# Remove axis spines and ticks
-ax.spines['geo'].set_visible(False)
-ax.set_xticks([])
-ax.set_yticks([])
-
-# --- Professional Banner at Top ---
-banner_ax = fig.add_axes([0, 0.89, 1, 0.11])
-banner_ax.set_xlim(0, 1)
-banner_ax.set_ylim(0, 1)
-banner_ax.axis("off")
-
-banner_bg = mpatches.Rectangle(
-    (0, 0), 1, 1, 
-    transform=banner_ax.transAxes, 
-    color='#0a0a0a', 
-    zorder=0
-)
-banner_ax.add_patch(banner_bg)
-
-banner_border = mpatches.Rectangle(
-    (0, 0), 1, 0.02,
-    transform=banner_ax.transAxes,
-    color='#00ff00',
-    alpha=0.3,
-    zorder=1
-)
-banner_ax.add_patch(banner_border)
-
-info_text = f"NEXRAD SITE: {RADAR_ID} ({RADAR_LOCATION})"
-time_text = f"{radar_time.strftime('%B %d, %Y  %H:%M:%S')} UTC"
-
-banner_ax.text(
-    0.02,
-    0.65,
-    info_text,
-    transform=banner_ax.transAxes,
-    fontsize=16,
-    fontfamily="Rubik",
-    color="white",
-    va="center",
-    weight="bold",
-    zorder=2
-)
-
-banner_ax.text(
-    0.02,
-    0.30,
-    time_text,
-    transform=banner_ax.transAxes,
-    fontsize=14,
-    fontfamily="Rubik",
-    color="#aaaaaa",
-    va="center",
-    zorder=2
-)
-
-# --- Colorbar Legend ---
-cbar_ax = fig.add_axes([0.40, 0.02, 0.58, 0.04])
-norm = plt.Normalize(vmin=-20, vmax=70)
-cmap = plt.cm.get_cmap("NWSRef")
-
-cb = plt.colorbar(
-    plt.cm.ScalarMappable(norm=norm, cmap=cmap),
-    cax=cbar_ax,
-    orientation="horizontal",
-)
-
-cb.set_label(
-    "REFLECTIVITY (dBZ)", 
-    fontsize=12, 
-    fontfamily="Rubik", 
-    color="white",
-    weight='bold',
-    labelpad=8
-)
-cb.ax.tick_params(
-    labelsize=10, 
-    colors="white",
-    length=6,
-    width=1.5,
-    pad=5
-)
-cb.set_ticks([-20, -10, 0, 10, 20, 30, 40, 50, 60, 70])
-
-for spine in cb.ax.spines.values():
-    spine.set_edgecolor('white')
-    spine.set_linewidth(1.5)
-
-current_year = datetime.now().year
-ax.text(
-    0.98,
-    0.02,
-    f"©{current_year} JesseLikesWeather",
-    transform=ax.transAxes,
-    fontsize=13,
-    fontfamily="Rubik",
-    color="white",
-    va="bottom",
-    ha="left",
-    zorder=20,
-    weight='bold'
-)
-
-os.unlink(temp_file.name)
-
-output_filename = f"{RADAR_ID}_{filename_date}_{filename_time}.png"
-plt.savefig(output_filename, dpi=100, facecolor='#1a1a1a', edgecolor='none')
-print(f"\nVisualization saved as {output_filename}")
-plt.show()
+            ok = submit(job_settings(globals()), WARM_WORKER_SOCKET)
+        except OSError as e:
+            print(f"Warm worker not reachable at {WARM_WORKER_SOCKET} ({e}), rendering here instead")
+        else:
+            if not ok:
+                sys.exit(1)
+            return
+
+    if not render():
+        sys.exit(1)
+
+    import matplotlib.pyplot as plt
+    plt.show()
+
+
+if __name__ == '__main__':
+    main()
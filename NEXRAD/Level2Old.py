@@ -26,31 +26,67 @@ filename_time = "233259"
 RADAR_ID = "KTLX"
 RADAR_LOCATION = "OKLAHOMA CITY, OK"
 MIN_POPULATION = 1000
+LOCAL_ARCHIVE_DIR = None # e.g. '/data/nexrad-level2', a local copy of the archive (YYYY/MM/DD/SITE/)
 # --- End Configuration ---
 
-print("Downloading NEXRAD data from AWS...")
-try:
-    response = requests.get(aws_nexrad_url)
-    response.raise_for_status()
-except requests.exceptions.RequestException as e:
-    print(f"Error downloading data: {e}")
-    exit()
-
-print("Decompressing data...")
-compressed_data = BytesIO(response.content)
-decompressed_data = gzip.decompress(compressed_data.read())
+# A local copy of the archive is memory-mapped instead (see local_archive.py)
+local_file = None
+temp_file = None
+if LOCAL_ARCHIVE_DIR:
+    from local_archive import local_path, read_local
+    local_file = local_path(LOCAL_ARCHIVE_DIR, aws_nexrad_url)
+
+if local_file is not None:
+    print(f"Reading {local_file} from the local archive...")
+    try:
+        radar = read_local(local_file, station=RADAR_ID)
+    except Exception as e:
+        print(f"Error reading NEXRAD file: {e}")
+        exit()
+else:
+    print("Downloading NEXRAD data from AWS...")
+    try:
+        response = requests.get(aws_nexrad_url)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Error downloading data: {e}")
+        exit()
+
+    print("Decompressing data...")
+    compressed_data = BytesIO(response.content)
+    decompressed_data = gzip.decompress(compressed_data.read())
+
+    # Pre-2008 (Message 1) volumes have their own vectorized decoder (see legacy_level2.py)
+    from local_archive import build_index, has_plain_records
+    from legacy_level2 import is_message1, read_message1
+    volume_index = None
+    # V06 volumes keep their bz2 records here; those go straight to pyart
+    if has_plain_records(decompressed_data):
+        try:
+            volume_index = build_index(decompressed_data)
+        except ValueError as e:
+            print(f"Error reading NEXRAD file: {e}")
+            exit()
 
-temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.nexrad')
-temp_file.write(decompressed_data)
-temp_file.close()
+    if volume_index is not None and is_message1(volume_index):
+        try:
+            print("Reading legacy Message 1 radar data...")
+            radar = read_message1(decompressed_data, volume_index, station=RADAR_ID)
+        except Exception as e:
+            print(f"Error reading NEXRAD file: {e}")
+            exit()
+    else:
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.nexrad')
+        temp_file.write(decompressed_data)
+        temp_file.close()
 
-try:
-    print("Reading radar data...")
-    radar = pyart.io.read_nexrad_archive(temp_file.name, station=RADAR_ID)
-except Exception as e:
-    os.unlink(temp_file.name)
-    print(f"Error reading NEXRAD file: {e}")
-    exit()
+        try:
+            print("Reading radar data...")
+            radar = pyart.io.read_nexrad_archive(temp_file.name, station=RADAR_ID)
+        except Exception as e:
+            os.unlink(temp_file.name)
+            print(f"Error reading NEXRAD file: {e}")
+            exit()
 
 radar_lat = radar.latitude["data"][0]
 radar_lon = radar.longitude["data"][0]
@@ -469,7 +505,8 @@ ax.text(
 )
 
 # Clean up temporary file
-os.unlink(temp_file.name)
+if temp_file is not None:
+    os.unlink(temp_file.name)
 
 # Save with high quality
 output_filename = f"{RADAR_ID}_{filename_date}_{filename_time}.png"
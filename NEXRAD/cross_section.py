@@ -0,0 +1,203 @@
+"""
+©2025 JesseLikesWeather.
+
+Vertical cross-sections (pseudo-RHI) through a Level II volume.
+
+    section = cross_section(radar, (35.35, -98.30), (35.65, -97.80))
+
+Every tilt is sampled along the line between two lat/lon points and stacked
+by beam height, like slicing a storm with a knife. The beam-height /
+ground-range table comes from volume_products.py (cached per VCP), and the
+azimuth/range lookup for all points and tilts is one array gather, so moving
+the line around only costs a few milliseconds. Run this file directly to save
+a panel, or set INTERACTIVE to drag new lines across the map.
+"""
+
+from datetime import datetime
+import time
+
+import numpy as np
+
+from volume_products import AZIMUTH_BINS, azimuth_index, beam_geometry, volume_sweeps
+
+# --- Configuration ---
+aws_nexrad_url = "https://unidata-nexrad-level2.s3.amazonaws.com/2013/05/31/KTLX/KTLX20130531_233259_V06.gz"
+filename_date = "20130531"
+filename_time = "233259"
+RADAR_ID = "KTLX"
+RADAR_LOCATION = "OKLAHOMA CITY, OK"
+
+START = (35.35, -98.30) # (lat, lon) of the left edge of the cross-section
+END = (35.65, -97.80) # (lat, lon) of the right edge
+FIELD = 'reflectivity'
+
+INTERACTIVE = False # Open a map of the lowest tilt; drag across it to cut a new section.
+# --- End Configuration ---
+
+SECTION_POINTS = 500 # Samples along the line.
+HEIGHT_TOP = 16000 # Metres shown above sea level.
+HEIGHT_STEP = 100 # Metres per output row.
+BEAM_WIDTH = 0.95 # Degrees, WSR-88D half-power beam width.
+
+
+def cross_section(radar, start, end, field='reflectivity', points=SECTION_POINTS,
+                  top=HEIGHT_TOP, step=HEIGHT_STEP):
+    """
+    Sample every tilt along the line from start to end ((lat, lon) pairs).
+
+    Returns (distance_km, height_km, image): image is (height, point) with NaN
+    wherever no beam covers that height, ready for imshow/pcolormesh.
+    """
+    import pyart
+
+    sweeps = volume_sweeps(radar, field)
+    gate_index, valid, beam_height, ground = beam_geometry(radar, sweeps)
+    rays = azimuth_index(radar, sweeps, AZIMUTH_BINS)
+
+    # The line in the radar's azimuthal equidistant plane, so ground range and
+    # azimuth from the radar are exact at every point.
+    lat0 = radar.latitude['data'][0]
+    lon0 = radar.longitude['data'][0]
+    x, y = pyart.core.geographic_to_cartesian_aeqd(
+        np.array([start[1], end[1]]), np.array([start[0], end[0]]), lon0, lat0)
+    fraction = np.linspace(0, 1, points)
+    xs = x[0] + (x[1] - x[0]) * fraction
+    ys = y[0] + (y[1] - y[0]) * fraction
+
+    point_range = np.hypot(xs, ys)
+    azimuth = np.degrees(np.arctan2(xs, ys)) % 360
+    azimuth_bin = (azimuth * AZIMUTH_BINS / 360).astype(np.intp) % AZIMUTH_BINS
+    range_bin = np.rint((point_range - ground[0]) / (ground[1] - ground[0])).astype(np.intp)
+    in_range = (range_bin >= 0) & (range_bin < ground.size)
+    range_bin = np.clip(range_bin, 0, ground.size - 1)
+
+    # (tilt, point) lookups for all tilts at once
+    point_rays = rays[:, azimuth_bin]
+    point_gates = gate_index[:, range_bin]
+    data = radar.fields[field]['data']
+    values = np.asarray(np.ma.getdata(data)[point_rays, point_gates], dtype=np.float32)
+    missing = ~(valid[:, range_bin] & in_range)
+    if np.ma.getmask(data) is not np.ma.nomask:
+        missing |= np.ma.getmask(data)[point_rays, point_gates]
+    values[missing] = np.nan
+    heights = beam_height[:, range_bin]
+
+    # Stack by height: each output row takes the nearest beam, if the beam
+    # (or at least the row spacing) actually reaches that high.
+    rows = np.arange(0, top, step) + step / 2
+    offset = np.abs(rows[:, np.newaxis, np.newaxis] - heights[np.newaxis])
+    nearest = np.argmin(offset, axis=1)
+    columns = np.arange(points)
+    image = values[nearest, columns]
+    beam_radius = np.maximum(point_range * np.radians(BEAM_WIDTH / 2), step / 2)
+    image[offset[np.arange(rows.size)[:, np.newaxis], nearest, columns] > beam_radius] = np.nan
+
+    distance = np.hypot(xs - xs[0], ys - ys[0]) / 1000
+    return distance, rows / 1000, image
+
+
+class CrossSectionPanel:
+    """
+    A cross-section axes that redraws in place.
+
+    The image, labels and styling are built on the first section; later ones
+    only swap the image data and extent.
+    """
+
+    def __init__(self, ax, style):
+        self.ax = ax
+        self.style = style
+        self.image = None
+
+    def show(self, section):
+        distance, height, image = section
+        extent = [distance[0], distance[-1], 0, height[-1] + (height[1] - height[0]) / 2]
+        if self.image is None:
+            self.image = self.ax.imshow(np.ma.masked_invalid(image), origin='lower', extent=extent, aspect='auto',
+                                        cmap=self.style['cmap'], vmin=self.style['vmin'], vmax=self.style['vmax'],
+                                        interpolation='nearest')
+            self.ax.set_facecolor('#1a1a1a')
+            self.ax.set_xlabel("DISTANCE ALONG SECTION (km)", fontsize=12, fontfamily="Rubik", color="white", weight='bold')
+            self.ax.set_ylabel("HEIGHT (km MSL)", fontsize=12, fontfamily="Rubik", color="white", weight='bold')
+            self.ax.tick_params(colors="white", labelsize=10)
+            for spine in self.ax.spines.values():
+                spine.set_edgecolor('white')
+        else:
+            self.image.set_data(np.ma.masked_invalid(image))
+            self.image.set_extent(extent)
+        return self.image
+
+
+def section_title(start, end):
+    return f"CROSS-SECTION ({start[0]:.2f}, {start[1]:.2f}) → ({end[0]:.2f}, {end[1]:.2f})"
+
+
+def main():
+    import cartopy.crs as ccrs
+    import matplotlib.pyplot as plt
+    import Level2New
+
+    Level2New.RADAR_ID = RADAR_ID
+    Level2New.RADAR_LOCATION = RADAR_LOCATION
+    radar = Level2New.load_volume(aws_nexrad_url)
+    if FIELD not in radar.fields:
+        print(f"Error: {FIELD} isn't in this volume. Available fields: {', '.join(sorted(radar.fields))}")
+        return
+    radar_time = datetime.strptime(f"{filename_date}{filename_time}", "%Y%m%d%H%M%S")
+    style = Level2New.product_style(FIELD)
+
+    start = time.perf_counter()
+    section = cross_section(radar, START, END, FIELD)
+    print(f"Cross-section sampled in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if INTERACTIVE:
+        fig = plt.figure(figsize=(19.2, 10.8), dpi=100, facecolor='#1a1a1a')
+        map_ax = fig.add_axes([0.02, 0.05, 0.45, 0.85], projection=ccrs.Mercator())
+        map_ax.set_extent(Level2New.radar_extent(radar), crs=ccrs.PlateCarree())
+        Level2New.plot_radar(map_ax, radar, ccrs.Mercator(), embellish=False)
+        line, = map_ax.plot([START[1], END[1]], [START[0], END[0]], color='white', linewidth=2,
+                            transform=ccrs.PlateCarree(), zorder=20)
+        panel_ax = fig.add_axes([0.53, 0.1, 0.44, 0.75])
+    else:
+        fig = plt.figure(figsize=(19.2, 10.8), dpi=100, facecolor='#1a1a1a')
+        panel_ax = fig.add_axes([0.06, 0.1, 0.9, 0.72])
+
+    Level2New.add_banner(fig, radar_time)
+    panel = CrossSectionPanel(panel_ax, style)
+    panel.show(section)
+    title = panel_ax.set_title(section_title(START, END), fontsize=14, fontfamily="Rubik", color="white", weight='bold')
+
+    if not INTERACTIVE:
+        output_filename = f"{RADAR_ID}_{filename_date}_{filename_time}_xsec.png"
+        plt.savefig(output_filename, dpi=100, facecolor='#1a1a1a', edgecolor='none')
+        print(f"Cross-section saved as {output_filename}")
+        return
+
+    drag = {}
+
+    def on_press(event):
+        if event.inaxes is map_ax:
+            drag['start'] = event.xdata, event.ydata
+
+    def on_release(event):
+        if event.inaxes is not map_ax or 'start' not in drag:
+            return
+        points = ccrs.PlateCarree().transform_points(
+            map_ax.projection, np.array([drag['start'][0], event.xdata]), np.array([drag['start'][1], event.ydata]))
+        new_start = (points[0, 1], points[0, 0])
+        new_end = (points[1, 1], points[1, 0])
+
+        t = time.perf_counter()
+        panel.show(cross_section(radar, new_start, new_end, FIELD))
+        print(f"Cross-section sampled in {(time.perf_counter() - t) * 1000:.1f} ms")
+        line.set_data([new_start[1], new_end[1]], [new_start[0], new_end[0]])
+        title.set_text(section_title(new_start, new_end))
+        fig.canvas.draw_idle()
+
+    fig.canvas.mpl_connect('button_press_event', on_press)
+    fig.canvas.mpl_connect('button_release_event', on_release)
+    plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+©2025 JesseLikesWeather.
+
+Fast decoder for pre-2008 Level II volumes (Message 1 radials), the older
+archive files Level2Old.py reads.
+
+Message 1 radials are fixed 2432-byte records, so the whole volume is viewed
+as one NumPy structured array (RECORD_DTYPE) over the decompressed bytes:
+every header field is a column, and each moment's gates are sliced out of a
+(radials x 2432) byte array for all radials that share a layout at once,
+instead of being unpacked radial by radial. The result is a
+NEXRADLevel2File subclass turned into a Radar by local_archive.radar_from_file
+(pyart's read_nexrad_archive body), so the Radar object (field names,
+metadata, range and sweep layout) is exactly what pyart would have built:
+
+    python legacy_level2.py KTLX20050512_230220.raw
+
+decodes a volume both ways and checks they match.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from local_archive import (COMPRESSION_RECORD_SIZE, MESSAGE_HEADER_SIZE, RECORD_SIZE, VOLUME_HEADER_SIZE,
+                           build_index, radar_from_file)
+
+FIRST_RECORD = VOLUME_HEADER_SIZE + COMPRESSION_RECORD_SIZE
+
+# Message header + Message 1 header (RDA/RPG ICD, Table III), big-endian,
+# then the gates
+RECORD_DTYPE = np.dtype([
+    ('size', '>u2'), ('channels', 'u1'), ('type', 'u1'), ('seq_id', '>u2'), ('date', '>u2'), ('ms', '>u4'),
+    ('segments', '>u2'), ('seg_num', '>u2'),
+    ('collect_ms', '>u4'), ('collect_date', '>u2'), ('unambig_range', '>i2'), ('azimuth_angle', '>u2'),
+    ('azimuth_number', '>u2'), ('radial_status', '>u2'), ('elevation_angle', '>u2'),
+    ('elevation_number', '>u2'), ('sur_range_first', '>u2'), ('doppler_range_first', '>u2'),
+    ('sur_range_step', '>u2'), ('doppler_range_step', '>u2'), ('sur_nbins', '>u2'), ('doppler_nbins', '>u2'),
+    ('cut_sector_num', '>u2'), ('calib_const', '>f4'), ('sur_pointer', '>u2'), ('vel_pointer', '>u2'),
+    ('width_pointer', '>u2'), ('doppler_resolution', '>u2'), ('vcp', '>u2'), ('spare_1', 'V14'),
+    ('nyquist_vel', '>i2'), ('atmos_attenuation', '>i2'), ('threshold', '>i2'), ('spot_blank_status', '>u2'),
+    ('spare_2', 'V32'), ('gates', 'V2316'),
+])
+assert RECORD_DTYPE.itemsize == RECORD_SIZE
+
+ANGLE_SCALE = 180 / (4096 * 8.0)
+
+# moment: (pointer, gate count, first gate, gate spacing) columns
+MOMENT_COLUMNS = {
+    'REF': ('sur_pointer', 'sur_nbins', 'sur_range_first', 'sur_range_step'),
+    'VEL': ('vel_pointer', 'doppler_nbins', 'doppler_range_first', 'doppler_range_step'),
+    'SW': ('width_pointer', 'doppler_nbins', 'doppler_range_first', 'doppler_range_step'),
+}
+
+
+def is_message1(index):
+    """True for a volume (by its local_archive.build_index) whose radials are Message 1."""
+    types = index['type']
+    return bool((types == 1).any()) and not (types == 31).any()
+
+
+def message1_file_class():
+    """NEXRADLevel2File whose getters work on whole columns of RECORD_DTYPE."""
+    from pyart.io.nexrad_level2 import (NEXRADLevel2File, VOLUME_HEADER, _get_record_from_buf,
+                                        _unpack_structure)
+
+    class Message1File(NEXRADLevel2File):
+        """
+        Drop-in for pyart's reader on Message 1 volumes. buf is the
+        decompressed volume (bytes or mmap), index its message index.
+        """
+
+        def __init__(self, buf, index=None, scans=None):
+            if index is None:
+                index = build_index(buf)
+            if not is_message1(index):
+                raise ValueError("Not a Message 1 (pre-2008) volume")
+            self._fh = buf
+            self._msg_type = '1'
+            self.volume_header = _unpack_structure(buf[:VOLUME_HEADER_SIZE], VOLUME_HEADER)
+
+            # Every message in these volumes is one fixed-size record. The last
+            # one is often cut short; its missing gates read as 1 (below
+            # threshold), as they do in pyart's reader.
+            short = -(len(buf) - FIRST_RECORD) % RECORD_SIZE
+            if short:
+                buf = bytes(buf) + b'\x01' * short
+            count = (len(buf) - FIRST_RECORD) // RECORD_SIZE
+            records = np.frombuffer(buf, RECORD_DTYPE, count=count, offset=FIRST_RECORD)
+            rows = (index['offset'][index['type'] == 1] - FIRST_RECORD) // RECORD_SIZE
+            nscans = int(records['elevation_number'][rows].max())
+            if scans is not None:
+                rows = rows[np.isin(records['elevation_number'][rows], [scan + 1 for scan in scans])]
+            # Header columns for the radials only; the gates stay in buf
+            self.rays = {name: records[name][rows] for name in RECORD_DTYPE.names
+                         if name not in ('spare_1', 'spare_2', 'gates')}
+            # Every record's bytes as one row (a view, nothing is copied)
+            self.records = np.frombuffer(buf, np.uint8, count=count * RECORD_SIZE, offset=FIRST_RECORD)
+            self.records = self.records.reshape(count, RECORD_SIZE)
+            self.ray_rows = rows
+
+            # Scans that weren't asked for stay (empty) so pyart's scan numbers line up
+            elevation_numbers = self.rays['elevation_number']
+            self.scan_msgs = [np.nonzero(elevation_numbers == i + 1)[0] for i in range(nscans)]
+            self.nscans = nscans
+            self.radial_records = []
+
+            self._records = [_get_record_from_buf(buf, int(offset))[1]
+                             for offset in index['offset'][index['type'] == 5]]
+            self.vcp = self._records[0] if self._records else None
+
+        def _column(self, scans, name):
+            return self.rays[name][self._msg_nums(scans)]
+
+        def _moment_info(self, ray, moment):
+            """(ngates, gate_spacing, first_gate) of moment on a ray, None if it wasn't sent."""
+            pointer, nbins, first, step = MOMENT_COLUMNS[moment]
+            if not self.rays[pointer][ray]:
+                return None
+            first_gate = int(self.rays[first][ray])
+            if first_gate > 2 ** 15:
+                first_gate -= 2 ** 16
+            return int(self.rays[nbins][ray]), int(self.rays[step][ray]), first_gate
+
+        def scan_info(self, scans=None):
+            info = []
+            if scans is None:
+                scans = range(self.nscans)
+            for scan in scans:
+                nrays = self.get_nrays(scan)
+                if nrays < 2:
+                    self.nscans -= 1
+                    continue
+                ray = self.scan_msgs[scan][0]
+                moments = [m for m in MOMENT_COLUMNS if self._moment_info(ray, m) is not None]
+                details = [self._moment_info(ray, m) for m in moments]
+                info.append({
+                    'nrays': nrays,
+                    'ngates': [d[0] for d in details],
+                    'gate_spacing': [d[1] for d in details],
+                    'first_gate': [d[2] for d in details],
+                    'moments': moments,
+                })
+            return info
+
+        def get_range(self, scan_num, moment):
+            ngates, gate_spacing, first_gate = self._moment_info(self.scan_msgs[scan_num][0], moment)
+            return np.arange(ngates) * gate_spacing + first_gate
+
+        def get_times(self, scans=None):
+            from datetime import datetime, timedelta
+
+            if scans is None:
+                scans = range(self.nscans)
+            days = self._column(scans, 'collect_date').astype(np.int64)
+            secs = self._column(scans, 'collect_ms').astype(np.int64) / 1000.0
+            offset = timedelta(days=int(days[0]) - 1, seconds=int(secs[0]))
+            return datetime(1970, 1, 1) + offset, secs - int(secs[0]) + (days - days[0]) * 86400
+
+        def get_azimuth_angles(self, scans=None):
+            if scans is None:
+                scans = range(self.nscans)
+            return self._column(scans, 'azimuth_angle').astype(np.int64) * ANGLE_SCALE
+
+        def get_elevation_angles(self, scans=None):
+            if scans is None:
+                scans = range(self.nscans)
+            return self._column(scans, 'elevation_angle').astype(np.int64) * ANGLE_SCALE
+
+        def get_target_angles(self, scans=None):
+            if scans is None:
+                scans = range(self.nscans)
+            first_rays = [self.scan_msgs[i][0] for i in scans]
+            angles = self.rays['elevation_angle'][first_rays].astype(np.int64) * ANGLE_SCALE
+            return np.round(angles.astype('float32'), 1)
+
+        def get_nyquist_vel(self, scans=None):
+            if scans is None:
+                scans = range(self.nscans)
+            return self._column(scans, 'nyquist_vel').astype(np.int64) * 0.01
+
+        def get_unambigous_range(self, scans=None):
+            if scans is None:
+                scans = range(self.nscans)
+            return self._column(scans, 'unambig_range').astype(np.int64) * 100.0
+
+        def get_data(self, moment, max_ngates, scans=None, raw_data=False):
+            if scans is None:
+                scans = range(self.nscans)
+            rays = self._msg_nums(scans)
+            pointer, nbins, _, _ = MOMENT_COLUMNS[moment]
+            pointers = self.rays[pointer][rays]
+            ngates = np.minimum(self.rays[nbins][rays], max_ngates)
+
+            # Radials with the same gate layout (nearly always all of a scan)
+            # are copied as one block. Missing gates stay 1 (below threshold),
+            # like pyart's reader.
+            data = np.ones((rays.size, max_ngates), np.uint8)
+            layouts = np.stack([pointers, ngates], axis=1)
+            for start, count in np.unique(layouts[pointers != 0], axis=0):
+                same = np.nonzero((pointers == start) & (ngates == count))[0]
+                first = MESSAGE_HEADER_SIZE + int(start)
+                data[same, :count] = self.records[self.ray_rows[rays[same]], first:first + int(count)]
+            if raw_data:
+                return data
+
+            # Scale and offset from the first radial of the first scan that has the moment
+            for scan in scans:
+                ray = self.scan_msgs[scan][0]
+                if self.rays[pointer][ray]:
+                    scale = 1.0 if moment == 'VEL' and self.rays['doppler_resolution'][ray] == 4 else 2.0
+                    offset = np.float32(66.0 if moment == 'REF' else 129.0)
+                    return np.ma.array((data - offset) / np.float32(scale), mask=data <= 1)
+            return np.ma.masked_less_equal(data, 1)
+
+        def close(self):
+            # Let go of the view first; an mmap can't close while it is exported
+            self.records = None
+            if hasattr(self._fh, 'close'):
+                self._fh.close()
+
+    return Message1File
+
+
+def read_message1(buf, index=None, scans=None, **read_options):
+    """
+    A pyart Radar from a decompressed Message 1 volume (bytes or mmap).
+    read_options (station, include_fields...) are those of pyart.io.read_nexrad_archive.
+    Legacy files carry no location, so pass station= as with pyart.
+    """
+    nfile = message1_file_class()(buf, index, scans)
+    return radar_from_file(nfile, scans=scans, **read_options)
+
+
+def compare_with_pyart(path, station='KTLX'):
+    """Decode path with both readers and report any field or coordinate that differs."""
+    import os
+    import tempfile
+    import warnings
+
+    import pyart
+
+    from local_archive import uncompressed_path
+
+    warnings.simplefilter('ignore')
+    raw_path = uncompressed_path(path, tempfile.gettempdir())
+    with open(raw_path, 'rb') as f:
+        buf = f.read()
+
+    start = time.perf_counter()
+    fast = read_message1(buf, station=station)
+    fast_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = pyart.io.read_nexrad_archive(raw_path, station=station)
+    pyart_seconds = time.perf_counter() - start
+    print(f"{os.path.basename(path)}: {fast_seconds:.2f}s here, {pyart_seconds:.2f}s with pyart")
+
+    differences = []
+    for name in ('time', 'range', 'azimuth', 'elevation', 'fixed_angle', 'sweep_start_ray_index',
+                 'sweep_end_ray_index', 'latitude', 'longitude'):
+        if not np.array_equal(getattr(fast, name)['data'], getattr(reference, name)['data']):
+            differences.append(name)
+    if fast.time['units'] != reference.time['units']:
+        differences.append('time units')
+    for name in set(fast.fields) | set(reference.fields):
+        if name not in fast.fields or name not in reference.fields:
+            differences.append(name)
+            continue
+        a, b = fast.fields[name]['data'], reference.fields[name]['data']
+        if not (np.array_equal(np.ma.getmaskarray(a), np.ma.getmaskarray(b)) and np.ma.allequal(a, b)
+                and a.dtype == b.dtype):
+            differences.append(name)
+    print("Identical to pyart" if not differences else f"Differs from pyart in: {', '.join(differences)}")
+    return not differences
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python legacy_level2.py <Level II file> [STATION]")
+    else:
+        compare_with_pyart(sys.argv[1], *sys.argv[2:3])
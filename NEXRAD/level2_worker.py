@@ -0,0 +1,194 @@
+"""
+©2025 JesseLikesWeather.
+
+Warm render worker for Level2New.py (Linux/macOS, it needs os.fork).
+
+    python level2_worker.py                 # start once, leave it running
+    WARM_WORKER_SOCKET = '/tmp/level2new-worker.sock'   # in Level2New.py
+
+A cold Level2New.py run spends a few seconds importing pyart, cartopy and
+matplotlib and loading fonts before it touches any radar data. The worker pays
+that once: it imports and warms everything, then forks WORKERS children that
+wait on a local Unix socket. Each job runs in one of those children with the
+config block the client sent, its output streams back to the client's
+terminal, and the child exits when done so no figure state carries over. A
+fresh warm child is forked to take its place.
+
+Config edits in Level2New.py apply to the next job. Code edits need a worker
+restart.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+SOCKET_PATH = '/tmp/level2new-worker.sock'
+WORKERS = 2
+
+# Level2New.py config sent with every job
+JOB_SETTINGS = [
+    'aws_nexrad_url', 'filename_date', 'filename_time', 'RADAR_ID', 'RADAR_LOCATION', 'MIN_POPULATION',
+    'RADAR_PRODUCT', 'PANEL_LAYOUT', 'PANELS', 'LOCAL_ARCHIVE_DIR', 'LOCAL_SIDECAR_DIR', 'SWEEP_ARCHIVE_DIR', 'IMPACT_TABLE_FILE', 'OUTPUT_FORMAT',
+    'PNG_COMPRESS_LEVEL', 'IMAGE_QUALITY', 'ENCODE_THREADS', 'RENDER_CACHE_DIR', 'RENDER_CACHE_MB', 'LOOP_VOLUME_URLS', 'LOOP_RENDER_MODE',
+    'BLIT_BENCHMARK', 'LOG_LEVEL', 'TRACK_MEMORY', 'TRACE_FILE', 'METRICS_FILE',
+]
+
+# Marks the last line of a job's output, which carries the result.
+RESULT_MARKER = '\0'
+
+
+def job_settings(namespace):
+    """The Level2New config values from a module namespace (globals())."""
+    return {name: namespace[name] for name in JOB_SETTINGS}
+
+
+def submit(settings, path=SOCKET_PATH):
+    """
+    Hand a render job to a running worker and echo its output here.
+    Raises OSError if no worker is listening. Returns True if the render finished.
+    """
+    result = {'ok': False}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        print(f"Rendering in warm worker at {path}")
+        job = {'cwd': os.getcwd(), 'settings': settings}
+        client.sendall(json.dumps(job).encode('utf-8') + b'\n')
+
+        for line in client.makefile('r', encoding='utf-8', errors='replace'):
+            if line.startswith(RESULT_MARKER):
+                result = json.loads(line[len(RESULT_MARKER):])
+            else:
+                print(line, end='')
+
+    if result['ok']:
+        print(f"Worker finished in {result['seconds']:.2f}s")
+    else:
+        print("Worker job failed")
+    return result['ok']
+
+
+# ==============================================================================
+# Server side
+# ==============================================================================
+
+def warm_up():
+    """Import and initialise everything a render touches. Returns the Level2New module."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import cartopy.crs as ccrs
+    import cartopy.feature
+    import cartopy.io.shapereader
+    import pyart
+    import requests
+    from PIL import Image
+
+    import Level2New
+    import blit_render
+
+    # One throwaway map so the font cache, font lookups and the projection
+    # machinery are loaded before the first job arrives.
+    fig = plt.figure(figsize=(2, 2))
+    ax = plt.axes(projection=ccrs.Mercator())
+    ax.text(0.5, 0.5, 'warm', transform=ax.transAxes, fontfamily='Rubik', weight='bold')
+    fig.text(0.5, 0.1, 'warm', fontfamily='Roboto', weight='bold')
+    fig.canvas.draw()
+    plt.close(fig)
+    return Level2New
+
+
+def run_job(conn, Level2New):
+    """Run one job with stdout/stderr going back over conn. Returns an exit status."""
+    reader = conn.makefile('r', encoding='utf-8')
+    job = json.loads(reader.readline())
+    stream = conn.makefile('w', encoding='utf-8', errors='replace', buffering=1)
+    sys.stdout = sys.stderr = stream
+
+    start = time.perf_counter()
+    ok = False
+    try:
+        os.chdir(job['cwd'])
+        # Only config values, so a bad request can't replace anything else in the module
+        unknown = set(job['settings']) - set(JOB_SETTINGS)
+        if unknown:
+            raise ValueError(f"Not Level2New job settings: {sorted(unknown)}")
+        for name, value in job['settings'].items():
+            setattr(Level2New, name, value)
+        # render() prints its own message when the volume can't be loaded
+        ok = Level2New.render()
+    except BaseException:
+        traceback.print_exc()
+
+    stream.write(RESULT_MARKER + json.dumps({'ok': ok, 'seconds': time.perf_counter() - start}) + '\n')
+    stream.flush()
+    return 0 if ok else 1
+
+
+def child(server, Level2New):
+    """A warm forked child: take one job, then exit."""
+    status = 1
+    try:
+        conn, _ = server.accept()
+        with conn:
+            status = run_job(conn, Level2New)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os._exit(status)
+
+
+def serve(path=SOCKET_PATH, workers=WORKERS):
+    start = time.perf_counter()
+    print("Warming up (pyart, cartopy, matplotlib, fonts)...")
+    Level2New = warm_up()
+    print(f"Warm in {time.perf_counter() - start:.1f}s")
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    print(f"Listening on {path} with {workers} warm workers (Ctrl+C to stop)")
+    # Clean up the socket on `kill` too, not just Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    children = set()
+    try:
+        while True:
+            while len(children) < workers:
+                pid = os.fork()
+                if pid == 0:
+                    child(server, Level2New)
+                children.add(pid)
+
+            pid, status = os.wait()
+            children.discard(pid)
+            print(f"Worker {pid} finished a job (exit {os.waitstatus_to_exitcode(status)})")
+    except KeyboardInterrupt:
+        print("\nStopping workers...")
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-forked warm render worker for Level2New.py.")
+    parser.add_argument('--socket', default=SOCKET_PATH, help="Unix socket path to listen on.")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Warm children kept waiting for jobs.")
+    args = parser.parse_args()
+    serve(args.socket, args.workers)
+
+
+if __name__ == '__main__':
+    main()
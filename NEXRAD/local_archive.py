@@ -0,0 +1,388 @@
+"""
+©2025 JesseLikesWeather.
+
+Level II volumes read from a local copy of the Unidata archive instead of
+downloaded. Set LOCAL_ARCHIVE_DIR in Level2New.py / Level2Old.py to a folder
+laid out like the bucket (YYYY/MM/DD/SITE/file) or holding the files directly.
+
+Volumes are opened with mmap, so nothing is read into Python up front.
+Compressed files (bz2 records in V06, whole-file gzip/bz2 in older ones) are
+decompressed once into a .raw copy; the first open of each volume also saves
+a sidecar index (.idx.npy) holding the offset, type and elevation number of
+every message. After that, decoding one tilt hands pyart only the metadata
+messages and that tilt's radials, sliced straight out of the map, instead of
+having it walk and unpack every message in the volume. Those messages are
+copied out of the map as they are unpacked (pyart's reader works on bytes),
+so it is the walk and the untouched tilts that are saved, not the copy.
+
+Build the copies and indexes for a whole mirror ahead of time with
+
+    python local_archive.py /data/nexrad/2013/05/31/KTLX/*
+"""
+
+import bz2
+import gzip
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+VOLUME_HEADER_SIZE = 24
+COMPRESSION_RECORD_SIZE = 12
+CONTROL_WORD_SIZE = 4
+MESSAGE_HEADER_SIZE = 16
+CTM_SIZE = 12 # Channel terminal manager bytes in front of every message.
+RECORD_SIZE = 2432 # Every message but 29 and 31 takes one fixed-size record.
+
+# Byte offset of the elevation number in the radial messages (RDA/RPG ICD)
+MSG31_ELEVATION = MESSAGE_HEADER_SIZE + 22
+MSG1_ELEVATION = MESSAGE_HEADER_SIZE + 16
+
+MAX_MESSAGE_TYPE = 33
+MAX_ELEVATION_NUMBER = np.iinfo(np.uint8).max # What INDEX_DTYPE can hold; real VCPs have under 30.
+
+INDEX_DTYPE = np.dtype([('offset', '<i8'), ('type', 'u1'), ('elevation', 'u1')])
+
+
+def local_path(directory, url):
+    """Path of url's file in a local mirror, or None if it isn't there."""
+    from radar_common import volume_key
+
+    name = os.path.basename(url)
+    site, scan_time = volume_key(url)
+    names = [name, name[:-3] if name.endswith('.gz') else name + '.gz']
+    for folder in (os.path.join(directory, scan_time.strftime('%Y/%m/%d'), site), directory):
+        for candidate in names:
+            path = os.path.join(folder, candidate)
+            if os.path.exists(path):
+                return path
+    return None
+
+
+def sidecar_path(path, suffix, sidecar_dir=None):
+    """path + suffix, in sidecar_dir when the mirror itself is read-only."""
+    if sidecar_dir is None:
+        return path + suffix
+    os.makedirs(sidecar_dir, exist_ok=True)
+    return os.path.join(sidecar_dir, os.path.basename(path) + suffix)
+
+
+def is_uncompressed(path):
+    """True for a plain Archive II file pyart (and the index) can read as is."""
+    with open(path, 'rb') as f:
+        return has_plain_records(f.read(VOLUME_HEADER_SIZE + COMPRESSION_RECORD_SIZE))
+
+
+def has_plain_records(data):
+    """is_uncompressed for the bytes of a volume (only the first 36 are looked at)."""
+    head = data[:VOLUME_HEADER_SIZE + COMPRESSION_RECORD_SIZE]
+    compression = head[VOLUME_HEADER_SIZE + CONTROL_WORD_SIZE:VOLUME_HEADER_SIZE + CONTROL_WORD_SIZE + 2]
+    # Old files hold the record size (2432) there, newer ones zeros
+    return head.startswith((b'AR2', b'ARCHIVE2')) and compression in (b'\x00\x00', b'\t\x80')
+
+
+def decompress_records(data):
+    """The bz2 blocks after the volume header, each behind a 4-byte size, joined back together."""
+    blocks = []
+    pos = VOLUME_HEADER_SIZE
+    while pos + CONTROL_WORD_SIZE <= len(data):
+        size = abs(struct.unpack_from('>i', data, pos)[0])
+        if size == 0:
+            break
+        pos += CONTROL_WORD_SIZE
+        blocks.append(bz2.decompress(data[pos:pos + size]))
+        pos += size
+    return b''.join(blocks)
+
+
+def uncompressed_path(path, sidecar_dir=None):
+    """path itself if it is uncompressed, else a decompressed .raw copy (written the first time)."""
+    if is_uncompressed(path):
+        return path
+    raw_path = sidecar_path(path, '.raw', sidecar_dir)
+    if os.path.exists(raw_path) and os.path.getmtime(raw_path) >= os.path.getmtime(path):
+        return raw_path
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(b'\x1f\x8b'):
+        data = gzip.decompress(data)
+    elif data.startswith(b'BZh'):
+        data = bz2.decompress(data)
+    if data[VOLUME_HEADER_SIZE + CONTROL_WORD_SIZE:VOLUME_HEADER_SIZE + CONTROL_WORD_SIZE + 2] == b'BZ':
+        data = data[:VOLUME_HEADER_SIZE] + decompress_records(memoryview(data))
+
+    # Write then rename, so an interrupted run never leaves half a volume behind
+    with open(raw_path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(raw_path + '.tmp', raw_path)
+    return raw_path
+
+
+def build_index(buf):
+    """
+    One INDEX_DTYPE row per message in an uncompressed volume (bytes or mmap).
+    Raises ValueError if the messages don't add up, e.g. for records that are
+    still compressed (check has_plain_records first).
+    """
+    rows = []
+    pos = VOLUME_HEADER_SIZE + COMPRESSION_RECORD_SIZE
+    end = len(buf)
+    while pos + MESSAGE_HEADER_SIZE <= end:
+        size, _, msg_type = struct.unpack_from('>HBB', buf, pos)
+        if msg_type > MAX_MESSAGE_TYPE:
+            raise ValueError(f"Unknown message type {msg_type} at byte {pos}; is the volume still compressed?")
+        elevation = 0
+        # Message sizes are counted the same way pyart's reader counts them
+        if msg_type == 31:
+            elevation = buf[pos + MSG31_ELEVATION]
+            next_pos = pos + MESSAGE_HEADER_SIZE + size * 2 - 4
+        elif msg_type == 29:
+            if size == 65535:
+                segments, segment = struct.unpack_from('>HH', buf, pos + 12)
+                size = segments << 16 | segment
+            next_pos = pos + MESSAGE_HEADER_SIZE + size
+        else:
+            if msg_type == 1 and pos + MSG1_ELEVATION + 2 <= end:
+                elevation = struct.unpack_from('>H', buf, pos + MSG1_ELEVATION)[0]
+            next_pos = pos + RECORD_SIZE
+        if msg_type in (29, 31):
+            if next_pos < pos + MESSAGE_HEADER_SIZE:
+                raise ValueError(f"Message {msg_type} at byte {pos} is shorter than its header")
+            # Counted this way the last message ends one CTM_SIZE past the
+            # file; anything further means the sizes are garbage
+            if next_pos > end + CTM_SIZE:
+                raise ValueError(f"Message {msg_type} at byte {pos} runs {next_pos - end} bytes "
+                                 "past the end of the volume")
+        if elevation > MAX_ELEVATION_NUMBER:
+            raise ValueError(f"Elevation number {elevation} at byte {pos} is out of range")
+        # Padding records at the end of a volume carry nothing
+        if msg_type:
+            rows.append((pos, msg_type, elevation))
+        pos = next_pos
+    return np.array(rows, dtype=INDEX_DTYPE)
+
+
+def volume_index(path, buf, sidecar_dir=None):
+    """The message index of an uncompressed volume, from its sidecar or built and saved."""
+    index_path = sidecar_path(path, '.idx.npy', sidecar_dir)
+    if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(path):
+        return np.load(index_path)
+
+    index = build_index(buf)
+    with open(index_path + '.tmp', 'wb') as f:
+        np.save(f, index)
+    os.replace(index_path + '.tmp', index_path)
+    return index
+
+
+def sweep_offsets(index):
+    """{sweep number (0 based): message offsets} from a volume index."""
+    radial = np.isin(index['type'], (1, 31))
+    elevations = index['elevation'][radial]
+    offsets = index['offset'][radial]
+    return {int(e) - 1: offsets[elevations == e] for e in np.unique(elevations)}
+
+
+def mapped_file_class():
+    """NEXRADLevel2File built from a volume index instead of a full walk of the file."""
+    from pyart.io.nexrad_level2 import (NEXRADLevel2File, VOLUME_HEADER, _get_record_from_buf,
+                                        _unpack_structure)
+
+    class MappedLevel2File(NEXRADLevel2File):
+        """
+        Only the non-radial messages and the radials of `scans` are unpacked.
+        Sweeps that were not asked for keep their place (as empty sweeps) so
+        pyart's scan numbers, fixed angles and VCP cuts still line up.
+        """
+
+        def __init__(self, buf, index, scans=None):
+            self._fh = buf
+            self.volume_header = _unpack_structure(buf[:VOLUME_HEADER_SIZE], VOLUME_HEADER)
+
+            radial = np.isin(index['type'], (1, 31))
+            wanted = ~radial
+            if scans is None:
+                wanted |= radial
+            else:
+                wanted |= radial & np.isin(index['elevation'], [scan + 1 for scan in scans])
+            # Slicing the mmap copies just these messages out of the page cache
+            self._records = [_get_record_from_buf(buf, int(offset))[1] for offset in index['offset'][wanted]]
+
+            self._msg_type = '31' if (index['type'] == 31).any() else '1'
+            self.radial_records = [r for r in self._records if r['header']['type'] == int(self._msg_type)]
+            if not self.radial_records:
+                raise ValueError("No radial messages found, cannot read file")
+            elevation_numbers = np.array([r['msg_header']['elevation_number'] for r in self.radial_records])
+            self.scan_msgs = [np.nonzero(elevation_numbers == i + 1)[0]
+                              for i in range(int(index['elevation'][radial].max()))]
+            self.nscans = len(self.scan_msgs)
+
+            msg_5 = [r for r in self._records if r['header']['type'] == 5]
+            self.vcp = msg_5[0] if msg_5 else None
+
+    return MappedLevel2File
+
+
+def radar_from_file(nfile, field_names=None, additional_metadata=None, file_field_names=False,
+                    exclude_fields=None, include_fields=None, delay_field_loading=False, station=None,
+                    scans=None, linear_interp=True):
+    """
+    A pyart Radar from nfile, an already open NEXRADLevel2File (or subclass).
+    This is the body of pyart.io.read_nexrad_archive (arm_pyart 2.3), which
+    only builds its own reader from a path or file object; the options mean
+    the same as there. nfile is closed once the fields are read.
+    """
+    import warnings
+
+    from pyart.config import FileMetadata, get_fillvalue
+    from pyart.core import Radar
+    from pyart.io.common import make_time_unit_str
+    from pyart.io.nexrad_archive import (_NEXRADLevel2StagedField, _find_range_params,
+                                         _find_scans_to_interp, _interpolate_scan)
+    from pyart.io.nexrad_common import get_nexrad_location
+    from pyart.lazydict import LazyLoadDict
+
+    filemetadata = FileMetadata('nexrad_archive', field_names, additional_metadata, file_field_names,
+                                exclude_fields, include_fields)
+    scan_info = nfile.scan_info(scans)
+
+    time = filemetadata('time')
+    time_start, time['data'] = nfile.get_times(scans)
+    time['units'] = make_time_unit_str(time_start)
+
+    _range = filemetadata('range')
+    first_gate, gate_spacing, last_gate = _find_range_params(scan_info, filemetadata)
+    _range['data'] = np.arange(first_gate, last_gate, gate_spacing, 'float32')
+    _range['meters_to_center_of_first_gate'] = float(first_gate)
+    _range['meters_between_gates'] = float(gate_spacing)
+
+    metadata = filemetadata('metadata')
+    metadata['original_container'] = 'NEXRAD Level II'
+    vcp_pattern = nfile.get_vcp_pattern()
+    if vcp_pattern is not None:
+        metadata['vcp_pattern'] = vcp_pattern
+    if 'icao' in nfile.volume_header.keys():
+        metadata['instrument_name'] = nfile.volume_header['icao'].decode()
+
+    latitude = filemetadata('latitude')
+    longitude = filemetadata('longitude')
+    altitude = filemetadata('altitude')
+    if nfile._msg_type == '1' and station is not None:
+        lat, lon, alt = get_nexrad_location(station)
+    elif 'icao' in nfile.volume_header.keys() and nfile.volume_header['icao'].decode()[0] == 'T':
+        lat, lon, alt = get_nexrad_location(nfile.volume_header['icao'].decode())
+    else:
+        lat, lon, alt = nfile.location()
+    latitude['data'] = np.array([lat], dtype='float64')
+    longitude['data'] = np.array([lon], dtype='float64')
+    altitude['data'] = np.array([alt], dtype='float64')
+
+    sweep_number = filemetadata('sweep_number')
+    sweep_mode = filemetadata('sweep_mode')
+    sweep_start_ray_index = filemetadata('sweep_start_ray_index')
+    sweep_end_ray_index = filemetadata('sweep_end_ray_index')
+    nsweeps = int(nfile.nscans) if scans is None else len(scans)
+    sweep_number['data'] = np.arange(nsweeps, dtype='int32')
+    sweep_mode['data'] = np.array(nsweeps * ['azimuth_surveillance'], dtype='S')
+    rays_per_scan = [s['nrays'] for s in scan_info]
+    sweep_end_ray_index['data'] = np.cumsum(rays_per_scan, dtype='int32') - 1
+    sweep_start_ray_index['data'] = np.cumsum([0] + rays_per_scan[:-1], dtype='int32')
+
+    azimuth = filemetadata('azimuth')
+    elevation = filemetadata('elevation')
+    fixed_angle = filemetadata('fixed_angle')
+    azimuth['data'] = nfile.get_azimuth_angles(scans)
+    elevation['data'] = nfile.get_elevation_angles(scans).astype('float32')
+    angles = np.array(nfile.get_target_angles(scans), dtype='float64')
+    if (angles > 180).any():
+        warnings.warn("Fixed_angle(s) greater than 180 degrees present. Assuming angle to be negative "
+                      "so subtrating 360", UserWarning)
+        angles[angles > 180] -= 360
+    fixed_angle['data'] = angles.astype('float32')
+
+    max_ngates = len(_range['data'])
+    available_moments = {m for scan in scan_info for m in scan['moments']}
+    interpolate = _find_scans_to_interp(scan_info, first_gate, gate_spacing, filemetadata)
+    fields = {}
+    for moment in available_moments:
+        field_name = filemetadata.get_field_name(moment)
+        if field_name is None:
+            continue
+        dic = filemetadata(field_name)
+        dic['_FillValue'] = get_fillvalue()
+        if delay_field_loading and moment not in interpolate:
+            dic = LazyLoadDict(dic)
+            dic.set_lazy('data', _NEXRADLevel2StagedField(nfile, moment, max_ngates, scans))
+        else:
+            mdata = nfile.get_data(moment, max_ngates, scans=scans)
+            if moment in interpolate:
+                warnings.warn(f"Gate spacing is not constant, interpolating data in scans "
+                              f"{interpolate[moment]} for moment {moment}.", UserWarning)
+                multiplier = '4' if interpolate['multiplier'] == '4' else '2'
+                for scan in interpolate[moment]:
+                    moment_ngates = scan_info[scan]['ngates'][scan_info[scan]['moments'].index(moment)]
+                    _interpolate_scan(mdata, sweep_start_ray_index['data'][scan],
+                                      sweep_end_ray_index['data'][scan], moment_ngates, multiplier,
+                                      linear_interp)
+            dic['data'] = mdata
+        fields[field_name] = dic
+
+    nyquist_velocity = filemetadata('nyquist_velocity')
+    unambiguous_range = filemetadata('unambiguous_range')
+    nyquist_velocity['data'] = nfile.get_nyquist_vel(scans).astype('float32')
+    unambiguous_range['data'] = nfile.get_unambigous_range(scans).astype('float32')
+    instrument_parameters = {'unambiguous_range': unambiguous_range, 'nyquist_velocity': nyquist_velocity}
+
+    nfile.close()
+    return Radar(time, _range, fields, metadata, 'ppi', latitude, longitude, altitude, sweep_number,
+                 sweep_mode, fixed_angle, sweep_start_ray_index, sweep_end_ray_index, azimuth, elevation,
+                 instrument_parameters=instrument_parameters)
+
+
+def read_local(path, scans=None, sidecar_dir=None, **read_options):
+    """
+    A pyart Radar from a local Level II file. scans (0 based) limits both
+    what is decoded and what is read off disk; read_options (station,
+    include_fields...) are those of pyart.io.read_nexrad_archive.
+    """
+    raw_path = uncompressed_path(path, sidecar_dir)
+    with open(raw_path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        index = volume_index(raw_path, buf, sidecar_dir)
+        if scans is not None:
+            missing = set(scans) - set(sweep_offsets(index))
+            if missing:
+                raise ValueError(f"Sweeps {sorted(missing)} are not in {path}")
+        # Pre-2008 volumes go to the vectorized Message 1 reader
+        from legacy_level2 import is_message1, message1_file_class
+        if is_message1(index):
+            nfile = message1_file_class()(buf, index, scans)
+        else:
+            nfile = mapped_file_class()(buf, index, scans)
+        return radar_from_file(nfile, scans=scans, **read_options)
+    finally:
+        # Records are copied out of the map while unpacking, so the radar doesn't need it
+        buf.close()
+
+
+def main():
+    paths = sys.argv[1:]
+    if not paths:
+        print("Usage: python local_archive.py <Level II file> [...]")
+        return
+    for path in paths:
+        if path.endswith(('.raw', '.idx.npy', '.tmp')):
+            continue
+        raw_path = uncompressed_path(path)
+        with open(raw_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                index = volume_index(raw_path, buf)
+        print(f"{os.path.basename(path)}: {len(index)} messages, {len(sweep_offsets(index))} sweeps")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+©2025 JesseLikesWeather.
+
+Several moments and tilts of one volume side by side (2x2 or 1x4), from a
+single decode. Used by Level2New.py when PANEL_LAYOUT is set.
+
+Every panel shows the same map, so the map is only drawn once: the basemap
+(land, ocean) and the lines and labels that sit over the radar (states,
+counties, roads, cities) are rendered to two rasters the size of a panel.
+Each panel then samples its moment onto the shared polar grid, looks it up on
+the panel's Mercator pixel grid (one lookup table for every panel, see
+volume_products.py) and is blended between those two rasters in NumPy, all
+panels at once on a thread pool. The figure around them only holds images,
+titles and colorbars.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from radar_common import MOMENT_STYLES, color_table, colorize
+from volume_products import beam_geometry, grid_lookup, mercator_grid, sample_sweep
+
+LAYOUTS = {'2x2': (2, 2), '1x4': (1, 4)} # (rows, columns)
+
+FIGURE_SIZE = (1920, 1080) # Pixels, same as the single map.
+MAP_TOP = 0.89 # Below the banner.
+COLORBAR_HEIGHT = 0.045 # Fraction of the figure under each panel for its colorbar.
+LAT_SPAN = 3.4 # Degrees of latitude shown in each panel, like the single map.
+RADAR_ALPHA = 0.85
+
+
+def moment_sweep(radar, field, tilt):
+    """
+    Sweep number of field at the tilt-th lowest elevation. Split cuts scan
+    the lowest tilts twice (reflectivity, then Doppler), so the first sweep at
+    that angle that actually has field is used.
+    """
+    angles = np.round(radar.fixed_angle['data'], 1)
+    elevations = np.unique(angles)
+    if tilt >= elevations.size:
+        raise ValueError(f"Tilt {tilt} requested but the volume only has {elevations.size}")
+    candidates = np.nonzero(angles == elevations[tilt])[0]
+
+    data = radar.fields[field]['data']
+    for sweep in candidates:
+        if np.ma.count(data[radar.get_slice(sweep)]):
+            return int(sweep)
+    return int(candidates[0])
+
+
+def panel_extent(radar, size, lat_span=LAT_SPAN):
+    """[min_lon, max_lon, min_lat, max_lat] centred on the radar with the panel's aspect ratio."""
+    import cartopy.crs as ccrs
+
+    lat0 = float(radar.latitude['data'][0])
+    lon0 = float(radar.longitude['data'][0])
+    mercator = ccrs.Mercator()
+    corners = mercator.transform_points(ccrs.PlateCarree(), np.array([lon0, lon0]),
+                                        np.array([lat0 - lat_span / 2, lat0 + lat_span / 2]))
+    centre_x = mercator.transform_point(lon0, lat0, ccrs.PlateCarree())[0]
+    half_width = (corners[1, 1] - corners[0, 1]) / 2 * size[0] / size[1]
+    edges = ccrs.PlateCarree().transform_points(mercator, np.array([centre_x - half_width, centre_x + half_width]),
+                                                corners[:, 1])
+    return [edges[0, 0], edges[1, 0], edges[0, 1], edges[1, 1]]
+
+
+def map_layers(extent, size):
+    """
+    (underlay RGB, overlay RGBA) rasters of the panel map, cached per extent
+    and size. The underlay is the basemap under the radar, the overlay holds
+    the boundaries, roads and city labels drawn over it.
+    """
+    import cartopy.crs as ccrs
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    import Level2New
+
+    key = (tuple(extent), tuple(size))
+    if key in _layer_cache:
+        return _layer_cache[key]
+
+    layers = []
+    for draw, facecolor in ((Level2New.add_basemap, '#1a1a1a'), (Level2New.add_boundaries, 'none')):
+        fig = plt.figure(figsize=(size[0] / 100, size[1] / 100), dpi=100, facecolor=facecolor)
+        ax = fig.add_axes([0, 0, 1, 1], projection=ccrs.Mercator())
+        ax.set_extent(extent, crs=ccrs.PlateCarree())
+        ax.spines['geo'].set_visible(False)
+        ax.patch.set_facecolor(facecolor)
+        draw(ax)
+        if draw is Level2New.add_boundaries:
+            Level2New.plot_cities(ax, extent)
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        layers.append(np.array(canvas.buffer_rgba()))
+        plt.close(fig)
+
+    layers = (layers[0][..., :3], layers[1])
+    _layer_cache.clear()
+    _layer_cache[key] = layers
+    return layers
+
+
+_layer_cache = {}
+
+
+def render_panel(radar, field, sweep, geometry, lookup, underlay, overlay):
+    """
+    One panel as an RGB uint8 image: basemap, then the moment, then the
+    overlay. geometry (beam_geometry of the sweep) and lookup (grid_lookup)
+    are built by the caller, so panel threads only read them.
+    """
+    style = MOMENT_STYLES[field]
+    values, _ = sample_sweep(radar, field, sweep, geometry=geometry)
+    flat = np.append(values.ravel(), np.float32(np.nan))
+    radar_rgba = colorize(flat[lookup], style, color_table(style))
+
+    weight = radar_rgba[..., 3:] / 255.0 * RADAR_ALPHA
+    image = underlay * (1 - weight) + radar_rgba[..., :3] * weight
+    weight = overlay[..., 3:] / 255.0
+    image = image * (1 - weight) + overlay[..., :3] * weight
+    return image.astype(np.uint8), float(radar.fixed_angle['data'][sweep])
+
+
+def panel_axes(layout):
+    """Figure-fraction [left, bottom, width, height] of each panel's map and colorbar."""
+    rows, columns = LAYOUTS[layout]
+    cell_width = 1 / columns
+    cell_height = MAP_TOP / rows
+    boxes = []
+    for row in range(rows):
+        for column in range(columns):
+            left = column * cell_width
+            bottom = MAP_TOP - (row + 1) * cell_height
+            map_box = [left, bottom + COLORBAR_HEIGHT, cell_width, cell_height - COLORBAR_HEIGHT]
+            colorbar_box = [left + 0.1 * cell_width, bottom + COLORBAR_HEIGHT * 0.55, 0.8 * cell_width,
+                            COLORBAR_HEIGHT * 0.3]
+            boxes.append((map_box, colorbar_box))
+    return boxes
+
+
+def render_panels(radar, radar_time, panels, layout, output_filename):
+    """Draw panels ([(field, tilt), ...]) of radar in layout and save the figure."""
+    import matplotlib.pyplot as plt
+    import pyart  # Registers the pyart colormaps
+    from matplotlib import patheffects
+
+    import Level2New
+    from image_writer import figure_rgba
+
+    boxes = panel_axes(layout)
+    unsupported = [field for field, _ in panels if field not in MOMENT_STYLES]
+    if unsupported:
+        raise ValueError(f"No panel style for {unsupported}; panels can show {list(MOMENT_STYLES)}")
+    panels =[(field, tilt) for field, tilt in panels if field in radar.fields][:len(boxes)]
+    if not panels:
+        raise ValueError(f"None of the panel fields are in this volume: {list(radar.fields)}")
+
+    width, height = FIGURE_SIZE
+    map_box = boxes[0][0]
+    size = (round(map_box[2] * width), round(map_box[3] * height))
+    extent = panel_extent(radar, size)
+    mercator_extent, lon, lat = mercator_grid(extent, size)
+
+    with Level2New.metrics.stage('panel_map'):
+        underlay, overlay = map_layers(extent, size)
+    with Level2New.metrics.stage('panel_moments', panels=len(panels)):
+        # Geometry and the pixel lookup are built here, once, rather than cold in every thread
+        sweeps = [moment_sweep(radar, field, tilt) for field, tilt in panels]
+        geometries = {sweep: beam_geometry(radar, [sweep]) for sweep in sweeps}
+        lookup = grid_lookup(radar, geometries[sweeps[0]][3], lon, lat)
+        with ThreadPoolExecutor(max_workers=len(panels)) as pool:
+            images = list(pool.map(
+                lambda field, sweep: render_panel(radar, field, sweep, geometries[sweep], lookup, underlay, overlay),
+                [field for field, _ in panels], sweeps))
+
+    fig = plt.figure(figsize=(width / 100, height / 100), dpi=100, facecolor='#1a1a1a')
+    Level2New.add_banner(fig, radar_time)
+    for (field, tilt), (image, elevation), (map_box, colorbar_box) in zip(panels, images, boxes):
+        style = MOMENT_STYLES[field]
+        ax = fig.add_axes(map_box)
+        ax.imshow(image, interpolation='nearest', aspect='auto')
+        ax.set_axis_off()
+        title = ax.text(0.01, 0.97, f"{style['label']}  {elevation:.1f}°", transform=ax.transAxes,
+                        fontsize=13, fontfamily="Rubik", color="white", weight='bold', va='top')
+        title.set_path_effects([patheffects.withStroke(linewidth=3, foreground="black")])
+
+        cb = fig.colorbar(plt.cm.ScalarMappable(norm=plt.Normalize(style['vmin'], style['vmax']),
+                                                cmap=plt.get_cmap(style['cmap'])),
+                          cax=fig.add_axes(colorbar_box), orientation='horizontal')
+        cb.set_ticks(style['ticks'])
+        cb.ax.tick_params(labelsize=9, colors="white")
+        cb.outline.set_edgecolor('white')
+
+    with Level2New.metrics.stage('draw'):
+        Level2New.image_writer().submit(figure_rgba(fig), output_filename)
+    plt.close(fig)
+    Level2New.metrics.count('frames_rendered')
+    Level2New.metrics.count('panels_rendered', len(panels))
+    return output_filename
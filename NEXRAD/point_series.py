@@ -0,0 +1,198 @@
+"""
+©2025 JesseLikesWeather.
+
+Reflectivity over a list of places across many volumes, as a time x point table.
+
+    "What was the reflectivity over each city for the last 6 hours?"
+
+Rendering a full Level2New image per volume just to read a few gates would be
+slow. Instead, the gate over every point (lowest tilt, azimuth bin, range gate)
+is worked out once per site, each volume is decoded with only the lowest tilt
+and the one field needed, and volumes are fetched and decoded in parallel
+worker processes. Each worker hands back one short row of values.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+import os
+import sys
+
+import numpy as np
+
+from radar_common import list_volumes, volume_key
+from volume_products import AZIMUTH_BINS, azimuth_index, beam_geometry, volume_sweeps
+
+# --- Configuration ---
+RADAR_ID = "KTLX"
+END_TIME = datetime(2013, 5, 31, 23, 59) # UTC
+HOURS = 3 # Volumes from END_TIME - HOURS to END_TIME.
+VOLUME_URLS = [] # Or list the volumes yourself and skip the bucket listing.
+
+# 'natural_earth' uses populated places within range of the radar (at least
+# MIN_POPULATION people), 'goes' uses the GOES map cities (CITIES in goes_products.py).
+POINTS = 'natural_earth'
+MIN_POPULATION = 10000
+MAX_RANGE_KM = 230
+
+FIELD = 'reflectivity'
+PROCESSES = os.cpu_count() or 1
+SWEEP_ARCHIVE_DIR = None # Read volumes from (and save them to) a sweep_archive.py folder.
+OUTPUT_FILE = f'{RADAR_ID}_point_series.csv' # .csv, or .nc for NetCDF
+# --- End Configuration ---
+
+
+def natural_earth_points(lat0, lon0, min_population=MIN_POPULATION, max_range_km=MAX_RANGE_KM):
+    """{name: (lat, lon)} of Natural Earth populated places within range of the radar."""
+    import cartopy.io.shapereader as shpreader
+
+    cities_shp = shpreader.natural_earth(resolution='10m', category='cultural', name='populated_places')
+    # Rough box first, exact range is checked when the gates are looked up
+    lat_buffer = max_range_km / 111
+    lon_buffer = lat_buffer / max(np.cos(np.radians(lat0)), 0.1)
+    points = {}
+    for record in shpreader.Reader(cities_shp).records():
+        name = record.attributes.get('NAME')
+        population = record.attributes.get('POP_MAX') or 0
+        lon, lat = record.geometry.x, record.geometry.y
+        if (name and population >= min_population
+                and abs(lat - lat0) < lat_buffer and abs(lon - lon0) < lon_buffer):
+            points[name] = (lat, lon)
+    return points
+
+
+def goes_points():
+    """The cities labelled on the GOES maps (CITIES in goes_products.py)."""
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SATELLITE'))
+    from goes_products import CITIES
+    return dict(CITIES)
+
+
+def point_gates(radar, lats, lons):
+    """
+    (azimuth_bin, gate, in_range) for each point on the lowest tilt, cached
+    per site and gate layout since they don't change between volumes.
+    """
+    import pyart
+
+    sweeps = volume_sweeps(radar)[:1]
+    gate_index, valid, _, ground = beam_geometry(radar, sweeps)
+    lat0 = float(radar.latitude['data'][0])
+    lon0 = float(radar.longitude['data'][0])
+
+    key = (lat0, lon0, float(ground[0]), ground.size, tuple(lats), tuple(lons))
+    if key not in _point_cache:
+        x, y = pyart.core.geographic_to_cartesian_aeqd(np.asarray(lons), np.asarray(lats), lon0, lat0)
+        azimuth = np.degrees(np.arctan2(x, y)) % 360
+        azimuth_bin = (azimuth * AZIMUTH_BINS / 360).astype(np.intp) % AZIMUTH_BINS
+        range_bin = np.rint((np.hypot(x, y) - ground[0]) / (ground[1] - ground[0])).astype(np.intp)
+        in_range = (range_bin >= 0) & (range_bin < ground.size)
+        range_bin = np.clip(range_bin, 0, ground.size - 1)
+        in_range &= valid[0, range_bin]
+        _point_cache.clear()
+        _point_cache[key] = (azimuth_bin, gate_index[0, range_bin], in_range)
+    return _point_cache[key]
+
+
+_point_cache = {}
+
+
+def sample_points(radar, lats, lons, field=FIELD):
+    """field at each point on the lowest tilt. NaN for no data or out of range."""
+    azimuth_bin, gates, in_range = point_gates(radar, lats, lons)
+    sweeps = volume_sweeps(radar)[:1]
+    rays = azimuth_index(radar, sweeps)[0][azimuth_bin]
+
+    data = radar.fields[field]['data']
+    values = np.ma.filled(data[rays, gates].astype(np.float32), np.nan)
+    values[~in_range] = np.nan
+    return values
+
+
+def extract_volume(url, site, lats, lons, field=FIELD, archive_dir=None):
+    """Worker: fetch one volume, decode just the lowest tilt of field, sample the points."""
+    import Level2New
+    from sweep_archive import find_archived, open_archived
+
+    Level2New.RADAR_ID = site
+    _, scan_time = volume_key(url)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        path = find_archived(archive_dir, site, scan_time) if archive_dir else None
+        if path is not None:
+            radar = open_archived(path, sweeps=[0])
+        elif archive_dir:
+            # Archive the whole volume so later renders can reuse it
+            Level2New.SWEEP_ARCHIVE_DIR = archive_dir
+            radar = Level2New.load_volume(url)
+        else:
+            radar = Level2New.read_volume(url, [0], include_fields=[field])
+    return scan_time, sample_points(radar, lats, lons, field)
+
+
+def extract_series(urls, site, points, field=FIELD, processes=PROCESSES, archive_dir=None):
+    """
+    Sample points ({name: (lat, lon)}) in every volume. Returns (times, names,
+    values) with values a float32 (time, point) array, volumes in time order.
+    """
+    names = list(points)
+    lats = [points[name][0] for name in names]
+    lons = [points[name][1] for name in names]
+
+    rows = {}
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(extract_volume, url, site, lats, lons, field, archive_dir): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                scan_time, values = future.result()
+            except Exception as e:
+                print(f"Error reading {os.path.basename(url)}: {e}")
+                continue
+            rows[scan_time] = values
+            print(f"[{len(rows)}/{len(urls)}] {scan_time:%Y-%m-%d %H:%M:%S} "
+                  f"max {np.nanmax(values) if np.isfinite(values).any() else float('nan'):.1f}")
+
+    times = sorted(rows)
+    values = np.array([rows[t] for t in times], dtype=np.float32).reshape(len(times), len(names))
+    return times, names, values
+
+
+def save_series(path, times, names, values, field=FIELD):
+    import xarray as xr
+
+    series = xr.DataArray(values, dims=('time', 'point'), coords={'time': times, 'point': names}, name=field)
+    if path.endswith('.nc'):
+        series.to_netcdf(path)
+    else:
+        series.to_pandas().round(1).to_csv(path)
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    import Level2New
+
+    urls = VOLUME_URLS or list_volumes(RADAR_ID, END_TIME - timedelta(hours=HOURS), END_TIME)
+    if not urls:
+        print("No volumes found. Check RADAR_ID and the time range.")
+        return
+    print(f"{len(urls)} volumes from {RADAR_ID}")
+
+    # The site location comes from the first volume (only its lowest tilt is decoded)
+    Level2New.RADAR_ID = RADAR_ID
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        radar = Level2New.read_volume(urls[0], [0], include_fields=[FIELD])
+    lat0 = float(radar.latitude['data'][0])
+    lon0 = float(radar.longitude['data'][0])
+
+    points = goes_points() if POINTS == 'goes' else natural_earth_points(lat0, lon0)
+    _, _, in_range = point_gates(radar, [p[0] for p in points.values()], [p[1] for p in points.values()])
+    points = {name: point for name, point, inside in zip(points, points.values(), in_range) if inside}
+    print(f"{len(points)} points within range of {RADAR_ID}, {PROCESSES} processes")
+
+    times, names, values = extract_series(urls, RADAR_ID, points, FIELD, PROCESSES, SWEEP_ARCHIVE_DIR)
+    save_series(OUTPUT_FILE, times, names, values)
+    print(f"\nSaved {values.shape[0]} times x {values.shape[1]} points as {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+©2025 JesseLikesWeather.
+
+Small helpers shared by the NEXRAD scripts: Level II file names and bucket
+listings, and the moment colour styles and lookup tables used wherever a
+radar field is coloured in NumPy instead of by matplotlib (multi_panel.py,
+radar_tiles.py, radar_over_satellite.py).
+"""
+
+from datetime import datetime, timedelta
+import os
+import re
+
+import numpy as np
+
+BUCKET_URL = "https://unidata-nexrad-level2.s3.amazonaws.com"
+
+MOMENT_STYLES = {
+    'reflectivity': {'cmap': 'NWSRef', 'vmin': -20, 'vmax': 70, 'label': 'REFLECTIVITY (dBZ)',
+                     'ticks': [-20, 0, 20, 40, 60]},
+    'velocity': {'cmap': 'NWSVel', 'vmin': -40, 'vmax': 40, 'label': 'VELOCITY (m/s)',
+                 'ticks': [-40, -20, 0, 20, 40]},
+    'spectrum_width': {'cmap': 'NWS_SPW', 'vmin': 0, 'vmax': 20, 'label': 'SPECTRUM WIDTH (m/s)',
+                       'ticks': [0, 5, 10, 15, 20]},
+    'differential_reflectivity': {'cmap': 'RefDiff', 'vmin': -2, 'vmax': 6, 'label': 'DIFFERENTIAL REFLECTIVITY (dB)',
+                                  'ticks': [-2, 0, 2, 4, 6]},
+    'cross_correlation_ratio': {'cmap': 'Carbone42', 'vmin': 0.7, 'vmax': 1.05, 'label': 'CORRELATION COEFFICIENT',
+                                'ticks': [0.7, 0.8, 0.9, 1.0]},
+    'differential_phase': {'cmap': 'Wild25', 'vmin': 0, 'vmax': 360, 'label': 'DIFFERENTIAL PHASE (°)',
+                           'ticks': [0, 90, 180, 270, 360]},
+}
+
+
+def volume_key(url):
+    """(site, scan_time) from a Level II file name like KTLX20130531_233259_V06.gz."""
+    match = re.search(r'([A-Z]{4})(\d{8})_(\d{6})', os.path.basename(url))
+    if match is None:
+        raise ValueError(f"Can't find a site and scan time in {url}")
+    return match.group(1), datetime.strptime(match.group(2) + match.group(3), '%Y%m%d%H%M%S')
+
+
+def list_volumes(site, start, end):
+    """V06 volume URLs for site between start and end, from the public AWS bucket."""
+    import xml.etree.ElementTree as ET
+
+    import requests
+
+    urls = []
+    day = start.date()
+    while day <= end.date():
+        prefix = f"{day:%Y/%m/%d}/{site}/"
+        response = requests.get(f"{BUCKET_URL}/?list-type=2&prefix={prefix}", timeout=30)
+        response.raise_for_status()
+        namespace = {'s3': 'http://s3.amazonaws.com/doc/2006-03-01/'}
+        for key in ET.fromstring(response.content).iterfind('s3:Contents/s3:Key', namespace):
+            name = os.path.basename(key.text)
+            if name.endswith('_MDM'):
+                continue
+            scan_time = datetime.strptime(name[4:19], '%Y%m%d_%H%M%S')
+            if start <= scan_time <= end:
+                urls.append(f"{BUCKET_URL}/{key.text}")
+        day += timedelta(days=1)
+    return sorted(urls)
+
+
+def color_table(style):
+    """256 RGBA colours for style's cmap/vmin/vmax, plus a transparent one for no data."""
+    import matplotlib.pyplot as plt
+    import pyart  # Registers the pyart colormaps
+
+    colors = plt.get_cmap(style['cmap'])(np.linspace(0, 1, 256), bytes=True)
+    return np.vstack([colors, [0, 0, 0, 0]]).astype(np.uint8)
+
+
+def colorize(values, style, colors):
+    """RGBA uint8 image of values (NaN transparent)."""
+    scaled = (values - style['vmin']) * (255 / (style['vmax'] - style['vmin']))
+    index = np.clip(np.nan_to_num(scaled, nan=0), 0, 255).astype(np.intp)
+    index[np.isnan(values)] = 256
+    return colors[index]
@@ -0,0 +1,218 @@
+"""
+©2025 JesseLikesWeather.
+
+Radar over satellite: each Level II volume drawn on top of the nearest GOES
+ABI scan, one combined image per volume (plus an optional GIF).
+
+Radar volumes and ABI granules are matched through their sorted start times
+(np.searchsorted), so each granule is downloaded once however many volumes
+fall near it. Both are resampled onto one shared Mercator grid the size of the
+map: the pixel -> polar gate (volume_products.grid_lookup) and pixel -> ABI
+pixel tables only depend on the radar site and the granule's grid, so they
+are built once and reused for every frame. The two layers are blended into a
+single RGB image in one NumPy pass and dropped into a figure whose basemap,
+cities, banner and colorbar are drawn once (UTILITIES/blit_render.py); each
+frame only redraws the image and time.
+"""
+
+from datetime import datetime, timedelta
+import os
+import sys
+import time
+
+import numpy as np
+
+from radar_common import color_table, colorize, list_volumes, volume_key
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SATELLITE'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'UTILITIES'))
+
+# --- Configuration ---
+RADAR_ID = "KTLX"
+RADAR_LOCATION = "OKLAHOMA CITY, OK"
+START_TIME = datetime(2024, 5, 6, 22, 0) # UTC
+END_TIME = datetime(2024, 5, 7, 1, 0)
+VOLUME_URLS = [] # Or list the volumes yourself and skip the bucket listing.
+RADAR_PRODUCT = 'reflectivity' # or 'composite', 'echo_tops', 'vil' (see Level2New.py)
+RADAR_ALPHA = 0.85
+
+SATELLITE = 16 # GOES-16 (East). 18/19 depending on the date and region.
+SATELLITE_PRODUCT = 'CleanIR' # 'TrueColor', 'CleanIR', 'WaterVapor', 'DayNight' (see goes_products.py)
+MATCH_WINDOW = timedelta(minutes=15) # Volumes with no scan this close are skipped.
+
+OUTPUT_GIF = f'{RADAR_ID}_radar_over_satellite.gif' # None for PNG frames only.
+FRAME_DURATION = 200 # Milliseconds per frame.
+# --- End Configuration ---
+
+GRID_SIZE = (1920, 961) # The map axes of the 1920x1080 Level2New figure, in pixels.
+
+
+def satellite_index(bands, crs, lon, lat):
+    """
+    Flat index into the granule's (possibly cropped/averaged) band grid for
+    each target pixel, -1 off the disk or outside the grid. Cached per grid.
+    """
+    import cartopy.crs as ccrs
+
+    x, y = bands.x, bands.y
+    key = (crs.proj4_init, x.size, y.size, float(x[0]), float(x[-1]), float(y[0]), float(y[-1]),
+           lon.shape, float(lon[0, 0]), float(lat[0, 0]))
+    if key not in _satellite_cache:
+        points = crs.transform_points(ccrs.PlateCarree(), lon, lat)
+        column = np.rint((points[..., 0] - x[0]) / (x[1] - x[0]))
+        row = np.rint((points[..., 1] - y[0]) / (y[1] - y[0]))
+        # Off-disk points come back as inf
+        inside = np.isfinite(column) & np.isfinite(row)
+        inside &= (column >= 0) & (column < x.size) & (row >= 0) & (row < y.size)
+        index = np.full(lon.shape, -1, dtype=np.int64)
+        index[inside] = row[inside].astype(np.int64) * x.size + column[inside].astype(np.int64)
+        _satellite_cache.clear()
+        _satellite_cache[key] = index
+    return _satellite_cache[key]
+
+
+_satellite_cache = {}
+
+
+def match_granules(volume_times, granule_starts, window=MATCH_WINDOW):
+    """
+    Nearest granule for each volume time, both sorted. Returns a list of
+    granule positions (None where nothing is within window).
+    """
+    granules = np.array(granule_starts, dtype='datetime64[s]')
+    volumes = np.array(volume_times, dtype='datetime64[s]')
+    if not granules.size:
+        return [None] * len(volume_times)
+
+    right = np.clip(np.searchsorted(granules, volumes), 0, granules.size - 1)
+    left = np.maximum(right - 1, 0)
+    nearest = np.where(np.abs(volumes - granules[left]) <= np.abs(granules[right] - volumes), left, right)
+    close = np.abs(granules[nearest] - volumes) <= np.timedelta64(window)
+    return [int(i) if ok else None for i, ok in zip(nearest, close)]
+
+
+def load_satellite(G, granule_start, extent, lon, lat):
+    """SATELLITE_PRODUCT for one granule on the target grid, uint8 RGB."""
+    from goes_products import BandCache, granule_crs, open_granule, render_products, window_prepare
+
+    files = G.nearesttime(granule_start, within=timedelta(minutes=1), return_as='filelist', download=True)
+    ds = open_granule(os.path.join(files.attrs['filePath'], files.file.iloc[0]))
+    try:
+        bands = BandCache(ds, prepare=window_prepare(ds, extent, GRID_SIZE))
+        rgb = render_products(bands, [SATELLITE_PRODUCT])[SATELLITE_PRODUCT]
+        index = satellite_index(bands, granule_crs(ds), lon, lat)
+        scan_time = bands.scan_time()
+    finally:
+        ds.close()
+
+    pixels = np.append(np.asarray(rgb, dtype=np.float32).reshape(-1, 3), [[0, 0, 0]], axis=0)
+    return (np.nan_to_num(pixels[index]) * 255).astype(np.uint8), scan_time
+
+
+def composite(satellite_rgb, radar_values, style, colors, alpha=RADAR_ALPHA):
+    """Radar colours blended over the satellite image wherever there is radar data."""
+
+    radar_rgba = colorize(radar_values, style, colors)
+    weight = (radar_rgba[..., 3:] / 255.0) * alpha
+    return (satellite_rgb * (1 - weight) + radar_rgba[..., :3] * weight).astype(np.uint8)
+
+
+def main():
+    import cartopy.crs as ccrs
+    import matplotlib.pyplot as plt
+    from PIL import Image
+    from goes2go import GOES
+
+    import Level2New
+    from blit_render import BlitRenderer
+    from volume_products import grid_lookup, mercator_grid, polar_field
+
+    Level2New.RADAR_ID = RADAR_ID
+    Level2New.RADAR_LOCATION = RADAR_LOCATION
+    Level2New.RADAR_PRODUCT = RADAR_PRODUCT
+
+    urls = VOLUME_URLS or list_volumes(RADAR_ID, START_TIME, END_TIME)
+    if not urls:
+        print("No radar volumes found. Check RADAR_ID and the time range.")
+        return
+    volume_times = [volume_key(url)[1] for url in urls]
+    order = np.argsort(volume_times)
+    urls = [urls[i] for i in order]
+    volume_times = [volume_times[i] for i in order]
+
+    print(f"Listing GOES-{SATELLITE} scans...")
+    G = GOES(satellite=SATELLITE, product='ABI')
+    granule_list = G.timerange(start=volume_times[0] - MATCH_WINDOW, end=volume_times[-1] + MATCH_WINDOW,
+                               return_as='filelist', download=False)
+    granule_starts = list(granule_list.drop_duplicates('start').sort_values('start')['start'].dt.to_pydatetime())
+    matches = match_granules(volume_times, granule_starts)
+    print(f"{len(urls)} radar volumes, {len(set(m for m in matches if m is not None))} satellite scans")
+
+    style = Level2New.product_style(RADAR_PRODUCT)
+    colors = color_table(style)
+    fig = ax = image = time_artist = blitter = None
+    satellite_rgb, loaded_granule = None, None
+    frames = []
+    start = time.perf_counter()
+
+    for url, volume_time, match in zip(urls, volume_times, matches):
+        if match is None:
+            print(f"No satellite scan within {MATCH_WINDOW} of {volume_time}, skipping.")
+            continue
+        print(f"\nFrame {volume_time:%Y-%m-%d %H:%M:%S}: {os.path.basename(url)}")
+        try:
+            radar = Level2New.load_volume(url, Level2New.map_sweeps())
+            values, ground = polar_field(radar, RADAR_PRODUCT, Level2New.find_reflectivity_field(radar))
+
+            if fig is None:
+                extent = Level2New.radar_extent(radar)
+                mercator_extent, lon, lat = mercator_grid(extent, GRID_SIZE)
+
+            if match != loaded_granule:
+                satellite_rgb, satellite_time = load_satellite(G, granule_starts[match], extent, lon, lat)
+                loaded_granule = match
+
+            flat = np.append(values.ravel(), np.float32(np.nan))
+            frame = composite(satellite_rgb, flat[grid_lookup(radar, ground, lon, lat)], style, colors)
+        except Exception as e:
+            print(f"Error building frame: {e}")
+            continue
+
+        time_text = (f"{Level2New.banner_time_text(volume_time)}   |   "
+                     f"GOES-{SATELLITE} {satellite_time:%H:%M} UTC")
+        if fig is None:
+            # Everything but the image and time text is drawn once
+            projection = ccrs.Mercator()
+            fig, ax = Level2New.create_figure(extent, projection)
+            image = ax.imshow(frame, extent=mercator_extent, transform=projection, origin='upper',
+                              interpolation='nearest', zorder=1)
+            Level2New.add_boundaries(ax)
+            Level2New.plot_cities(ax, extent)
+            ax.spines['geo'].set_visible(False)
+            time_artist = Level2New.add_banner(fig, volume_time)
+            Level2New.add_colorbar(fig)
+            blitter = BlitRenderer(fig, [image, time_artist])
+        else:
+            image.set_data(frame)
+        time_artist.set_text(time_text)
+
+        output_filename = f"{RADAR_ID}_{volume_time:%Y%m%d_%H%M%S}_overlay.png"
+        Image.fromarray(blitter.frame_rgba()).convert('RGB').save(output_filename)
+        frames.append(output_filename)
+        print(f"Frame saved as {output_filename}")
+
+    if fig is not None:
+        plt.close(fig)
+    if not frames:
+        print("No frames were created. Check your data range and try again.")
+        return
+    print(f"\nRendered {len(frames)} frames in {time.perf_counter() - start:.1f}s")
+
+    if OUTPUT_GIF:
+        images = [Image.open(frame) for frame in frames]
+        images[0].save(OUTPUT_GIF, save_all=True, append_images=images[1:], duration=FRAME_DURATION, loop=0)
+        print(f"GIF saved as: {OUTPUT_GIF}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+©2025 JesseLikesWeather.
+
+Web-Mercator XYZ map tiles from a Level II volume.
+
+    python radar_tiles.py
+
+Instead of one fixed 1920x1080 image, the volume is sampled once onto its
+polar grid (azimuth x ground range, see volume_products.py) and every tile
+pixel at every zoom level is a lookup into that grid. The lookup tables only
+depend on the radar's location and gate layout, so they are built once per
+site and zoom and reused for every volume after. Tiles with no echo are
+skipped, the rest are PNG-encoded on a thread pool and cached under
+
+    <TILE_DIR>/<SITE>/<YYYYmmdd_HHMMSS>/<field>/<z>/<x>/<y>.png
+
+so a map viewer (Leaflet, OpenLayers, QGIS...) can pan and zoom around the
+scan without anything being re-rendered.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
+import time
+
+import numpy as np
+
+from radar_common import color_table, colorize, volume_key
+from volume_products import AZIMUTH_BINS, polar_field, polar_index
+
+# --- Configuration ---
+aws_nexrad_url = "https://unidata-nexrad-level2.s3.amazonaws.com/2013/05/31/KTLX/KTLX20130531_233259_V06.gz"
+RADAR_ID = "KTLX"
+RADAR_PRODUCT = 'reflectivity' # or 'composite', 'echo_tops', 'vil' (see Level2New.py)
+MIN_ZOOM = 5
+MAX_ZOOM = 9 # Each zoom level has 4x the tiles of the one before.
+TILE_DIR = 'radar_tiles'
+THREADS = 4 # PNG encoding threads.
+# --- End Configuration ---
+
+TILE_SIZE = 256
+
+
+def tile_bounds(radar, ground_range, zoom):
+    """(x0, y0, x1, y1) tile numbers (inclusive) covering the radar's range at zoom."""
+    import pyart
+
+    lat0 = float(radar.latitude['data'][0])
+    lon0 = float(radar.longitude['data'][0])
+    reach = float(ground_range[-1])
+    lon, lat = pyart.core.cartesian_to_geographic_aeqd(
+        np.array([-reach, reach, 0, 0]), np.array([0, 0, -reach, reach]), lon0, lat0)
+    x0, y1 = lonlat_to_tile(lon.min(), lat.min(), zoom)
+    x1, y0 = lonlat_to_tile(lon.max(), lat.max(), zoom)
+    return int(x0), int(y0), int(x1), int(y1)
+
+
+def lonlat_to_tile(lon, lat, zoom):
+    """Fractional XYZ tile coordinates of a point."""
+    n = 2 ** zoom
+    x = (lon + 180) / 360 * n
+    y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+    return x, y
+
+
+def pixel_lookup(radar, ground_range, zoom, bins=AZIMUTH_BINS):
+    """
+    Flat polar-grid index of every pixel in the zoom level's tile block, -1
+    outside the radar's range. Cached per site, gate layout and zoom.
+    Returns (lookup, (x0, y0, x1, y1)).
+    """
+    lat0 = float(radar.latitude['data'][0])
+    lon0 = float(radar.longitude['data'][0])
+    key = (lat0, lon0, float(ground_range[0]), ground_range.size, bins, zoom)
+    if key not in _lookup_cache:
+        x0, y0, x1, y1 = bounds = tile_bounds(radar, ground_range, zoom)
+        world = TILE_SIZE * 2 ** zoom
+        # Pixel centres of the whole block of tiles
+        px = np.arange(x0 * TILE_SIZE, (x1 + 1) * TILE_SIZE) + 0.5
+        py = np.arange(y0 * TILE_SIZE, (y1 + 1) * TILE_SIZE) + 0.5
+        lon = px / world * 360 - 180
+        lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * py / world))))
+
+        lookup = polar_index(radar, ground_range, *np.meshgrid(lon, lat), bins)
+
+        if len(_lookup_cache) >= 16:
+            _lookup_cache.clear()
+        _lookup_cache[key] = (lookup, bounds)
+    return _lookup_cache[key]
+
+
+_lookup_cache = {}
+
+
+def tile_path(directory, site, scan_time, field, z, x, y):
+    return os.path.join(directory, site, scan_time.strftime('%Y%m%d_%H%M%S'), field, str(z), str(x), f"{y}.png")
+
+
+def write_tile(path, rgba):
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so a viewer never loads half a tile
+    temp_path = path + '.tmp'
+    Image.fromarray(rgba, 'RGBA').save(temp_path, format='PNG', compress_level=6)
+    os.replace(temp_path, path)
+
+
+def render_tiles(radar, site, scan_time, product='reflectivity', field='reflectivity',
+                 zooms=range(MIN_ZOOM, MAX_ZOOM + 1), directory=TILE_DIR, threads=THREADS):
+    """
+    Write every non-empty tile of the volume at each zoom, skipping tiles
+    already in the cache. Returns (written, skipped_empty, cached) counts.
+    """
+    from Level2New import product_style
+
+    style = product_style(product)
+    colors = color_table(style)
+    values, ground = polar_field(radar, product, field)
+    # One trailing NaN for every lookup of -1
+    flat = np.append(values.ravel(), np.float32(np.nan))
+
+    written = empty = cached = 0
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = []
+        for zoom in zooms:
+            lookup, (x0, y0, x1, y1) = pixel_lookup(radar, ground, zoom)
+            image = colorize(flat[lookup], style, colors)
+
+            for tx in range(x0, x1 + 1):
+                for ty in range(y0, y1 + 1):
+                    path = tile_path(directory, site, scan_time, product, zoom, tx, ty)
+                    if os.path.exists(path):
+                        cached += 1
+                        continue
+                    row = (ty - y0) * TILE_SIZE
+                    column = (tx - x0) * TILE_SIZE
+                    tile = image[row:row + TILE_SIZE, column:column + TILE_SIZE]
+                    if not tile[:, :, 3].any():
+                        empty += 1
+                        continue
+                    futures.append(pool.submit(write_tile, path, np.ascontiguousarray(tile)))
+                    written += 1
+        for future in futures:
+            future.result()
+    return written, empty, cached
+
+
+def main():
+    import Level2New
+
+    Level2New.RADAR_ID = RADAR_ID
+    radar = Level2New.load_volume(aws_nexrad_url)
+    site, scan_time = volume_key(aws_nexrad_url)
+    field = Level2New.find_reflectivity_field(radar)
+
+    start = time.perf_counter()
+    written, empty, cached = render_tiles(radar, site, scan_time, RADAR_PRODUCT, field,
+                                          range(MIN_ZOOM, MAX_ZOOM + 1), TILE_DIR, THREADS)
+    print(f"Tiles for zooms {MIN_ZOOM}-{MAX_ZOOM}: {written} written, {empty} empty (skipped), "
+          f"{cached} already cached in {time.perf_counter() - start:.1f}s")
+    template = tile_path(os.path.abspath(TILE_DIR), site, scan_time, RADAR_PRODUCT, '{z}', '{x}', '{y}')
+    print(f"Tile URL template: file://{template}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+©2025 JesseLikesWeather.
+
+Decoded-sweep archive for Level II volumes.
+
+Downloading and decoding a V06 file takes seconds; re-rendering it with a new
+style or extent shouldn't. archive_volume() stores an already decoded pyart
+Radar as Zarr (or NetCDF), one integer-coded, compressed chunk per field per
+sweep, under <directory>/<SITE>/<SITE>_<YYYYmmdd_HHMMSS>.zarr. open_archived()
+turns that back into a pyart Radar whose fields load lazily, so a render that
+only needs the lowest reflectivity tilt only reads that one chunk.
+
+    python sweep_archive.py KTLX20130531_233259_V06 ...   # convert files or URLs
+"""
+
+import os
+
+import numpy as np
+
+from radar_common import volume_key
+
+ARCHIVE_DIR = 'sweep_archive'
+
+# Decoded Level II values are (raw - offset) / scale with each moment's own
+# Message 31 scale and offset (0.5 dBZ, 0.5 or 1 m/s, 1/16 dB...). Grids up to
+# this many times finer than the smallest gap in the data are tried before a
+# sweep is stored as plain float32.
+MAX_GRID_DIVISOR = 16
+
+FORMATS = {'zarr': '.zarr', 'netcdf': '.nc'}
+
+
+def archive_path(directory, site, scan_time, format='zarr'):
+    return os.path.join(directory, site, f"{site}_{scan_time.strftime('%Y%m%d_%H%M%S')}{FORMATS[format]}")
+
+
+def find_archived(directory, site, scan_time):
+    """Path of an archived volume, or None."""
+    for format in FORMATS:
+        path = archive_path(directory, site, scan_time, format)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def field_coding(data):
+    """
+    (codes, scale, offset): data (float32, NaN for no data) as uint8/uint16
+    codes that decode back to exactly the same float32 values with
+    (code - offset) / scale, the way pyart applies the Message 31 coding.
+    Code 0 is no data. None if the values aren't on such a grid.
+    """
+    finite = np.isfinite(data)
+    values = np.unique(data[finite])
+    if values.size < 2:
+        return None
+
+    low, span = float(values[0]), float(values[-1]) - float(values[0])
+    smallest = float(np.diff(values).min())
+    for divisor in range(1, MAX_GRID_DIVISOR + 1):
+        # The whole span over a whole number of steps pins the step down better than one gap
+        step = span / np.rint(span * divisor / smallest)
+        # The native scale is a float32 like 2 or 2.8361, which the step only
+        # comes close to when few values are present; its shorter roundings
+        # are tried too
+        candidates = [np.float32(f'{1 / step:.{digits}g}') for digits in range(1, 9)]
+        for scale in dict.fromkeys(candidates):
+            # raw - offset at the lowest value is a whole (or half) number of codes
+            offset = np.float32(1 - np.rint(low * float(scale) * 2) / 2)
+            codes = np.rint(values.astype(np.float64) * float(scale) + float(offset))
+            if codes[-1] > np.iinfo(np.uint16).max:
+                return None
+            if np.array_equal((codes.astype(np.float32) - offset) / scale, values):
+                dtype = np.uint8 if codes[-1] <= np.iinfo(np.uint8).max else np.uint16
+                coded = np.zeros(data.shape, dtype)
+                coded[finite] = codes[np.searchsorted(values, data[finite])]
+                return coded, scale, offset
+    return None
+
+
+def decode_field(variable):
+    """float32 values (NaN for no data) of one archived field variable."""
+    if 'gate_scale' not in variable.attrs:
+        return variable.values.astype(np.float32)
+    codes = variable.values
+    scale = np.float32(variable.attrs['gate_scale'])
+    offset = np.float32(variable.attrs['gate_offset'])
+    data = (codes.astype(np.float32) - offset) / scale
+    data[codes == 0] = np.nan
+    return data
+
+
+def archive_volume(radar, directory=ARCHIVE_DIR, site=None, scan_time=None, format='zarr'):
+    """Write a decoded pyart Radar to the archive. Returns the path written."""
+    import pyart
+    import xarray as xr
+
+    site = site or radar.metadata.get('instrument_name', 'XXXX')
+    scan_time = scan_time or pyart.util.datetime_from_radar(radar).replace(microsecond=0)
+    path = archive_path(directory, site, scan_time, format)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    variables = {}
+    encoding = {}
+    for sweep in range(radar.nsweeps):
+        rays = radar.get_slice(sweep)
+        suffix = f's{sweep:02d}'
+        dim = f'ray_{suffix}'
+        variables[f'azimuth_{suffix}'] = (dim, radar.azimuth['data'][rays].astype(np.float32))
+        variables[f'elevation_{suffix}'] = (dim, radar.elevation['data'][rays].astype(np.float32))
+        variables[f'time_{suffix}'] = (dim, radar.time['data'][rays].astype(np.float64))
+        for name, info in (radar.instrument_parameters or {}).items():
+            # Per-ray values (Nyquist velocity, unambiguous range) go with their sweep
+            if np.shape(info['data']) == (radar.nrays,):
+                variables[f'{name}_{suffix}'] = (dim, np.asarray(info['data'])[rays])
+
+        for field, info in radar.fields.items():
+            data = np.ma.filled(info['data'][rays].astype(np.float32), np.nan)
+            coding = field_coding(data)
+            name = f'{field}_{suffix}'
+            if coding is None:
+                variables[name] = ((dim, 'gate'), data)
+                encoding[name] = {}
+            else:
+                coded, scale, offset = coding
+                variables[name] = ((dim, 'gate'), coded, {'gate_scale': float(scale), 'gate_offset': float(offset)})
+                encoding[name] = {'_FillValue': None}
+            if format == 'zarr':
+                encoding[name]['chunks'] = data.shape
+            else:
+                encoding[name].update(zlib=True, complevel=4, chunksizes=data.shape)
+
+    ds = xr.Dataset(variables, coords={'range': ('gate', radar.range['data'].astype(np.float32))})
+    ds.attrs = {
+        'site': site,
+        'scan_time': scan_time.isoformat(),
+        'latitude': float(radar.latitude['data'][0]),
+        'longitude': float(radar.longitude['data'][0]),
+        'altitude': float(radar.altitude['data'][0]),
+        'vcp_pattern': int(radar.metadata.get('vcp_pattern') or 0),
+        'fixed_angle': [float(angle) for angle in radar.fixed_angle['data']],
+        'time_units': radar.time['units'],
+        'fields': list(radar.fields),
+        'instrument_parameters': [name for name, info in (radar.instrument_parameters or {}).items()
+                                  if np.shape(info['data']) == (radar.nrays,)],
+    }
+
+    if format == 'zarr':
+        ds.to_zarr(path, mode='w', encoding=encoding, consolidated=True)
+    else:
+        ds.to_netcdf(path, encoding=encoding)
+    return path
+
+
+def open_archived(path, sweeps=None):
+    """
+    A pyart Radar backed by an archived volume. Only the sweeps listed are
+    included (all by default), and each field is read the first time it is used.
+    """
+    import pyart
+    import xarray as xr
+    from pyart.config import get_metadata
+    from pyart.lazydict import LazyLoadDict
+
+    if path.endswith(FORMATS['zarr']):
+        ds = xr.open_zarr(path, chunks=None, consolidated=True)
+    else:
+        ds = xr.open_dataset(path, chunks=None)
+    attrs = ds.attrs
+    if sweeps is None:
+        sweeps = range(len(attrs['fixed_angle']))
+    sweeps = list(sweeps)
+    suffixes = [f's{sweep:02d}' for sweep in sweeps]
+
+    def stacked(prefix):
+        return np.concatenate([ds[f'{prefix}_{suffix}'].values for suffix in suffixes])
+
+    def metadata(name, data):
+        info = get_metadata(name)
+        info['data'] = data
+        return info
+
+    rays_per_sweep = np.array([ds.sizes[f'ray_{suffix}'] for suffix in suffixes])
+    ends = np.cumsum(rays_per_sweep) - 1
+
+    time = metadata('time', stacked('time'))
+    time['units'] = attrs['time_units']
+
+    fields = {}
+    for field in attrs['fields']:
+        info = LazyLoadDict(get_metadata(field))
+        info.set_lazy('data', lambda field=field: np.ma.masked_invalid(
+            np.concatenate([decode_field(ds[f'{field}_{suffix}']) for suffix in suffixes])))
+        fields[field] = info
+
+    instrument_parameters = {name: metadata(name, stacked(name))
+                             for name in attrs.get('instrument_parameters', [])}
+
+    radar = pyart.core.Radar(
+        time,
+        metadata('range', ds['range'].values),
+        fields,
+        {'instrument_name': attrs['site'], 'vcp_pattern': attrs['vcp_pattern'],
+         'original_container': 'sweep_archive'},
+        'ppi',
+        metadata('latitude', np.array([attrs['latitude']])),
+        metadata('longitude', np.array([attrs['longitude']])),
+        metadata('altitude', np.array([attrs['altitude']])),
+        metadata('sweep_number', np.array(sweeps, dtype=np.int32)),
+        metadata('sweep_mode', np.array(['azimuth_surveillance'] * len(sweeps))),
+        metadata('fixed_angle', np.array(attrs['fixed_angle'], dtype=np.float32)[sweeps]),
+        metadata('sweep_start_ray_index', (ends - rays_per_sweep + 1).astype(np.int32)),
+        metadata('sweep_end_ray_index', ends.astype(np.int32)),
+        metadata('azimuth', stacked('azimuth')),
+        metadata('elevation', stacked('elevation')),
+        instrument_parameters=instrument_parameters or None,
+    )
+    return radar
+
+
+def main():
+    import argparse
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    import Level2New
+
+    parser = argparse.ArgumentParser(description="Decode Level II files or URLs into the sweep archive.")
+    parser.add_argument('volumes', nargs='+', help="Level II files or URLs (site and time come from the name).")
+    parser.add_argument('--directory', default=ARCHIVE_DIR)
+    parser.add_argument('--format', choices=list(FORMATS), default='zarr')
+    args = parser.parse_args()
+
+    for volume in args.volumes:
+        site, scan_time = volume_key(volume)
+        Level2New.RADAR_ID = site
+        if os.path.exists(volume):
+            with open(volume, 'rb') as f:
+                radar = Level2New.decode_volume(f.read())
+        else:
+            radar = Level2New.load_volume(volume)
+        path = archive_volume(radar, args.directory, site, scan_time, args.format)
+        print(f"Archived {os.path.basename(volume)} as {path}")
+
+
+if __name__ == '__main__':
+    main()
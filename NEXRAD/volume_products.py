@@ -0,0 +1,289 @@
+"""
+©2025 JesseLikesWeather.
+
+Whole-volume products from a pyart Radar: composite reflectivity, echo tops
+and vertically integrated liquid (VIL).
+
+Every tilt is sampled onto one polar grid (azimuth x ground range) with a
+single fancy-index gather, so each product is one NumPy reduction down the
+tilt axis. Which gate of each tilt sits over each ground-range bin, and how
+high the beam is there, only depends on the VCP's elevation angles and the
+gate layout, so that table is built once per VCP and reused by every volume
+after it.
+"""
+
+import numpy as np
+
+# 4/3 earth radius, the standard-refraction beam model the NWS uses.
+EFFECTIVE_RADIUS = 6371000.0 * 4 / 3
+
+AZIMUTH_BINS = 720 # 0.5 degree, the super-resolution spacing.
+ECHO_TOP_DBZ = 18.5 # NWS echo top threshold.
+VIL_HAIL_CAP_DBZ = 56 # Reflectivity above this is treated as hail and capped.
+VIL_MIN = 1 # kg/m^2. Lower values are left blank like the NWS VIL product.
+
+
+def volume_sweeps(radar, field=None):
+    """
+    One sweep index per distinct elevation angle, lowest first.
+
+    Split cuts and SAILS/MRLE repeats scan the same elevation more than once;
+    the first scan of each angle (the surveillance cut) is kept. With field,
+    the scan of each angle with the most gates of that field is kept instead,
+    so Doppler moments come from the Doppler cut.
+    """
+    angles = np.round(radar.fixed_angle['data'], 1)
+    elevations, first = np.unique(angles, return_index=True)
+    if field is None:
+        return first
+
+    data = radar.fields[field]['data']
+    sweeps = first.copy()
+    for i, elevation in enumerate(elevations):
+        candidates = np.nonzero(angles == elevation)[0]
+        counts = [np.ma.count(data[radar.get_slice(sweep)]) for sweep in candidates]
+        sweeps[i] = candidates[int(np.argmax(counts))]
+    return sweeps
+
+
+def beam_geometry(radar, sweeps):
+    """
+    (gate_index, valid, height, ground_range) for the given sweeps, cached per VCP.
+
+    gate_index/valid/height are (tilt, range bin): the slant gate of each tilt
+    over each ground-range bin, whether that gate exists, and the beam height
+    (m above sea level) there. ground_range is the bin centres in metres.
+    """
+    elevations = radar.fixed_angle['data'][sweeps]
+    slant = radar.range['data']
+    spacing = float(slant[1] - slant[0])
+    altitude = float(radar.altitude['data'][0])
+
+    key = (radar.metadata.get('vcp_pattern'), tuple(np.round(elevations, 2)),
+           float(slant[0]), spacing, slant.size, round(altitude))
+    geometry = _geometry_cache.get(key)
+    if geometry is None:
+        # Output bins reuse the gate spacing, measured along the ground.
+        ground = slant.astype(np.float64)
+        theta = np.radians(elevations)[:, np.newaxis]
+        arc = ground[np.newaxis, :] / EFFECTIVE_RADIUS
+
+        # Law of sines on the (earth centre, radar, gate) triangle
+        slant_range = EFFECTIVE_RADIUS * np.sin(arc) / np.cos(theta + arc)
+        height = EFFECTIVE_RADIUS * (np.cos(theta) / np.cos(theta + arc) - 1) + altitude
+
+        gate_index = np.rint((slant_range - slant[0]) / spacing).astype(np.intp)
+        valid = (gate_index >= 0) & (gate_index < slant.size)
+        gate_index = np.clip(gate_index, 0, slant.size - 1)
+
+        # Kept in a local so another thread clearing the cache can't pull it out from under us
+        geometry = (gate_index, valid, height.astype(np.float32), ground)
+        if len(_geometry_cache) >= 8:
+            _geometry_cache.clear()
+        _geometry_cache[key] = geometry
+    return geometry
+
+
+_geometry_cache = {}
+
+
+def azimuth_index(radar, sweeps, bins=AZIMUTH_BINS):
+    """Ray number nearest each azimuth bin centre, per sweep. Shape (tilt, bins)."""
+    centres = (np.arange(bins) + 0.5) * 360 / bins
+    rays = np.empty((len(sweeps), bins), dtype=np.intp)
+
+    for i, sweep in enumerate(sweeps):
+        start = radar.sweep_start_ray_index['data'][sweep]
+        end = radar.sweep_end_ray_index['data'][sweep] + 1
+        azimuth = radar.azimuth['data'][start:end]
+
+        order = np.argsort(azimuth)
+        # Wrap one ray round each end so bins near north find their neighbour
+        wrapped = np.concatenate([azimuth[order[-1:]] - 360, azimuth[order], azimuth[order[:1]] + 360])
+        wrapped_order = np.concatenate([order[-1:], order, order[:1]])
+
+        right = np.clip(np.searchsorted(wrapped, centres), 1, wrapped.size - 1)
+        left = right - 1
+        nearest = np.where(centres - wrapped[left] <= wrapped[right] - centres, left, right)
+        rays[i] = start + wrapped_order[nearest]
+    return rays
+
+
+def sample_volume(radar, field='reflectivity', bins=AZIMUTH_BINS):
+    """
+    Every tilt of field on the common polar grid.
+
+    Returns (cube, height, ground_range): cube is float32 (tilt, azimuth, range)
+    with NaN where there is no data, height is the (tilt, range) beam height.
+    """
+    sweeps = volume_sweeps(radar)
+    gate_index, valid, height, ground = beam_geometry(radar, sweeps)
+    rays = azimuth_index(radar, sweeps, bins)
+
+    values = np.ma.filled(radar.fields[field]['data'].astype(np.float32), np.nan)
+    cube = values[rays[:, :, np.newaxis], gate_index[:, np.newaxis, :]]
+    cube[~np.broadcast_to(valid[:, np.newaxis, :], cube.shape)] = np.nan
+    return cube, height, ground
+
+
+def sample_sweep(radar, field, sweep, bins=AZIMUTH_BINS, geometry=None):
+    """
+    One sweep of field on the polar grid. Returns (values, ground_range):
+    values is float32 (azimuth, range) with NaN where there is no data.
+    geometry is beam_geometry(radar, [sweep]) if the caller already has it.
+    """
+    gate_index, valid, _, ground = geometry or beam_geometry(radar, [sweep])
+    rays = azimuth_index(radar, [sweep], bins)[0]
+    data = np.ma.filled(radar.fields[field]['data'].astype(np.float32), np.nan)
+    values = data[rays[:, np.newaxis], gate_index[0][np.newaxis, :]]
+    values[:, ~valid[0]] = np.nan
+    return values, ground
+
+
+# ==============================================================================
+# Products. Each takes the sampled cube (and beam heights) and returns an
+# (azimuth, range) array.
+# ==============================================================================
+
+def composite_reflectivity(cube, height):
+    """Highest reflectivity in each column (dBZ)."""
+    return np.fmax.reduce(cube, axis=0)
+
+
+def echo_tops(cube, height, threshold=ECHO_TOP_DBZ):
+    """Height of the highest beam with at least threshold dBZ (km above sea level)."""
+    tops = np.where(cube >= threshold, height[:, np.newaxis, :], np.nan)
+    return np.fmax.reduce(tops, axis=0) / 1000
+
+
+def vertically_integrated_liquid(cube, height, hail_cap=VIL_HAIL_CAP_DBZ):
+    """
+    VIL in kg/m^2 (Greene and Clark 1972): 3.44e-6 * sum of mean(Z)^(4/7) * dh
+    over each pair of neighbouring tilts, Z in mm^6/m^3.
+    """
+    z = np.where(np.isnan(cube), 0, 10 ** (np.minimum(cube, hail_cap) / 10))
+    layer_z = (z[:-1] + z[1:]) / 2
+    layer_depth = np.diff(height, axis=0)[:, np.newaxis, :]
+    return 3.44e-6 * np.sum(layer_z ** (4 / 7) * layer_depth, axis=0, dtype=np.float32)
+
+
+PRODUCTS = {
+    'composite': {'function': composite_reflectivity, 'cmap': 'NWSRef', 'vmin': -20, 'vmax': 70,
+                  'label': 'COMPOSITE REFLECTIVITY (dBZ)', 'ticks': [-20, -10, 0, 10, 20, 30, 40, 50, 60, 70]},
+    'echo_tops': {'function': echo_tops, 'cmap': 'HomeyerRainbow', 'vmin': 0, 'vmax': 20,
+                  'label': 'ECHO TOPS (km)', 'ticks': [0, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20]},
+    'vil': {'function': vertically_integrated_liquid, 'cmap': 'ChaseSpectral', 'vmin': 0, 'vmax': 80,
+            'label': 'VERTICALLY INTEGRATED LIQUID (kg/m²)', 'ticks': [0, 10, 20, 30, 40, 50, 60, 70, 80]},
+}
+
+
+def volume_product(radar, product, field='reflectivity', bins=AZIMUTH_BINS):
+    """Returns (values, ground_range) for one of PRODUCTS. values is (azimuth, range)."""
+    cube, height, ground = sample_volume(radar, field, bins)
+    values = PRODUCTS[product]['function'](cube, height)
+    if product == 'vil':
+        # Clear air shows as blank rather than the colormap floor
+        values[values < VIL_MIN] = np.nan
+    return values, ground
+
+
+def polar_field(radar, product='reflectivity', field='reflectivity'):
+    """
+    (values, ground_range) on the polar grid: the lowest tilt for
+    'reflectivity', otherwise one of the PRODUCTS.
+    """
+    if product != 'reflectivity':
+        return volume_product(radar, product, field)
+    return sample_sweep(radar, field, volume_sweeps(radar)[0])
+
+
+def polar_index(radar, ground_range, lon, lat, bins=AZIMUTH_BINS):
+    """
+    Flat (azimuth * ranges + range) index into the polar grid for each lon/lat,
+    -1 outside the radar's range. Same shape as lon/lat, int32.
+    """
+    import pyart
+
+    lat0 = float(radar.latitude['data'][0])
+    lon0 = float(radar.longitude['data'][0])
+    x, y = pyart.core.geographic_to_cartesian_aeqd(lon, lat, lon0, lat0)
+    azimuth_bin = (np.degrees(np.arctan2(x, y)) % 360 * bins / 360).astype(np.int32) % bins
+    spacing = ground_range[1] - ground_range[0]
+    range_bin = np.rint((np.hypot(x, y) - ground_range[0]) / spacing).astype(np.int32)
+    del x, y
+
+    index = azimuth_bin * ground_range.size + range_bin
+    index[(range_bin < 0) | (range_bin >= ground_range.size)] = -1
+    return index
+
+
+def mercator_grid(extent, size):
+    """
+    A Mercator grid of size (width, height) pixels over extent, for drawing
+    with imshow. Returns (mercator_extent, lon, lat); lon/lat are (rows,
+    columns) pixel centres, top row first.
+    """
+    import cartopy.crs as ccrs
+
+    key = (tuple(extent), tuple(size))
+    grid = _grid_cache.get(key)
+    if grid is None:
+        min_lon, max_lon, min_lat, max_lat = extent
+        corners = ccrs.Mercator().transform_points(
+            ccrs.PlateCarree(), np.array([min_lon, max_lon]), np.array([min_lat, max_lat]))
+        x0, x1 = corners[:, 0]
+        y0, y1 = corners[:, 1]
+        width, height = size
+        x = x0 + (np.arange(width) + 0.5) * (x1 - x0) / width
+        y = y1 - (np.arange(height) + 0.5) * (y1 - y0) / height
+        X, Y = np.meshgrid(x, y)
+        points = ccrs.PlateCarree().transform_points(ccrs.Mercator(), X, Y)
+        grid = ([x0, x1, y0, y1], points[..., 0], points[..., 1])
+        if len(_grid_cache) >= 4:
+            _grid_cache.clear()
+        _grid_cache[key] = grid
+    return grid
+
+
+_grid_cache = {}
+
+
+def grid_lookup(radar, ground_range, lon, lat, bins=AZIMUTH_BINS):
+    """polar_index for a mercator_grid, cached per site, gate layout and grid."""
+    key = (float(radar.latitude['data'][0]), float(radar.longitude['data'][0]), float(ground_range[0]),
+           ground_range.size, bins, lon.shape, float(lon[0, 0]), float(lat[0, 0]))
+    lookup = _lookup_cache.get(key)
+    if lookup is None:
+        lookup = polar_index(radar, ground_range, lon, lat, bins)
+        if len(_lookup_cache) >= 4:
+            _lookup_cache.clear()
+        _lookup_cache[key] = lookup
+    return lookup
+
+
+_lookup_cache = {}
+
+
+def polar_mesh(radar, ground_range, bins=AZIMUTH_BINS):
+    """Longitude/latitude of the polar grid's cell corners, for pcolormesh."""
+    import pyart
+
+    lat0 = float(radar.latitude['data'][0])
+    lon0 = float(radar.longitude['data'][0])
+    key = (lat0, lon0, float(ground_range[0]), ground_range.size, bins)
+    mesh = _mesh_cache.get(key)
+    if mesh is None:
+        spacing = ground_range[1] - ground_range[0]
+        range_edges = np.append(ground_range - spacing / 2, ground_range[-1] + spacing / 2)
+        azimuth_edges = np.radians(np.arange(bins + 1) * 360 / bins)
+
+        x = np.sin(azimuth_edges)[:, np.newaxis] * range_edges[np.newaxis, :]
+        y = np.cos(azimuth_edges)[:, np.newaxis] * range_edges[np.newaxis, :]
+        lon, lat = pyart.core.cartesian_to_geographic_aeqd(x, y, lon0, lat0)
+        mesh = (lon, lat)
+        _mesh_cache.clear()
+        _mesh_cache[key] = mesh
+    return mesh
+
+
+_mesh_cache = {}
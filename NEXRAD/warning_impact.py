@@ -0,0 +1,192 @@
+"""
+©2025 JesseLikesWeather.
+
+Which cities are under which warnings right now, and how many people is that?
+
+    rows = impact_table(fetch_warnings(valid_time), load_places(extent))
+
+Every Natural Earth populated place is tested against every active
+storm-based warning polygon in one STRtree query (the polygons are prepared
+first), so an outbreak day with thousands of polygons against the full
+populated_places set is still well under a second. Warnings are named the
+same way as on the Level2New.py map, including PDS tornado warnings and
+tornado emergencies.
+"""
+
+import csv
+from datetime import datetime
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from Level2New import fetch_warnings, warning_style
+
+# --- Configuration ---
+VALID_TIME = datetime(2013, 5, 31, 23, 30) # UTC
+EXTENT = None # (min_lon, max_lon, min_lat, max_lat), or None for everywhere.
+MIN_POPULATION = 1000
+OUTPUT_FILE = None # e.g. 'impact_20130531_2330.csv'
+# --- End Configuration ---
+
+# Most dangerous first, for sorting the table
+SEVERITY = ['TORNADO EMERGENCY', 'PDS TORNADO WARNING', 'Tornado Warning', 'Severe Thunderstorm',
+            'Flash Flood Warning', 'Marine Warning', 'Weather Warning']
+
+TABLE_COLUMNS = ['warning', 'wfo', 'event', 'expires', 'city', 'population']
+
+
+def load_places(extent=None, min_population=MIN_POPULATION):
+    """
+    Natural Earth populated places as arrays: {'name', 'population', 'points'}
+    (points are shapely Points). The shapefile is only read once.
+    """
+    import cartopy.io.shapereader as shpreader
+    import shapely
+
+    if not _places_cache:
+        cities_shp = shpreader.natural_earth(resolution='10m', category='cultural', name='populated_places')
+        names, populations, lons, lats = [], [], [], []
+        for record in shpreader.Reader(cities_shp).records():
+            name = record.attributes.get('NAME')
+            if name is None or not name.strip():
+                continue
+            try:
+                population = float(record.attributes.get('POP_MAX') or 0)
+            except (ValueError, TypeError):
+                population = 0
+            names.append(name)
+            populations.append(population)
+            lons.append(record.geometry.x)
+            lats.append(record.geometry.y)
+        _places_cache['name'] = np.array(names, dtype=object)
+        _places_cache['population'] = np.array(populations)
+        _places_cache['lon'] = np.array(lons)
+        _places_cache['lat'] = np.array(lats)
+
+    lon, lat = _places_cache['lon'], _places_cache['lat']
+    keep = _places_cache['population'] >= min_population
+    if extent is not None:
+        min_lon, max_lon, min_lat, max_lat = extent
+        keep &= (lon > min_lon) & (lon < max_lon) & (lat > min_lat) & (lat < max_lat)
+    return {
+        'name': _places_cache['name'][keep],
+        'population': _places_cache['population'][keep],
+        'points': shapely.points(lon[keep], lat[keep]),
+    }
+
+
+_places_cache = {}
+
+
+def warning_geometries(warnings_data):
+    """(prepared shapely geometries, info dicts) for the warnings we show."""
+    import shapely
+    from shapely.geometry import shape
+
+    geometries, infos = [], []
+    for feature in warnings_data.get('features', []):
+        props = feature.get('properties', {})
+        warning_info = warning_style(props)
+        if warning_info is None or not feature.get('geometry'):
+            continue
+        try:
+            geometry = shape(feature['geometry'])
+        except (ValueError, TypeError, AttributeError):
+            continue
+        if geometry.is_empty:
+            continue
+        warning_info.update(wfo=props.get('wfo', ''), event=props.get('eventid', ''),
+                            expires=props.get('expire', ''))
+        geometries.append(geometry)
+        infos.append(warning_info)
+
+    geometries = np.array(geometries, dtype=object)
+    # Hand-drawn polygons are occasionally self-intersecting, and multi-part
+    # ones can overlap. 'structure' unions overlapping parts; the default
+    # 'linework' method would cut the overlap out and drop the cities in it.
+    invalid = ~shapely.is_valid(geometries)
+    if invalid.any():
+        geometries[invalid] = shapely.make_valid(geometries[invalid], method='structure')
+    shapely.prepare(geometries)
+    return geometries, infos
+
+
+def impact_table(warnings_data, places):
+    """
+    One row per (warning, city inside it): dicts with TABLE_COLUMNS, worst
+    warning type first, then biggest city first.
+    """
+    import shapely
+
+    geometries, infos = warning_geometries(warnings_data)
+    if not len(geometries) or not len(places['points']):
+        return []
+
+    tree = shapely.STRtree(places['points'])
+    warning_index, place_index = tree.query(geometries, predicate='covers')
+
+    rows = [
+        {
+            'warning': infos[w]['name'],
+            'wfo': infos[w]['wfo'],
+            'event': infos[w]['event'],
+            'expires': infos[w]['expires'],
+            'city': places['name'][p],
+            'population': int(places['population'][p]),
+        }
+        for w, p in zip(warning_index, place_index)
+    ]
+    rows.sort(key=lambda row: (SEVERITY.index(row['warning']) if row['warning'] in SEVERITY else len(SEVERITY),
+                               -row['population'], row['city']))
+    return rows
+
+
+def summarize(rows):
+    """{warning type: (cities, population)}, each city counted once per type."""
+    cities = {}
+    for row in rows:
+        cities.setdefault(row['warning'], {})[row['city']] = row['population']
+    return {warning: (len(places), sum(places.values())) for warning, places in cities.items()}
+
+
+def print_table(rows):
+    if not rows:
+        print("No cities under active warnings")
+        return
+    print(f"{'WARNING':<22} {'WFO':<4} {'EVENT':>5}  {'CITY':<28} {'POPULATION':>10}")
+    for row in rows:
+        print(f"{row['warning']:<22} {row['wfo']:<4} {row['event']!s:>5}  {row['city'][:28]:<28} {row['population']:>10,}")
+    print()
+    for warning, (cities, population) in summarize(rows).items():
+        print(f"{warning}: {cities} cities, {population:,} people")
+
+
+def save_table(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    import time
+
+    print(f"Fetching warnings valid at {VALID_TIME:%Y-%m-%d %H:%M} UTC...")
+    warnings_data = fetch_warnings(VALID_TIME)
+    places = load_places(EXTENT, MIN_POPULATION)
+
+    start = time.perf_counter()
+    rows = impact_table(warnings_data, places)
+    print(f"{len(warnings_data.get('features', []))} warnings x {len(places['points'])} cities "
+          f"checked in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    print_table(rows)
+    if OUTPUT_FILE:
+        save_table(OUTPUT_FILE, rows)
+        print(f"\nImpact table saved as {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
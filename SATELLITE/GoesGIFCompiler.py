@@ -1,20 +1,95 @@
 "©2025 JesseLikesWeather."
 
-from goes2go import GOES
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import matplotlib.pyplot as plt
 import cartopy.feature as cfeature
 import cartopy.crs as ccrs
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from PIL import Image
+import hashlib
+import json
+import logging
 import os
+import sys
+import time
 
-map_region = 'CONUS' # Check line 19 for options!
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'UTILITIES'))
+from blit_render import BlitRenderer
+from instrument import Instrumentation, configure_logging
+from render_cache import RenderCache, cache_key, code_version
+from goes_products import (CITIES, BandCache, PRODUCTS, granule_crs, open_granule, pyramid_granule,
+                           render_products, window_prepare)
+
+map_region = 'CONUS' # Check map_extents below for options!
 
 interpolation_type = 'bilinear' 
 
 satellite = 19 # GOES-19. Satellites will vary depending on given time range.
 product = 'ABI'
 
+start_time = datetime(2025, 12, 1, 12, 00) # 12/01/2025 12 UTC
+end_time = datetime(2025, 12, 2, 12, 30) # 12/02/2025 12:30 UTC
+interval_minutes = 60 # 60 Minute Image Intervals.
+
+output_file = 'Hurricane_Dorian_2019.gif' # <- File Name.
+
+# Products rendered from the same downloads, one GIF each. Options:
+# 'TrueColor', 'CleanIR', 'WaterVapor', 'DayNight' (see goes_products.py).
+# With more than one product the name is added to output_file.
+products = ['TrueColor']
+
+# Open each download lazily in chunks (needs dask). Only the part of each band
+# inside map_region is read, it is block-averaged down to about the frame size,
+# and the RGB math runs chunk by chunk, so memory stays flat whether the sector
+# is CONUS or Full Disk. False loads the whole granule into memory like before.
+lazy_loading = True
+chunk_size = 1024 # Pixels per chunk side.
+dask_threads = 2 # Chunks worked on at once; peak memory scales with this.
+
+# Block-average each band down to the output frame (figure_size x frame_dpi
+# pixels) before the RGB math and imshow, by the largest power of two that
+# keeps at least one band pixel per frame pixel. A Full Disk frame of the
+# CONUS region reads and colours a few hundred thousand pixels instead of
+# tens of millions, and looks the same since matplotlib would have thrown
+# the rest away when drawing.
+downsample = True
+figure_size = (12, 9) # Inches.
+frame_dpi = 150
+# Save each downsampled granule (half, quarter... resolution) here so later
+# runs over the same scans (another region, product or style) read the small
+# copy instead of the full download. Lazy loading only. None to turn off.
+pyramid_store = None # e.g. 'goes_pyramid'
+
+# 'persistent' builds the figure, map features and labels once and only swaps
+# the image data and timestamp text each frame. 'classic' rebuilds everything
+# per frame (slower, but matches older outputs exactly). 'blit' is persistent
+# plus a cached background: coastlines, borders, cities and the watermark are
+# drawn once and only the image and timestamp are redrawn each frame.
+render_mode = 'blit'
+blit_benchmark = False # Print full-redraw vs. blit frames per second on the first frame.
+
+# Rolling loop: keep a "last N hours" GIF current by re-running this script
+# (e.g. from cron). With rolling_hours set, start_time/end_time are ignored and
+# the loop ends now. Frames are kept in frame_store between runs, keyed by
+# granule time and a hash of the style settings, so each run only downloads
+# and renders the granules that are new, deletes frames that have fallen out
+# of the window, and rebuilds the GIF from the stored frames.
+rolling_hours = None # e.g. 6
+frame_store = 'goes_frames'
+
+# Finished GIFs kept between runs (UTILITIES/render_cache.py), keyed by the
+# granule times, region, product, style and code. Running again with the same
+# settings (or a rolling loop before a new scan is out) copies the stored GIF
+# instead of downloading and rendering anything.
+render_cache_dir = None # e.g. 'goes_render_cache'
+render_cache_mb = 500 # Least recently used GIFs are deleted past this.
+
+# Timing per stage is always collected and summarised at the end of a run.
+log_level = 'INFO' # 'DEBUG' also prints each granule file and city label.
+track_memory = False # tracemalloc peak per stage (slows the band math down noticeably).
+trace_file = None # e.g. 'goes_trace.json', opens in chrome://tracing or ui.perfetto.dev
+metrics_file = None # e.g. 'goes.prom', Prometheus text format
+
 map_extents = {
     'Default': None, # The script will use the image's full bounds if None
     'CONUS': [-125, -65, 20, 50],
@@ -34,209 +109,515 @@ map_extents = {
 # ==============================================================================
 
 
-cities = {
-    'Des Moines': (41.5868, -93.6250),
-    'Dubuque': (42.5006, -90.6646),
-    'Nashville': (36.1627, -86.7816),
-    'Memphis': (35.1495, -90.0490),
-    'Tyler': (32.3513, -95.3011),
-    'LaFayette': (40.4173, -86.8756),
-    'Evansville': (37.9716, -87.5714),
-    'San Angelo': (31.4638577, -100.4371246),
-    'Oklahoma City': (35.4676, -97.5164),
-    'Pensacola': (30.4213, -87.2169),
-    'Atlanta': (33.7490, -84.3880),
-    'Lansing': (42.7325, -84.5555),
-    'Topeka': (39.0489, -95.6780),
-    'Grand Island': (40.9254, -98.3420),
-    'Guymon': (36.6822, -101.4715),
-    'Denver': (39.7392, -104.9903),
-    'Miami': (25.7617526,-80.1918927),
-    'Raleigh': (35.7795428,-78.638397),
-    'Washington, DC': (38.9072951,-77.0365428),
-    'Boston': (42.3554245,-71.0567769),
-    'Buffalo': (42.8869941,-78.8787977),
-    'Tuscon': (32.2539746,-110.9739495),
-    'Salt Lake City': (40.7605382,-111.8881457),
-    'Sacramento': (38.5775151,-121.4949946),
-    'Seattle': (47.6061026,-122.3327523),
-    'Bismarck': (46.8042451,-100.7878722),
-    'Helena': (46.5891452,-112.0391074),
-    'International Falls': (48.6009953,-93.4032997),
-    'Hamilton': (32.2950673,-64.7842878),
-    'San Juan': (18.4153045,-66.0593645),
-    'Cancún': (21.1619013,-86.8516573),
-    'Halifax': (44.6508439,-63.5922432),
-    'Havana': (23.1338081,-82.3583889),
-    'George Town': (23.502425980984587,-75.77004984566923),
-    'Mexico City': (19.4328091,-99.1332262),
-    'Monterrey': (25.6864203,-100.3168008),
-    'Houston': (29.7601852,-95.3719349),
-    'Elko': (40.8435794,-115.7527039),
-    'Salem': (44.9362053,-123.0405318),
-    'Twin Falls': (42.5558403,-114.4701733),
-    'Bar Harbor': (44.3875484,-68.2042762),
-    'Santa Fe': (35.6894456,-105.9381952)
-    }
+# Labelled on every frame (the ones inside the map). The list lives in
+# goes_products.py so other scripts can use it too; add your own here with
+# cities['Name'] = (lat, lon).
+cities = dict(CITIES)
 
-# Create GOES object
-print(f"Setting up GOES-{satellite} data retrieval...")
-G = GOES(satellite=satellite, product=product)
+match_window = timedelta(hours=1) # Same window G.nearesttime() uses by default.
+frame_duration = 100 # Milliseconds each target time is shown for in the GIF.
+frame_pixels = (figure_size[0] * frame_dpi, figure_size[1] * frame_dpi)
 
-start_time = datetime(2025, 12, 1, 12, 00) # 12/01/2025 12 UTC
-end_time = datetime(2025, 12, 2, 12, 30) # 12/02/2025 12:30 UTC
-interval_minutes = 60 # 60 Minute Image Intervals.
+log = logging.getLogger('GoesGIFCompiler')
+metrics = Instrumentation('GoesGIFCompiler')
 
-# Generate list of times
-time_list = []
-current_time = start_time
-while current_time <= end_time:
-    time_list.append(current_time)
-    current_time += timedelta(minutes=interval_minutes)
-
-print(f"Downloading data at {interval_minutes}-minute intervals...")
-print(f"Total frames to create: {len(time_list)}")
-
-os.makedirs('temp_frames', exist_ok=True)
-
-plot_extent = None
-
-frame_files = []
-for idx, target_time in enumerate(time_list):
-    print(f"Processing frame {idx + 1}/{len(time_list)}: {target_time}")
-    
-    try:
-        # Load the dataset nearest to the target time
-        ds = G.nearesttime(target_time)
-        
-        # Get the actual timestamp from the data
-        actual_time = datetime.strptime(str(ds.time_coverage_start.values), '%Y-%m-%dT%H:%M:%S.%fZ')
-        
-        # Format the timestamp in GOES style
-        day_of_year = actual_time.timetuple().tm_yday
-        year_day = f"{actual_time.year}{day_of_year:03d}"
-        timestamp_str = f"GOES-{satellite}  BAND=2 (0.64 UM) (VIS)  {actual_time.strftime('%d-%b-%Y').upper()} ({year_day})"
-        time_only = actual_time.strftime('%H:%M UTC')
-        
-        # Create figure and axis with proper projection
-        fig = plt.figure(figsize=(12, 9))
-        ax = plt.subplot(projection=ds.rgb.crs)
-        
-        # ----------------------------------------------------------------------
-        # ➡️ Interpolation and TypeError Fix
-        # Remove the default 'interpolation' key to avoid the TypeError
-        ds.rgb.imshow_kwargs.pop('interpolation', None)
-        # Plot with the specified interpolation_type
-        ax.imshow(ds.rgb.TrueColor(), **ds.rgb.imshow_kwargs, interpolation=interpolation_type)
-        # ----------------------------------------------------------------------
-        
-        # ----------------------------------------------------------------------
-        # ➡️ Dynamic Map Extent Setting
-        custom_extent = map_extents.get(map_region)
-        
-        if custom_extent is not None:
-            # Use the custom preset bounds with PlateCarree CRS
-            ax.set_extent(custom_extent, crs=ccrs.PlateCarree())
-            if idx == 0:
-                print(f"Plot extent set to: {map_region} {custom_extent}")
-        else:
-            # If 'Default' is used, set the extent based on the full image bounds
-            if plot_extent is None:
-                plot_extent = ds.rgb.imshow_kwargs['extent']
-                if idx == 0:
-                    print("Plot extent set to: Default (Full Image Bounds)")
-            ax.set_extent(plot_extent, crs=ds.rgb.crs)
-        # ----------------------------------------------------------------------
-
-        # Add map features
-        ax.coastlines(resolution='50m', color='cyan', linewidth=0.5)
-        ax.add_feature(cfeature.BORDERS, linewidth=0.5, edgecolor='cyan')
-        ax.add_feature(cfeature.STATES, linewidth=0.3, edgecolor='cyan')
-        
-        # ----------------------------------------------------------------------
-        # ➡️ NEW: Filter Cities to Plot ONLY those within the current map extent
-        # ----------------------------------------------------------------------
-        visible_cities = {}
-        
-        # Use the custom extent if set, otherwise the default plot extent
-        if custom_extent is not None:
-            lon_min, lon_max, lat_min, lat_max = custom_extent
-            
-            for city, (lat, lon) in cities.items():
-                # Check if city coordinates are within the defined bounds
-                if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max:
-                    visible_cities[city] = (lat, lon)
+
+def resolve_granules(G, time_list):
+    """
+    Resolve target times to unique granules BEFORE downloading anything.
+
+    When interval_minutes is shorter than the product cadence (or the archive has
+    gaps) several target times land on the same scan. Each scan is downloaded and
+    rendered once; repeats just hold that frame longer in the GIF.
+    Returns a list of [granule_start, number_of_target_times].
+    """
+    granule_list = G.timerange(
+        start=time_list[0] - match_window,
+        end=time_list[-1] + match_window,
+        return_as='filelist',
+        download=False,
+    )
+
+    # Sorted, de-duplicated scan start times (Mesoscale sectors list M1/M2 together).
+    granule_starts = granule_list.drop_duplicates('start').sort_values('start')['start'].reset_index(drop=True)
+
+    granules = []
+    if granule_starts.empty:
+        return granules
+
+    for target_time in time_list:
+        nearest = granule_starts.iloc[(granule_starts - target_time).abs().argmin()]
+        if abs(nearest - target_time) > match_window:
+            print(f"No granule within {match_window} of {target_time}, skipping.")
+            continue
+        if granules and granules[-1][0] == nearest:
+            granules[-1][1] += 1
         else:
-            # If default view, plot all cities
-            visible_cities = cities
-
-        # Plot city markers (red dots)
-        lats = [coords[0] for coords in visible_cities.values()]
-        lons = [coords[1] for coords in visible_cities.values()]
-        ax.plot(lons, lats, 'ro', markersize=4, transform=ccrs.PlateCarree())
-        
-        # Plot city labels
-        for city, (lat, lon) in visible_cities.items():
-            ax.text(lon + 0.1, lat, city,
-                    transform=ccrs.PlateCarree(),
-                    fontsize=9,
-                    color='white',
-                    weight='bold',
-                    ha='left',
-                    va='center',
-                    fontname='Courier New',
-                    bbox=dict(boxstyle='round,pad=0.1', facecolor='black', alpha=0.4, edgecolor='none'))
-        
-        ax.text(0.5, 0.02, f"{timestamp_str}  {time_only}",
-                transform=ax.transAxes,
-                fontsize=12,
-                fontname='Courier New',
-                horizontalalignment='center',
-                verticalalignment='bottom',
+            granules.append([nearest, 1])
+    return granules
+
+
+def style_hash(product_name):
+    """
+    Short hash of every setting that changes how a product frame looks, so
+    stored frames are never reused after the style changes.
+    """
+    style = {
+        'satellite': satellite,
+        'product': product,
+        'product_name': product_name,
+        'extent': map_extents.get(map_region),
+        'interpolation': interpolation_type,
+        'render_mode': render_mode,
+        'lazy_loading': lazy_loading,
+        'frame_pixels': frame_pixels,
+        'downsample': downsample,
+        'cities': cities,
+    }
+    return hashlib.sha1(json.dumps(style, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+
+
+def stored_frame_path(product_name, granule_start):
+    """Where the rolling loop keeps a product frame for one granule."""
+    return os.path.join(frame_store, f"{product_name}_{style_hash(product_name)}",
+                        f"{granule_start:%Y%m%d_%H%M%S}.png")
+
+
+def evict_stored_frames(oldest):
+    """Delete stored frames for granules before oldest, and any folders left empty."""
+    if not os.path.isdir(frame_store):
+        return 0
+    evicted = 0
+    for folder in os.listdir(frame_store):
+        folder_path = os.path.join(frame_store, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for name in os.listdir(folder_path):
+            try:
+                granule_start = datetime.strptime(name, '%Y%m%d_%H%M%S.png')
+            except ValueError:
+                continue
+            if granule_start < oldest:
+                os.remove(os.path.join(folder_path, name))
+                evicted += 1
+        if not os.listdir(folder_path):
+            os.rmdir(folder_path)
+    return evicted
+
+
+def product_output_file(product_name):
+    """output_file, with the product name added when there is more than one product."""
+    if len(products) == 1:
+        return output_file
+    base, extension = os.path.splitext(output_file)
+    return f"{base}_{product_name}{extension}"
+
+
+def gif_cache_key(product_name, granules):
+    """Render cache key of a product's GIF over granules ([granule_start, repeats], ...)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    return cache_key(
+        style=style_hash(product_name),
+        granules=[(granule_start, repeat_count) for granule_start, repeat_count in granules],
+        frame_duration=frame_duration,
+        code=code_version(here, os.path.join(here, '..', 'UTILITIES')),
+    )
+
+
+def frame_timestamp(actual_time, label):
+    """GOES style timestamp text for the bottom of the frame."""
+    day_of_year = actual_time.timetuple().tm_yday
+    year_day = f"{actual_time.year}{day_of_year:03d}"
+    timestamp_str = f"GOES-{satellite}  {label}  {actual_time.strftime('%d-%b-%Y').upper()} ({year_day})"
+    time_only = actual_time.strftime('%H:%M UTC')
+    return f"{timestamp_str}  {time_only}"
+
+
+def visible_cities_for(custom_extent):
+    """Only the cities inside the current map extent (all of them for 'Default')."""
+    if custom_extent is None:
+        return cities
+
+    lon_min, lon_max, lat_min, lat_max = custom_extent
+    return {city: (lat, lon) for city, (lat, lon) in cities.items()
+            if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max}
+
+
+def build_frame_figure(crs, image_extent, figsize=None):
+    """
+    Create the figure, GeoAxes, map features and static text for a frame.
+
+    Returns (fig, ax, time_text). The satellite image itself is not drawn here.
+    """
+    fig = plt.figure(figsize=figsize or figure_size)
+    ax = plt.subplot(projection=crs)
+
+    # ----------------------------------------------------------------------
+    # ➡️ Dynamic Map Extent Setting
+    custom_extent = map_extents.get(map_region)
+    if custom_extent is not None:
+        # Use the custom preset bounds with PlateCarree CRS
+        ax.set_extent(custom_extent, crs=ccrs.PlateCarree())
+    else:
+        # If 'Default' is used, set the extent based on the full image bounds
+        ax.set_extent(image_extent, crs=crs)
+    # ----------------------------------------------------------------------
+
+    # Add map features
+    ax.coastlines(resolution='50m', color='cyan', linewidth=0.5)
+    ax.add_feature(cfeature.BORDERS, linewidth=0.5, edgecolor='cyan')
+    ax.add_feature(cfeature.STATES, linewidth=0.3, edgecolor='cyan')
+
+    # Plot ONLY the cities within the current map extent
+    visible_cities = visible_cities_for(custom_extent)
+
+    # Plot city markers (red dots)
+    lats = [coords[0] for coords in visible_cities.values()]
+    lons = [coords[1] for coords in visible_cities.values()]
+    ax.plot(lons, lats, 'ro', markersize=4, transform=ccrs.PlateCarree())
+
+    # Plot city labels
+    metrics.count('labels_placed', len(visible_cities))
+    for city, (lat, lon) in visible_cities.items():
+        log.debug(f"PLOTTING: {city} at ({lon:.2f}, {lat:.2f})")
+        ax.text(lon + 0.1, lat, city,
+                transform=ccrs.PlateCarree(),
+                fontsize=9,
                 color='white',
                 weight='bold',
-                bbox=dict(boxstyle='square,pad=0.3', facecolor='black', alpha=0.9, edgecolor='white', linewidth=1))
-        
-        # Add watermark
-        ax.text(0.01, 0.02, '©2025 JesseLikesWeather',
-                transform=ax.transAxes,
-                fontsize=10,
-                color='white',
-                alpha=0.6,
-                va='bottom',
-                ha='left')
-        
-        frame_file = f'temp_frames/frame_{idx:03d}.png'
-        plt.savefig(frame_file, dpi=150, bbox_inches='tight', facecolor='black')
-        plt.close(fig)
-        frame_files.append(frame_file)
-        
-    except Exception as e:
-        print(f"Error processing frame {idx + 1}: {e}")
-        continue
-
-if frame_files:
-    print(f"\nCreating GIF from {len(frame_files)} frames...")
-    
-    frames = [Image.open(frame) for frame in frame_files]
-    
-    output_file = 'Hurricane_Dorian_2019.gif' # <- File Name.
-    frames[0].save(
-        output_file,
-        save_all=True,
-        append_images=frames[1:],
-        duration=100,
-        loop=0
-    )
-    
-    print(f"GIF saved as: {output_file}")
-    
-    # Clean up temporary frames
-    print("Cleaning up temporary files...")
-    for frame_file in frame_files:
-        os.remove(frame_file)
-    os.rmdir('temp_frames')
-    
-    print("Done!")
-else:
-    print("No frames were created. Check your data range and try again.")
+                ha='left',
+                va='center',
+                fontname='Courier New',
+                bbox=dict(boxstyle='round,pad=0.1', facecolor='black', alpha=0.4, edgecolor='none'))
+
+    time_text = ax.text(0.5, 0.02, '',
+                        transform=ax.transAxes,
+                        fontsize=12,
+                        fontname='Courier New',
+                        horizontalalignment='center',
+                        verticalalignment='bottom',
+                        color='white',
+                        weight='bold',
+                        bbox=dict(boxstyle='square,pad=0.3', facecolor='black', alpha=0.9, edgecolor='white', linewidth=1))
+
+    # Add watermark
+    ax.text(0.01, 0.02, '©2025 JesseLikesWeather',
+            transform=ax.transAxes,
+            fontsize=10,
+            color='white',
+            alpha=0.6,
+            va='bottom',
+            ha='left')
+
+    return fig, ax, time_text
+
+
+def draw_satellite_image(ax, crs, image_extent, rgb):
+    """Plot a product image with the chosen interpolation."""
+    return ax.imshow(rgb, extent=image_extent, transform=crs, origin='upper', interpolation=interpolation_type)
+
+
+def render_classic_frame(crs, image_extent, rgb, timestamp, frame_file):
+    """Build, draw and throw away a full figure for this frame."""
+    fig, ax, time_text = build_frame_figure(crs, image_extent)
+    draw_satellite_image(ax, crs, image_extent, rgb)
+    time_text.set_text(timestamp)
+
+    plt.savefig(frame_file, dpi=frame_dpi, bbox_inches='tight', facecolor='black')
+    plt.close(fig)
+
+
+class PersistentFrameRenderer:
+    """
+    Keep one figure alive for the whole loop.
+
+    The axes, map features and labels are built on the first frame. Later
+    frames only call set_data on the AxesImage and set_text on the timestamp
+    before drawing straight to the Agg canvas. With blit=True the static
+    layers are not even redrawn; see UTILITIES/blit_render.py.
+    """
+
+    def __init__(self, dpi=150, blit=False):
+        self.dpi = dpi
+        self.blit = blit
+        self.fig = None
+        self.crs = None
+        self.blitter = None
+
+    def _build(self, crs, image_extent, rgb):
+        if self.fig is not None:
+            plt.close(self.fig)
+
+        self.crs = crs
+        self.fig, self.ax, self.time_text = build_frame_figure(crs, image_extent)
+
+        # Fit the figure to the map so the output matches bbox_inches='tight'
+        # without measuring every artist on every frame.
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        width = self.fig.get_figwidth()
+        self.fig.set_size_inches(width, width * (y1 - y0) / (x1 - x0))
+        self.ax.set_position([0, 0, 1, 1])
+        self.fig.set_dpi(self.dpi)
+        self.fig.set_facecolor('black')
+        FigureCanvasAgg(self.fig)
+
+        self.image = draw_satellite_image(self.ax, crs, image_extent, rgb)
+        self.image_extent = list(image_extent)
+
+        if self.blit:
+            self.blitter = BlitRenderer(self.fig, [self.image, self.time_text])
+
+    def render(self, crs, image_extent, rgb, timestamp, frame_file):
+        # A different satellite or sector means a different projection.
+        if self.fig is None or crs != self.crs:
+            self._build(crs, image_extent, rgb)
+        else:
+            self.image.set_data(rgb)
+            if list(image_extent) != self.image_extent:
+                self.image.set_extent(image_extent)
+                self.image_extent = list(image_extent)
+
+        self.time_text.set_text(timestamp)
+
+        canvas = self.fig.canvas
+        if self.blitter is not None:
+            if blit_benchmark and self.blitter.background is None:
+                full_fps, blit_fps = self.blitter.benchmark()
+                print(f"Full redraw: {full_fps:.1f} frames/s, blit: {blit_fps:.1f} frames/s")
+            self.blitter.draw_frame()
+        else:
+            canvas.draw()
+        Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1) \
+            .convert('RGB').save(frame_file)
+
+    def close(self):
+        if self.fig is not None:
+            plt.close(self.fig)
+            self.fig = None
+
+
+def main():
+    # goes2go lists the AWS buckets when it is imported, so only pull it in
+    # when we actually download (the renderers above work offline).
+    from goes2go import GOES
+
+    configure_logging(log, log_level)
+    if track_memory:
+        metrics.track_memory()
+
+    # Create GOES object
+    print(f"Setting up GOES-{satellite} data retrieval...")
+    G = GOES(satellite=satellite, product=product)
+
+    # Generate list of times
+    loop_start, loop_end = start_time, end_time
+    if rolling_hours:
+        # Naive UTC, like start_time/end_time and goes2go's granule times
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        # Snap to the interval so every run asks for the same target times
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        step = timedelta(minutes=interval_minutes)
+        loop_end = midnight + (now - midnight) // step * step
+        loop_start = loop_end - timedelta(hours=rolling_hours)
+        print(f"Rolling loop: last {rolling_hours} hours ({loop_start} to {loop_end} UTC), frames in {frame_store}")
+
+    time_list = []
+    current_time = loop_start
+    while current_time <= loop_end:
+        time_list.append(current_time)
+        current_time += timedelta(minutes=interval_minutes)
+
+    print("Resolving target times to granules...")
+    with metrics.stage('resolve_granules'):
+        granules = resolve_granules(G, time_list)
+
+    duplicates_skipped = sum(count - 1 for _, count in granules)
+    print(f"Downloading data at {interval_minutes}-minute intervals...")
+    print(f"Total frames to create: {len(granules)} unique granules for {len(time_list)} target times")
+    if duplicates_skipped:
+        print(f"Skipping {duplicates_skipped} duplicate downloads/renders "
+              f"({duplicates_skipped / len(time_list):.0%} of target times)")
+
+    cache = None
+    if render_cache_dir and granules:
+        cache = RenderCache(render_cache_dir, render_cache_mb * 1024 * 1024, metrics=metrics)
+        gif_keys = {product_name: gif_cache_key(product_name, granules) for product_name in products}
+        with metrics.stage('render_cache'):
+            cached = all(cache.fetch(gif_keys[product_name], product_output_file(product_name))
+                         for product_name in products)
+        if cached:
+            for product_name in products:
+                print(f"GIF saved as: {product_output_file(product_name)} (from the render cache)")
+            print("Done!")
+            metrics.print_summary()
+            metrics.export(trace_file, metrics_file)
+            return
+
+    custom_extent = map_extents.get(map_region)
+    if custom_extent is not None:
+        print(f"Plot extent set to: {map_region} {custom_extent}")
+    else:
+        print("Plot extent set to: Default (Full Image Bounds)")
+    print(f"Render mode: {render_mode}, products: {', '.join(products)}")
+
+    if rolling_hours:
+        evicted = evict_stored_frames(loop_start - match_window)
+        if evicted:
+            print(f"Removed {evicted} stored frames older than the loop")
+        metrics.count('frames_evicted', evicted)
+
+    renderers = {}
+    frame_files = {}
+    for product_name in products:
+        if rolling_hours:
+            os.makedirs(os.path.dirname(stored_frame_path(product_name, loop_start)), exist_ok=True)
+        else:
+            os.makedirs(f'temp_frames/{product_name}', exist_ok=True)
+        if render_mode in ('persistent', 'blit'):
+            renderers[product_name] = PersistentFrameRenderer(dpi=frame_dpi, blit=render_mode == 'blit')
+        frame_files[product_name] = []
+    render_start = time.perf_counter()
+
+    frame_durations = []
+    frame_errors = 0
+    band_loads = 0
+    band_requests = 0
+    frames_reused = 0
+    for idx, (granule_start, repeat_count) in enumerate(granules):
+        if rolling_hours:
+            stored = [stored_frame_path(product_name, granule_start) for product_name in products]
+            if all(os.path.exists(frame_file) for frame_file in stored):
+                log.debug(f"Reusing stored frame for {granule_start}")
+                for product_name, frame_file in zip(products, stored):
+                    frame_files[product_name].append(frame_file)
+                frame_durations.append(frame_duration * repeat_count)
+                frames_reused += 1
+                continue
+
+        print(f"Processing frame {idx + 1}/{len(granules)}: {granule_start}")
+
+        ds = None
+        try:
+            # Load the granule itself (it is the nearest scan to its own start time)
+            if lazy_loading:
+                with metrics.stage('download'):
+                    files = G.nearesttime(granule_start, within=timedelta(minutes=1),
+                                          return_as='filelist', download=True)
+                granule_file = os.path.join(files.attrs['filePath'], files.file.iloc[0])
+                metrics.count('bytes_downloaded', os.path.getsize(granule_file))
+                log.debug(f"Granule file: {granule_file}")
+                with metrics.stage('open'):
+                    ds = open_granule(granule_file, chunk_size)
+                if downsample and pyramid_store:
+                    with metrics.stage('pyramid'):
+                        ds = pyramid_granule(ds, granule_file, pyramid_store, custom_extent, frame_pixels,
+                                             chunk_size)
+                bands = BandCache(ds, prepare=window_prepare(ds, custom_extent, frame_pixels if downsample else None))
+            else:
+                with metrics.stage('download'):
+                    ds = G.nearesttime(granule_start, within=timedelta(minutes=1))
+                bands = BandCache(ds, prepare=window_prepare(ds, custom_extent, frame_pixels) if downsample else None)
+
+            # Every product pulls its bands from the same cache
+            with metrics.stage('products', products=','.join(products)):
+                images = render_products(bands, products, num_workers=dask_threads)
+            if idx == 0 and lazy_loading:
+                print(f"Reading {bands.x.size}x{bands.y.size} pixels per band "
+                      f"out of {ds.x.size}x{ds.y.size} ({chunk_size}px chunks, {dask_threads} threads)")
+            band_loads += bands.loads
+            band_requests += bands.requests
+            metrics.count('band_pixels_read', bands.loads * bands.x.size * bands.y.size)
+
+            crs = granule_crs(ds)
+            image_extent = bands.extent()
+            for product_name, rgb in images.items():
+                timestamp = frame_timestamp(bands.scan_time(), PRODUCTS[product_name]['label'])
+                if rolling_hours:
+                    frame_file = stored_frame_path(product_name, granule_start)
+                else:
+                    frame_file = f'temp_frames/{product_name}/frame_{idx:03d}.png'
+                with metrics.stage('render', product=product_name, mode=render_mode):
+                    if product_name in renderers:
+                        renderers[product_name].render(crs, image_extent, rgb, timestamp, frame_file)
+                    else:
+                        render_classic_frame(crs, image_extent, rgb, timestamp, frame_file)
+                frame_files[product_name].append(frame_file)
+                metrics.count('frames_rendered')
+            frame_durations.append(frame_duration * repeat_count)
+
+        except Exception as e:
+            print(f"Error processing frame {idx + 1}: {e}")
+            frame_errors += 1
+            # Keep every product's frame list in step with frame_durations, and
+            # delete the frames other products already wrote for this granule
+            for product_name in products:
+                for frame_file in frame_files[product_name][len(frame_durations):]:
+                    os.remove(frame_file)
+                del frame_files[product_name][len(frame_durations):]
+            continue
+        finally:
+            if ds is not None:
+                ds.close()
+
+    for renderer in renderers.values():
+        renderer.close()
+
+    frames_rendered = len(frame_durations) - frames_reused
+    if rolling_hours:
+        metrics.count('frames_reused', frames_reused)
+        print(f"Reused {frames_reused} stored frames, rendered {frames_rendered} new ones")
+    if frame_durations:
+        elapsed = time.perf_counter() - render_start
+        print(f"Downloaded and rendered {frames_rendered} timesteps x {len(products)} products in {elapsed:.1f}s "
+              f"({frames_rendered * len(products) / elapsed:.2f} frames/s)")
+        print(f"Loaded {band_loads} bands for {band_requests} band uses "
+              f"({band_requests - band_loads} loads shared between products)")
+
+        for product_name in products:
+            product_file = product_output_file(product_name)
+
+            print(f"\nCreating GIF from {len(frame_durations)} {product_name} frames...")
+
+            with metrics.stage('gif', product=product_name):
+                frames = [Image.open(frame) for frame in frame_files[product_name]]
+                try:
+                    frames[0].save(
+                        product_file,
+                        save_all=True,
+                        append_images=frames[1:],
+                        duration=frame_durations,
+                        loop=0
+                    )
+                finally:
+                    for frame in frames:
+                        frame.close()
+            metrics.count('gif_bytes', os.path.getsize(product_file))
+            # A GIF missing frames isn't kept, so the next run tries them again
+            if cache is not None and not frame_errors:
+                cache.store(gif_keys[product_name], product_file)
+
+            print(f"GIF saved as: {product_file}")
+
+        print(f"Rendered {frames_rendered} unique frames for {len(time_list)} target times "
+              f"({duplicates_skipped} duplicate renders avoided)")
+
+        # Clean up temporary frames (the rolling loop keeps them for next time)
+        if not rolling_hours:
+            print("Cleaning up temporary files...")
+            for product_name in products:
+                for frame_file in frame_files[product_name]:
+                    os.remove(frame_file)
+                os.rmdir(f'temp_frames/{product_name}')
+            os.rmdir('temp_frames')
+
+        print("Done!")
+    else:
+        print("No frames were created. Check your data range and try again.")
+
+    metrics.print_summary()
+    metrics.export(trace_file, metrics_file)
+
+
+if __name__ == '__main__':
+    main()
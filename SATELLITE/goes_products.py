@@ -0,0 +1,367 @@
+"""
+©2025 JesseLikesWeather.
+
+Several products from one ABI download.
+
+goes2go's 'ABI' product (ABI-L2-MCMIP) already carries all 16 bands in one
+file, so TrueColor, clean IR, water vapor and the day/night blend can all be
+built from the same granule. BandCache loads each band at most once per
+timestep and every product recipe below pulls from it.
+
+Granules can also be opened lazily (open_granule): bands stay dask arrays,
+window_prepare crops them to the map and block-averages them down to the output
+size, and the RGB math for every product is computed together chunk by chunk.
+"""
+
+from datetime import datetime
+import os
+
+import numpy as np
+import xarray as xr
+import cartopy.crs as ccrs
+
+# (lat, lon) of the cities labelled on the GOES maps (GoesGIFCompiler.py)
+CITIES = {
+    'Des Moines': (41.5868, -93.6250),
+    'Dubuque': (42.5006, -90.6646),
+    'Nashville': (36.1627, -86.7816),
+    'Memphis': (35.1495, -90.0490),
+    'Tyler': (32.3513, -95.3011),
+    'LaFayette': (40.4173, -86.8756),
+    'Evansville': (37.9716, -87.5714),
+    'San Angelo': (31.4638577, -100.4371246),
+    'Oklahoma City': (35.4676, -97.5164),
+    'Pensacola': (30.4213, -87.2169),
+    'Atlanta': (33.7490, -84.3880),
+    'Lansing': (42.7325, -84.5555),
+    'Topeka': (39.0489, -95.6780),
+    'Grand Island': (40.9254, -98.3420),
+    'Guymon': (36.6822, -101.4715),
+    'Denver': (39.7392, -104.9903),
+    'Miami': (25.7617526,-80.1918927),
+    'Raleigh': (35.7795428,-78.638397),
+    'Washington, DC': (38.9072951,-77.0365428),
+    'Boston': (42.3554245,-71.0567769),
+    'Buffalo': (42.8869941,-78.8787977),
+    'Tuscon': (32.2539746,-110.9739495),
+    'Salt Lake City': (40.7605382,-111.8881457),
+    'Sacramento': (38.5775151,-121.4949946),
+    'Seattle': (47.6061026,-122.3327523),
+    'Bismarck': (46.8042451,-100.7878722),
+    'Helena': (46.5891452,-112.0391074),
+    'International Falls': (48.6009953,-93.4032997),
+    'Hamilton': (32.2950673,-64.7842878),
+    'San Juan': (18.4153045,-66.0593645),
+    'Cancún': (21.1619013,-86.8516573),
+    'Halifax': (44.6508439,-63.5922432),
+    'Havana': (23.1338081,-82.3583889),
+    'George Town': (23.502425980984587,-75.77004984566923),
+    'Mexico City': (19.4328091,-99.1332262),
+    'Monterrey': (25.6864203,-100.3168008),
+    'Houston': (29.7601852,-95.3719349),
+    'Elko': (40.8435794,-115.7527039),
+    'Salem': (44.9362053,-123.0405318),
+    'Twin Falls': (42.5558403,-114.4701733),
+    'Bar Harbor': (44.3875484,-68.2042762),
+    'Santa Fe': (35.6894456,-105.9381952)
+}
+
+
+def granule_crs(ds):
+    """
+    Cartopy Geostationary crs of an ABI granule (same as goes2go's ds.rgb.crs),
+    built from the file's own projection variables.
+    """
+    projection = ds.goes_imager_projection
+    globe = ccrs.Globe(ellipse=None,
+                       semimajor_axis=projection.semi_major_axis,
+                       semiminor_axis=projection.semi_minor_axis,
+                       inverse_flattening=projection.inverse_flattening)
+    return ccrs.Geostationary(central_longitude=projection.longitude_of_projection_origin,
+                              satellite_height=projection.perspective_point_height,
+                              sweep_axis=projection.sweep_angle_axis,
+                              globe=globe)
+
+
+class BandCache:
+    """
+    Load each ABI band of one granule at most once.
+
+    prepare is applied to the band's DataArray before it is pulled into
+    memory (subsetting/downsampling hooks go there), so it also runs once.
+    """
+
+    def __init__(self, ds, prepare=None):
+        self.ds = ds
+        self.prepare = prepare
+        self.bands = {}
+        self.loads = 0
+        self.requests = 0
+        self.x = None
+        self.y = None
+
+    def __getitem__(self, band):
+        self.requests += 1
+        if band not in self.bands:
+            data = self.ds[f'CMI_C{band:02d}']
+            if self.prepare is not None:
+                data = self.prepare(data)
+            if data.chunks is not None:
+                # Stays lazy, render_products() computes it with the products
+                self.bands[band] = data.data.astype(np.float32)
+            else:
+                self.bands[band] = np.asarray(data.values, dtype=np.float32)
+            self.loads += 1
+            if self.x is None:
+                # Pixel centres in crs units (m), after any subsetting.
+                sat_h = self.ds.goes_imager_projection.perspective_point_height
+                self.x = data.x.values * sat_h
+                self.y = data.y.values * sat_h
+        return self.bands[band]
+
+    def extent(self):
+        """imshow extent [x0, x1, y0, y1] in crs units for the loaded grid."""
+        if self.x is None:
+            self[13]
+        return [self.x.min(), self.x.max(), self.y.min(), self.y.max()]
+
+    def scan_time(self):
+        return datetime.strptime(str(self.ds.time_coverage_start.values), '%Y-%m-%dT%H:%M:%S.%fZ')
+
+    def latlon(self):
+        """Pixel latitudes/longitudes, shared between granules on the same grid."""
+        if self.x is None:
+            self[13]
+        x, y = self.x, self.y
+
+        crs = granule_crs(self.ds)
+        key = (crs.proj4_init, x.size, y.size, float(x[0]), float(y[0]))
+        if key not in _latlon_cache:
+            X, Y = np.meshgrid(x, y)
+            points = ccrs.PlateCarree().transform_points(crs, X, Y)
+            _latlon_cache.clear()
+            _latlon_cache[key] = (points[..., 1].astype(np.float32), points[..., 0].astype(np.float32))
+        return _latlon_cache[key]
+
+
+_latlon_cache = {}
+
+
+# ==============================================================================
+# Lazy loading. Only the chunks inside the map are ever read.
+# ==============================================================================
+
+def open_granule(path, chunk_size=1024):
+    """Open a downloaded ABI file with dask-backed bands. Nothing is read yet."""
+    ds = xr.open_dataset(path)
+    chunks = {'x': chunk_size, 'y': chunk_size}
+
+    # Round to whole multiples of the chunks stored in the file so no stored
+    # chunk is decompressed twice.
+    band = next((ds[name] for name in ds.data_vars if name.startswith('CMI_C')), None)
+    stored = band.encoding.get('chunksizes') if band is not None else None
+    if stored:
+        for dim, size in zip(band.dims, stored):
+            if dim in chunks:
+                chunks[dim] = max(1, round(chunk_size / size)) * size
+    ds = ds.chunk(chunks)
+
+    # Same attribute -> coordinate moves goes2go makes when it loads a file
+    for name in ('dataset_name', 'date_created', 'time_coverage_start', 'time_coverage_end'):
+        if name in ds.attrs:
+            ds.coords[name] = ds.attrs.pop(name)
+    return ds
+
+
+def map_window(ds, map_extent=None, output_size=None):
+    """
+    (columns, rows, factor) for a granule: the x/y slices covering map_extent
+    ([lon0, lon1, lat0, lat1]) and the power-of-two block-average factor that
+    still leaves at least output_size (width, height) pixels across them.
+    """
+    x = ds.x.values
+    y = ds.y.values
+    columns = slice(None)
+    rows = slice(None)
+
+    if map_extent is not None:
+        lon0, lon1, lat0, lat1 = map_extent
+        edge = np.linspace(0, 1, 50)
+        lons = np.concatenate([lon0 + (lon1 - lon0) * edge, np.full(50, lon1),
+                               lon1 - (lon1 - lon0) * edge, np.full(50, lon0)])
+        lats = np.concatenate([np.full(50, lat0), lat0 + (lat1 - lat0) * edge,
+                               np.full(50, lat1), lat1 - (lat1 - lat0) * edge])
+
+        # Map outline in scan angles. Points past the limb come back as inf.
+        sat_h = ds.goes_imager_projection.perspective_point_height
+        points = granule_crs(ds).transform_points(ccrs.PlateCarree(), lons, lats) / sat_h
+        inside = np.isfinite(points[:, 0]) & np.isfinite(points[:, 1])
+        if inside.any():
+            pad = 2 * abs(x[1] - x[0])
+            px, py = points[inside, 0], points[inside, 1]
+            x_index = np.nonzero((x >= px.min() - pad) & (x <= px.max() + pad))[0]
+            y_index = np.nonzero((y >= py.min() - pad) & (y <= py.max() + pad))[0]
+            if x_index.size and y_index.size:
+                columns = slice(x_index[0], x_index[-1] + 1)
+                rows = slice(y_index[0], y_index[-1] + 1)
+
+    factor = 1
+    if output_size is not None:
+        width = len(range(x.size)[columns])
+        height = len(range(y.size)[rows])
+        largest = max(1, min(width // output_size[0], height // output_size[1]))
+        # Powers of two, so a stored pyramid level can stand in for the raw granule
+        factor = 2 ** int(np.log2(largest))
+    return columns, rows, factor
+
+
+def window_prepare(ds, map_extent=None, output_size=None):
+    """
+    BandCache prepare hook: crop each band to map_extent ([lon0, lon1, lat0, lat1])
+    and block-average it down to no less than output_size (width, height) pixels.
+    """
+    columns, rows, factor = map_window(ds, map_extent, output_size)
+
+    def prepare(data):
+        data = data.isel(x=columns, y=rows)
+        if factor > 1:
+            data = data.coarsen(x=factor, y=factor, boundary='trim').mean()
+        return data
+
+    return prepare
+
+
+# ==============================================================================
+# Stored pyramid levels. A granule block-averaged by 2, 4, 8... is saved next
+# to the download, so later runs (other regions, products or styles, the
+# rolling loop) read a file a fraction of the size instead of the raw granule.
+# ==============================================================================
+
+def pyramid_path(store, granule_file, level):
+    name = os.path.splitext(os.path.basename(granule_file))[0]
+    return os.path.join(store, f"{name}_L{level}.nc")
+
+
+def pyramid_granule(ds, granule_file, store, map_extent=None, output_size=None, chunk_size=1024):
+    """
+    The coarsest stored pyramid level of the granule that is still fine
+    enough for map_extent at output_size, building and saving it first if
+    needed. Returns ds itself when full resolution is needed.
+    """
+    _, _, factor = map_window(ds, map_extent, output_size)
+    level = int(np.log2(factor))
+    if level == 0:
+        return ds
+
+    path = pyramid_path(store, granule_file, level)
+    if not os.path.exists(path):
+        os.makedirs(store, exist_ok=True)
+        bands = [name for name in ds.data_vars if name.startswith('CMI_C')]
+        level_ds = ds[bands].coarsen(x=factor, y=factor, boundary='trim').mean().astype(np.float32)
+        level_ds['goes_imager_projection'] = ds.goes_imager_projection
+        level_ds.attrs['pyramid_factor'] = factor
+        # Coordinates are packed int16 in the raw file; the averaged ones are not
+        for variable in level_ds.variables.values():
+            variable.encoding = {}
+        encoding = {name: {'zlib': True, 'complevel': 4} for name in bands}
+        # Write then rename, so an interrupted run never leaves half a level behind
+        level_ds.to_netcdf(path + '.tmp', encoding=encoding, format='NETCDF4')
+        os.replace(path + '.tmp', path)
+
+    ds.close()
+    return open_granule(path, chunk_size)
+
+
+def normalize(value, lower_limit, upper_limit):
+    return np.clip((value - lower_limit) / (upper_limit - lower_limit), 0, 1)
+
+
+def solar_zenith(lat, lon, when):
+    """Solar zenith angle in degrees (NOAA general solar position equations)."""
+    day_of_year = when.timetuple().tm_yday
+    hour = when.hour + when.minute / 60 + when.second / 3600
+    g = 2 * np.pi / 365 * (day_of_year - 1 + (hour - 12) / 24)
+
+    declination = (0.006918 - 0.399912 * np.cos(g) + 0.070257 * np.sin(g)
+                   - 0.006758 * np.cos(2 * g) + 0.000907 * np.sin(2 * g)
+                   - 0.002697 * np.cos(3 * g) + 0.00148 * np.sin(3 * g))
+    equation_of_time = 229.18 * (0.000075 + 0.001868 * np.cos(g) - 0.032077 * np.sin(g)
+                                 - 0.014615 * np.cos(2 * g) - 0.040849 * np.sin(2 * g))
+
+    true_solar_minutes = hour * 60 + equation_of_time + 4 * lon
+    hour_angle = np.radians(true_solar_minutes / 4 - 180)
+
+    lat = np.radians(lat)
+    cos_zenith = (np.sin(lat) * np.sin(declination)
+                  + np.cos(lat) * np.cos(declination) * np.cos(hour_angle))
+    return np.degrees(np.arccos(np.clip(cos_zenith, -1, 1)))
+
+
+# ==============================================================================
+# Product recipes. Each takes a BandCache and returns an (y, x, 3) RGB array.
+# ==============================================================================
+
+def true_color(bands, night_IR=True, gamma=2.2):
+    """Same recipe as goes2go's TrueColor (pseudo green, clean IR at night)."""
+    R = np.power(np.clip(bands[2], 0, 1), 1 / gamma)
+    G = np.power(np.clip(bands[3], 0, 1), 1 / gamma)
+    B = np.power(np.clip(bands[1], 0, 1), 1 / gamma)
+
+    # Calculate the "True" Green
+    G = np.clip(0.45 * R + 0.1 * G + 0.45 * B, 0, 1)
+
+    if night_IR:
+        # Cold clouds show up white at night, dimmed a bit to sit under daylight
+        IR = (1 - normalize(bands[13], 90, 313)) / 1.4
+        return np.dstack([np.maximum(R, IR), np.maximum(G, IR), np.maximum(B, IR)])
+    return np.dstack([R, G, B])
+
+
+def clean_ir(bands):
+    """Band 13 brightness temperature, cold cloud tops bright."""
+    IR = 1 - normalize(bands[13], 183, 313)
+    return np.dstack([IR, IR, IR])
+
+
+def water_vapor(bands):
+    """Simple Water Vapor RGB (bands 13/8/10, CIRA quick guide limits in Kelvin)."""
+    R = 1 - normalize(bands[13], 202.29, 278.96)
+    G = 1 - normalize(bands[8], 214.66, 242.67)
+    B = 1 - normalize(bands[10], 245.12, 261.03)
+    return np.dstack([R, G, B])
+
+
+def day_night_blend(bands, twilight=(80, 90)):
+    """TrueColor where the sun is up, clean IR at night, blended through twilight."""
+    lat, lon = bands.latlon()
+    zenith = solar_zenith(lat, lon, bands.scan_time())
+    day_weight = 1 - normalize(np.nan_to_num(zenith, nan=180), *twilight).astype(np.float32)
+    day_weight = day_weight[..., np.newaxis]
+    return true_color(bands, night_IR=False) * day_weight + clean_ir(bands) * (1 - day_weight)
+
+
+PRODUCTS = {
+    'TrueColor': {'recipe': true_color, 'label': 'BAND=2 (0.64 UM) (VIS)'},
+    'CleanIR': {'recipe': clean_ir, 'label': 'BAND=13 (10.3 UM) (CLEAN IR)'},
+    'WaterVapor': {'recipe': water_vapor, 'label': 'BANDS=8/10/13 (WATER VAPOR)'},
+    'DayNight': {'recipe': day_night_blend, 'label': 'BANDS=1/2/3/13 (DAY/NIGHT)'},
+}
+
+
+def render_products(bands, products, num_workers=None):
+    """
+    Build every requested product from one BandCache. Returns {name: rgb}.
+
+    Lazy products are computed in one pass so bands they share are read once,
+    with at most num_workers chunks in flight.
+    """
+    results = {}
+    for name in products:
+        results[name] = PRODUCTS[name]['recipe'](bands)
+
+    lazy = [name for name, rgb in results.items() if hasattr(rgb, 'dask')]
+    if lazy:
+        import dask
+        computed = dask.compute(*[results[name] for name in lazy], scheduler='threads', num_workers=num_workers)
+        results.update(zip(lazy, computed))
+    return results
@@ -0,0 +1,185 @@
+"""
+©2025 JesseLikesWeather.
+
+Blit-style redraw for loops that reuse one figure.
+
+Everything that never changes between frames (basemap, roads, counties,
+coastlines, banners, colorbars, labels) is drawn ONCE. The part of it that sits
+underneath the dynamic layers is cached as an Agg background with
+copy_from_bbox, and the part that sits on top of them (city labels over the
+radar, coastlines over the satellite image, ...) is cached as transparent
+overlay bands. Each frame restores the background, draws only the dynamic
+artists and pastes the overlay bands back on top, so stacking order matches a
+full redraw.
+"""
+
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+class BlitRenderer:
+    """
+    Redraw only the dynamic artists of a figure.
+
+    dynamic_artists are the layers that change between frames (radar or
+    satellite raster, warning polygons, time text). Call set_dynamic() when
+    those artists are replaced and invalidate() when anything static changes
+    (extent, figure size, labels).
+    """
+
+    def __init__(self, fig, dynamic_artists=()):
+        self.fig = fig
+        if isinstance(fig.canvas, FigureCanvasAgg):
+            self.canvas = fig.canvas
+        else:
+            self.canvas = FigureCanvasAgg(fig)
+        self.dynamic = []
+        self.set_dynamic(dynamic_artists)
+
+    def set_dynamic(self, artists, keep_background=False):
+        """
+        Replace the dynamic artists.
+
+        With keep_background=True the cached layers are reused as long as every
+        new artist lands in an existing (axes, zorder) slot, e.g. a new radar
+        mesh or a different number of warning polygons.
+        """
+        for artist in self.dynamic:
+            artist.set_animated(False)
+        self.dynamic = [artist for artist in artists if artist is not None]
+        for artist in self.dynamic:
+            artist.set_animated(True)
+
+        if not keep_background or self.layers is None:
+            self.invalidate()
+            return
+
+        slots = {}
+        for slot, dynamic, _ in self.layers:
+            dynamic.clear()
+            slots[slot] = dynamic
+        for artist in self.dynamic:
+            dynamic = slots.get((artist.axes, artist.get_zorder()))
+            if dynamic is None:
+                self.invalidate()
+                return
+            dynamic.append(artist)
+
+    def invalidate(self):
+        self.background = None
+        self.layers = None
+
+    def _static_layers(self):
+        """
+        Group dynamic artists with the static artists drawn right above them.
+
+        Returns [((axes, zorder), dynamic_artists, overlay_artists), ...] in
+        drawing order. Only static artists in the same axes as a dynamic artist
+        and with a higher zorder need to go on top, plus any later axes that
+        overlap a dynamic one (e.g. a colorbar inset on the map). Everything
+        else is background.
+        """
+        layers = []
+        dynamic_boxes = []
+        for ax in sorted(self.fig.axes, key=lambda a: a.get_zorder()):
+            dynamic = sorted((a for a in self.dynamic if a.axes is ax), key=lambda a: a.get_zorder())
+            if not dynamic:
+                box = ax.get_position()
+                if layers and ax.get_visible() and any(box.overlaps(other) for other in dynamic_boxes):
+                    layers[-1][2].append(ax)
+                continue
+            dynamic_boxes.append(ax.get_position())
+
+            zorders = sorted({a.get_zorder() for a in dynamic})
+            groups = [((ax, z), [a for a in dynamic if a.get_zorder() == z], []) for z in zorders]
+
+            # Same artist list Axes.draw() uses.
+            hidden = [ax.patch]
+            if not (ax.axison and ax.get_frame_on()):
+                hidden.extend(ax.spines.values())
+            if not ax.axison:
+                hidden.extend(ax._axis_map.values())
+
+            for child in ax.get_children():
+                if child in hidden or child in self.dynamic or not child.get_visible():
+                    continue
+                above = [i for i, z in enumerate(zorders) if child.get_zorder() > z]
+                if above:
+                    groups[above[-1]][2].append(child)
+            layers.extend(groups)
+        return layers
+
+    def _capture(self):
+        """Draw the static artists once and cache background + overlay bands."""
+        self.layers = self._static_layers()
+        overlay_artists = [a for _, _, overlay in self.layers for a in overlay]
+
+        # Animated artists are skipped by Figure/Axes.draw (set_visible is not
+        # honoured by every artist, e.g. cartopy's Gridliner).
+        for artist in overlay_artists:
+            artist.set_animated(True)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in overlay_artists:
+            artist.set_animated(False)
+
+        # Render each overlay band on a transparent canvas and keep only the
+        # pixels it actually touches.
+        renderer = self.canvas.get_renderer()
+        self.overlays = []
+        for _, _, overlay in self.layers:
+            if not overlay:
+                self.overlays.append(None)
+                continue
+            renderer.clear()
+            for artist in sorted(overlay, key=lambda a: a.get_zorder()):
+                artist.draw(renderer)
+            rgba = np.asarray(self.canvas.buffer_rgba())
+            alpha = rgba[..., 3]
+            pixels = np.nonzero(alpha)
+            weight = (alpha[pixels] / 255.0)[:, None]
+            self.overlays.append((pixels, rgba[pixels][:, :3] * weight, 1.0 - weight))
+
+        self.canvas.restore_region(self.background)
+
+    def draw_frame(self):
+        """Restore the cached background, draw the dynamic layers, paste the overlays."""
+        if self.background is None:
+            self._capture()
+
+        self.canvas.restore_region(self.background)
+        renderer = self.canvas.get_renderer()
+        for (_, dynamic, _), overlay in zip(self.layers, self.overlays):
+            for artist in dynamic:
+                artist.draw(renderer)
+            if overlay is not None:
+                pixels, premultiplied, keep = overlay
+                buffer = np.asarray(self.canvas.buffer_rgba())
+                buffer[pixels + (slice(0, 3),)] = (buffer[pixels][:, :3] * keep + premultiplied).astype(np.uint8)
+                buffer[pixels + (3,)] = 255
+
+    def frame_rgba(self):
+        """Draw a frame and return a copy of the RGBA pixels (rows top to bottom)."""
+        self.draw_frame()
+        return np.array(self.canvas.buffer_rgba())
+
+    def benchmark(self, frames=10):
+        """Frames per second for a full canvas.draw() vs. a blit redraw of the same frame."""
+        for artist in self.dynamic:
+            artist.set_animated(False)
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.canvas.draw()
+        full_fps = frames / (time.perf_counter() - start)
+        for artist in self.dynamic:
+            artist.set_animated(True)
+
+        self.invalidate()
+        self.draw_frame()
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.draw_frame()
+        blit_fps = frames / (time.perf_counter() - start)
+        return full_fps, blit_fps
@@ -0,0 +1,116 @@
+"""
+©2025 JesseLikesWeather.
+
+Save rendered frames off the main thread.
+
+plt.savefig draws the figure and then zlib-compresses a 1920x1080 PNG on the
+same thread, and the compression is a good share of each image. Here the
+figure is drawn to the Agg canvas, its RGBA buffer is copied, and the copy is
+encoded (PNG, WebP or AVIF) on a small thread pool while the caller goes on
+to the next volume. Pillow releases the GIL while it compresses, so the
+encode really does run alongside the next render.
+
+    writer = ImageWriter('webp', quality=85, metrics=metrics)
+    writer.submit(figure_rgba(fig), 'KTLX_20130531_233259.webp')
+    ...
+    writer.wait()
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+
+FORMATS = {'png': 'PNG', 'webp': 'WEBP', 'avif': 'AVIF'}
+
+
+def check_format(image_format):
+    """Raise ValueError unless this Pillow can write image_format."""
+    from PIL import features
+
+    if image_format not in FORMATS:
+        raise ValueError(f"Unknown image format {image_format!r}, expected one of {list(FORMATS)}")
+    # WebP and AVIF are optional parts of a Pillow build (AVIF since Pillow 11.3)
+    if image_format != 'png' and not features.check(image_format):
+        raise ValueError(f"This Pillow can't write {image_format.upper()}. Install Pillow>=11.3 "
+                         f"(pip install -U Pillow) or set the output format to 'png'.")
+
+
+def figure_rgba(fig):
+    """Draw fig on its Agg canvas and return a copy of the RGBA pixels (rows top to bottom)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    canvas = fig.canvas if isinstance(fig.canvas, FigureCanvasAgg) else FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.array(canvas.buffer_rgba())
+
+
+def encode_image(rgba, path, image_format='png', compress_level=6, quality=90):
+    """
+    Write an RGBA uint8 array to path. compress_level (0-9) is the PNG zlib
+    level, quality (0-100) is for WebP/AVIF; 100 gives lossless WebP.
+    """
+    from PIL import Image
+
+    check_format(image_format)
+    image = Image.fromarray(rgba, 'RGBA')
+    # Frames are opaque; dropping alpha makes every format a quarter smaller
+    if image.getextrema()[3][0] == 255:
+        image = image.convert('RGB')
+
+    if image_format == 'png':
+        options = {'compress_level': compress_level}
+    elif image_format == 'webp':
+        options = {'quality': quality, 'lossless': quality >= 100, 'method': 4}
+    else:
+        options = {'quality': quality, 'speed': 8}
+
+    # Write then rename, so a half-written frame is never picked up (GIFs, viewers)
+    temp_path = path + '.tmp'
+    image.save(temp_path, format=FORMATS[image_format], **options)
+    os.replace(temp_path, path)
+    return path
+
+
+class ImageWriter:
+    """
+    Encode frames on a background thread pool.
+
+    submit() returns straight away; wait() blocks until everything submitted
+    so far is on disk and re-raises the first encoding error.
+    """
+
+    def __init__(self, image_format='png', compress_level=6, quality=90, threads=2, metrics=None):
+        # Fail here rather than on the first frame, off in a worker thread
+        check_format(image_format)
+        self.image_format = image_format
+        self.compress_level = compress_level
+        self.quality = quality
+        self.metrics = metrics
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='image_writer')
+        self.pending = []
+
+    def _encode(self, rgba, path):
+        if self.metrics is None:
+            return encode_image(rgba, path, self.image_format, self.compress_level, self.quality)
+        with self.metrics.stage('encode', format=self.image_format):
+            encode_image(rgba, path, self.image_format, self.compress_level, self.quality)
+        self.metrics.count('image_bytes', os.path.getsize(path))
+        return path
+
+    def submit(self, rgba, path):
+        """Queue rgba (not copied; don't modify it afterwards) to be written to path."""
+        future = self.pool.submit(self._encode, rgba, path)
+        self.pending.append(future)
+        return future
+
+    def wait(self):
+        """Block until every queued frame is written. Returns their paths."""
+        pending, self.pending = self.pending, []
+        return [future.result() for future in pending]
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            self.pool.shutdown()
@@ -0,0 +1,192 @@
+"""
+©2025 JesseLikesWeather.
+
+Lightweight per-stage instrumentation for the render scripts.
+
+    metrics = Instrumentation('Level2New')
+    with metrics.stage('decode'):
+        radar = ...
+    metrics.count('gates_decoded', radar.nrays * radar.ngates)
+
+Stages nest and can repeat (one per loop frame, say). Each one records its
+wall time and, with track_memory(), the tracemalloc peak reached inside it.
+Counters are plain running totals. At the end of a run print_summary() shows
+where the time went, and the same numbers export as a Chrome trace (open in
+chrome://tracing or ui.perfetto.dev) or Prometheus text.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+def configure_logging(logger, level='INFO'):
+    """
+    Send a script's logger to stdout as plain lines, in step with its prints.
+    DEBUG shows the per-city/per-warning chatter. Library loggers are untouched.
+    """
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    logger.propagate = False
+
+
+class Instrumentation:
+    """Stage timers, counters and optional tracemalloc peaks for one script run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.events = []
+        self.counters = {}
+        self.counter_events = []
+        self.memory = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def track_memory(self):
+        """Start tracemalloc so every stage also records its peak allocation."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.memory = True
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def stage(self, name, **args):
+        return _Stage(self, name, args)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self.counter_events.append((self._now_us(), name, self.counters[name]))
+
+    def _now_us(self):
+        return (time.perf_counter() - self.origin) * 1e6
+
+    # --------------------------------------------------------------------------
+    # Reports
+    # --------------------------------------------------------------------------
+
+    def stage_totals(self):
+        """{stage: {'calls', 'seconds', 'peak_bytes'}} in first-seen order."""
+        totals = {}
+        for event in self.events:
+            total = totals.setdefault(event['name'], {'calls': 0, 'seconds': 0.0, 'peak_bytes': None})
+            total['calls'] += 1
+            total['seconds'] += event['dur'] / 1e6
+            peak = event['args'].get('peak_bytes')
+            if peak is not None:
+                total['peak_bytes'] = max(total['peak_bytes'] or 0, peak)
+        return totals
+
+    def print_summary(self):
+        totals = self.stage_totals()
+        if not totals:
+            return
+        print(f"\n{self.name} stages:")
+        for name, total in totals.items():
+            peak = f"  peak {total['peak_bytes'] / 1e6:8.1f} MB" if total['peak_bytes'] is not None else ''
+            print(f"  {name:<18} {total['calls']:>4}x {total['seconds']:9.3f}s{peak}")
+        for name, value in self.counters.items():
+            print(f"  {name:<18} {value:>14,}")
+
+    def chrome_trace(self):
+        """Trace Event Format dict: one complete ('X') event per stage, counters as 'C' events."""
+        pid = os.getpid()
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': self.name}}]
+        for event in self.events:
+            trace.append({'name': event['name'], 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': event['tid'],
+                          'ts': event['ts'], 'dur': event['dur'], 'args': event['args']})
+        for ts, name, value in self.counter_events:
+            trace.append({'name': name, 'ph': 'C', 'pid': pid, 'ts': ts, 'args': {name: value}})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (e.g. for node_exporter's textfile collector)."""
+        script = self.name.replace('"', '')
+        lines = []
+        totals = self.stage_totals()
+
+        lines.append('# HELP weather_stage_seconds_total Wall time spent in each render stage.')
+        lines.append('# TYPE weather_stage_seconds_total counter')
+        for name, total in totals.items():
+            lines.append(f'weather_stage_seconds_total{{script="{script}",stage="{name}"}} {total["seconds"]:.6f}')
+
+        lines.append('# HELP weather_stage_calls_total Times each render stage ran.')
+        lines.append('# TYPE weather_stage_calls_total counter')
+        for name, total in totals.items():
+            lines.append(f'weather_stage_calls_total{{script="{script}",stage="{name}"}} {total["calls"]}')
+
+        peaks = {name: total['peak_bytes'] for name, total in totals.items() if total['peak_bytes'] is not None}
+        if peaks:
+            lines.append('# HELP weather_stage_peak_memory_bytes Highest tracemalloc peak inside each stage.')
+            lines.append('# TYPE weather_stage_peak_memory_bytes gauge')
+            for name, peak in peaks.items():
+                lines.append(f'weather_stage_peak_memory_bytes{{script="{script}",stage="{name}"}} {peak}')
+
+        for name, value in self.counters.items():
+            lines.append(f'# TYPE weather_{name}_total counter')
+            lines.append(f'weather_{name}_total{{script="{script}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, trace_file=None, metrics_file=None):
+        """Write whichever of the Chrome trace / Prometheus files are configured."""
+        if trace_file:
+            with open(trace_file, 'w') as f:
+                json.dump(self.chrome_trace(), f)
+            print(f"Trace saved as {trace_file}")
+        if metrics_file:
+            with open(metrics_file, 'w') as f:
+                f.write(self.prometheus_text())
+            print(f"Metrics saved as {metrics_file}")
+
+
+class _Stage:
+    """Context manager behind Instrumentation.stage()."""
+
+    def __init__(self, metrics, name, args):
+        self.metrics = metrics
+        self.name = name
+        self.args = args
+        self.peak = 0
+
+    def __enter__(self):
+        stack = self.metrics._stack()
+        if self.metrics.memory:
+            # Fold the peak so far into the enclosing stage before resetting,
+            # so nested stages don't hide the outer stage's own peak.
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        stack = self.metrics._stack()
+        stack.pop()
+
+        args = dict(self.args)
+        if self.metrics.memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            args['peak_bytes'] = self.peak
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+        if exc_type is not None:
+            args['error'] = exc_type.__name__
+
+        event = {'name': self.name, 'ts': (self.start - self.metrics.origin) * 1e6,
+                 'dur': (end - self.start) * 1e6, 'tid': threading.get_ident(), 'args': args}
+        with self.metrics._lock:
+            self.metrics.events.append(event)
+        return False
@@ -0,0 +1,108 @@
+"""
+©2025 JesseLikesWeather.
+
+Finished images (PNG/WebP/AVIF frames, GIFs) kept on disk and keyed by
+everything that went into them: the source data (URL + ETag, file size and
+time, or granule times), extent, field, colormap, city population cut-off,
+warning window and a hash of the code itself. Running a script again with
+the same settings copies the stored image into place instead of downloading,
+decoding and drawing it again. The store is capped at max_bytes; the least
+recently used images are deleted first.
+
+    cache = RenderCache('render_cache', 500 * 1024 * 1024)
+    key = cache_key(source=..., extent=..., code=code_version(SCRIPT_DIR, UTILITIES_DIR))
+    if not cache.fetch(key, 'KTLX.png'):
+        ...render KTLX.png...
+        cache.store(key, 'KTLX.png')
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+
+def code_version(*folders):
+    """Hash of every .py file in folders, so editing any script or helper starts a fresh set of images."""
+    digest = hashlib.sha1()
+    for folder in folders:
+        for name in sorted(os.listdir(folder)):
+            if name.endswith('.py'):
+                digest.update(name.encode('utf-8'))
+                with open(os.path.join(folder, name), 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def cache_key(**parts):
+    """Hash of the keyword arguments (anything json can write, or str() of it)."""
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def copy_file(source, destination):
+    """Copy then rename, so a reader never sees half a file."""
+    temp_path = destination + '.tmp'
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+class RenderCache:
+    """
+    Size-bounded LRU store of rendered images in one folder.
+
+    Each entry is <key><extension>; its modification time is when it was
+    last stored or served, which is what eviction goes by.
+    """
+
+    def __init__(self, directory, max_bytes, metrics=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_path(self, key, output_path):
+        return os.path.join(self.directory, key + os.path.splitext(output_path)[1])
+
+    def fetch(self, key, output_path):
+        """Copy the image stored under key to output_path. False if there isn't one."""
+        entry = self.entry_path(key, output_path)
+        try:
+            copy_file(entry, output_path)
+        except FileNotFoundError:
+            if self.metrics is not None:
+                self.metrics.count('render_cache_misses')
+            return False
+        os.utime(entry)
+        if self.metrics is not None:
+            self.metrics.count('render_cache_hits')
+        return True
+
+    def store(self, key, output_path):
+        """Keep a copy of output_path under key, then trim the store to max_bytes."""
+        copy_file(output_path, self.entry_path(key, output_path))
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used images until the store fits in max_bytes. Returns how many."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.tmp') or not os.path.isfile(path):
+                continue
+            status = os.stat(path)
+            entries.append((status.st_mtime, status.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        # The newest image always stays, even if it alone is over the limit
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            evicted += 1
+        if evicted and self.metrics is not None:
+            self.metrics.count('render_cache_evictions', evicted)
+        return evicted